@@ -1,19 +1,149 @@
 import asyncio
+import os
 import typing
-
-from ..constants import VALID_FIELDS_LITERAL, VALID_FIELDS
+from urllib.parse import unquote
+
+from ..constants import (
+    VALID_FIELDS_LITERAL,
+    DEFAULT_CURRENCIES,
+    MoneyOperation,
+    LEADERBOARD_FIELDS_LITERAL,
+    GLOBAL_GUILD_ID,
+)
 from ..exceptions import (
     NotFoundException,
-    ItemAlreadyExists,
+    NotEnoughItemsException,
     NegativeAmountException,
     EnsurePositiveBalanceException,
+    InsufficientFundsException,
+)
+from ..objects import (
+    User,
+    Item,
+    Balance,
+    BulkResult,
+    CacheStats,
+    PurchaseResult,
+    ItemRow,
+    UserRow,
+    EconomyStats,
+    Rank,
+)
+from ..cache import UserCache
+from ..backup import Progress, open_source, open_target, iterate_records, write_records
+from ..columnar import ColumnarBuilder
+from ..ranking import RankIndex
+from ..scope import GuildScope
+from ..utils import (
+    iterate_chunks,
+    resolve_currencies,
+    resolve_percentiles,
+    resolve_buckets,
+    bucket_bounds,
+    percentile_rank,
 )
-from ..objects import User, Item
 from ..__version__ import check_for_updates
 from motor import motor_asyncio
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
 
 __all__ = ["Economy"]
 
+# Documents keep a denormalized bank + wallet total so it can be indexed
+_TOTAL_STAGE = {"$set": {"total": {"$add": ["$bank", "$wallet"]}}}
+
+# Version of the document layout, stored once a collection has been migrated to it
+_SCHEMA_VERSION = 1
+
+# Items are stored as {escaped name: quantity}, field names cannot contain '.' or '$'
+_ITEM_KEY_ESCAPES = (("%", "%25"), (".", "%2E"), ("$", "%24"))
+
+
+def _item_key(item_name: str) -> str:
+    """
+    Escape an item name so it can be used as a document field name.
+
+    Args:
+        item_name: Name of the item
+
+    Returns:
+        str: Field name of the item inside the items map
+    """
+    for char, escaped in _ITEM_KEY_ESCAPES:
+        item_name = item_name.replace(char, escaped)
+    return item_name
+
+
+def _item_key_expression(name: typing.Any) -> dict:
+    """
+    Build the aggregation expression applying _item_key server-side.
+
+    Args:
+        name: Expression evaluating to an item name
+
+    Returns:
+        dict: Chain of $replaceAll expressions
+    """
+    for char, escaped in _ITEM_KEY_ESCAPES:
+        name = {
+            "$replaceAll": {
+                "input": name,
+                "find": {"$literal": char},
+                "replacement": escaped,
+            }
+        }
+    return name
+
+
+def _user_key(guild_id: int, user_id: typing.Union[str, int]) -> typing.Any:
+    """
+    Build the _id of a user document.
+
+    Args:
+        guild_id: Guild the user belongs to
+        user_id: Discord user ID or unique identifier
+
+    Returns:
+        Any: The user ID itself for the unscoped economy, so documents written
+             before guild scoping keep their _id, otherwise a compound
+             {guild_id, user_id} document
+    """
+    if guild_id == GLOBAL_GUILD_ID:
+        return user_id
+    return {"guild_id": guild_id, "user_id": user_id}
+
+
+def _user_id(document_id: typing.Any) -> typing.Union[str, int]:
+    """
+    Extract the user ID from the _id of a user document.
+
+    Args:
+        document_id: _id built by _user_key
+
+    Returns:
+        Union[str, int]: Discord user ID or unique identifier
+    """
+    if isinstance(document_id, dict):
+        return document_id["user_id"]
+    return document_id
+
+
+def _to_items(user_id: typing.Union[str, int], items: dict) -> typing.List[Item]:
+    """
+    Convert the items map of a document into Item objects.
+
+    Args:
+        user_id: Discord user ID or unique identifier
+        items: Map of escaped item names to quantities
+
+    Returns:
+        List[Item]: Owned item stacks
+    """
+    return [
+        Item(idx, unquote(key), user_id, qty)
+        for idx, (key, qty) in enumerate(items.items())
+        if qty > 0
+    ]
+
 
 class Economy:
     """
@@ -22,12 +152,19 @@ class Economy:
     This class provides methods to manage user accounts, currency balances, and inventory items
     using MongoDB with optimized connection handling.
 
+    Users are keyed by (guild_id, user_id). Methods default to guild 0, the
+    unscoped economy, and scope() returns a view bound to one guild.
+
     Attributes:
         mongo_url (str): MongoDB connection URL
         database_name (str): Name of the MongoDB database
         collection (str): Name of the collection to store user data
         ensure_positive_balance (bool): If True, prevents balances from going negative
                                         through validation checks
+        cache_size (int): If set, get_user results are cached for up to this many users
+        cache_ttl (float): Seconds after which a cached user expires
+        check_updates (bool): If True, checks PyPI for a newer version in the background
+        currencies (tuple): Balance fields, bank and wallet followed by extra currencies
     """
 
     def __init__(
@@ -36,6 +173,11 @@ class Economy:
         database_name: str,
         collection: typing.Optional[str] = "economy",
         ensure_positive_balance: bool = True,
+        cache_size: typing.Optional[int] = None,
+        cache_ttl: typing.Optional[float] = 60,
+        check_updates: bool = False,
+        currencies: typing.Optional[typing.Iterable[str]] = None,
+        rank_index: bool = False,
     ):
         """
         Initialize the economy system with MongoDB connection settings.
@@ -47,277 +189,1831 @@ class Economy:
                        Defaults to "economy"
             ensure_positive_balance: Whether to prevent negative balances.
                                     Defaults to True
+            cache_size: Enables an in-process LRU cache of users returned by get_user,
+                        invalidated by every write of this instance.
+                        Defaults to None (no cache)
+            cache_ttl: Seconds after which a cached user is reloaded, None to keep
+                       users until evicted. Defaults to 60
+            check_updates: Whether to check for package updates in a background
+                           task once the database is first used. Defaults to False
+            currencies: Extra balance fields such as ["gems", "tokens"], each
+                        with its own leaderboard index. bank and wallet are always
+                        present. Defaults to None (bank and wallet only)
+            rank_index: Keep an in-memory sorted index of each leaderboard that
+                        get_rank is called for, updated after writes of this
+                        instance, so ranks are binary searches. Defaults to False
+
+        Raises:
+            ValueError: If a currency name is not an identifier or is reserved
 
         Note:
-            Automatically checks for package updates during initialization.
+            Construction performs no I/O. Indexes are created on first use,
+            or eagerly through create(). Currencies missing from existing
+            documents are backfilled with 0 the first time they are used.
         """
         self.__ensure_positive_balance = ensure_positive_balance
+        self.currencies = resolve_currencies(currencies)
+        self.__projection = {currency: 1 for currency in self.currencies}
+        self.__cache = UserCache(cache_size, cache_ttl) if cache_size else None
+        self.__ranks = RankIndex(self.currencies) if rank_index else None
         self.__client = motor_asyncio.AsyncIOMotorClient(
             mongo_url, serverSelectionTimeoutMS=5000
         )
 
         self.__db = self.__client[database_name]
         self.__collection = self.__db[collection]
+        # Holds the marker of the migrations already applied to the collection
+        self.__schema = self.__db[f"{collection}.schema"]
 
-        try:
-            self.__loop = asyncio.get_running_loop()
-        except RuntimeError:
-            self.__loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.__loop)
-
-        self.__loop.run_until_complete(check_for_updates())
+        self.__check_updates = check_updates
+        self.__indexes_ready = False
+        self.__setup_task = None
+        self.__update_task = None
 
-    async def ensure_registered(self, user_id: typing.Union[str, int]) -> None:
+    @classmethod
+    async def create(cls, *args, **kwargs) -> "Economy":
         """
-        Check if a user exists in the database, registering them if not found.
+        Create an economy and eagerly prepare the collection indexes.
 
         Args:
-            user_id: Discord user ID or unique identifier
+            *args: Positional arguments passed to the constructor
+            **kwargs: Keyword arguments passed to the constructor
+
+        Returns:
+            Economy: Ready to use economy instance
 
         Example:
-            >> await economy.ensure_registered(1234567890)
+            >> economy = await Economy.create(mongo_url, database_name="Discord")
         """
-        user = await self.__collection.find_one({"_id": user_id})
-        if not user:
-            user_obj = {"_id": user_id, "bank": 0, "wallet": 0, "items": []}
-            await self.__collection.insert_one(user_obj)
+        economy = cls(*args, **kwargs)
+        await economy.__ensure_indexes()
+        return economy
+
+    async def __aenter__(self) -> "Economy":
+        await self.__ensure_indexes()
+        return self
 
-    async def get_user(self, user_id: typing.Union[str, int]) -> User:
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
         """
-        Retrieve a user's complete economic profile including items.
+        Close the MongoDB client.
 
-        Args:
-            user_id: Discord user ID or unique identifier
+        Example:
+            >> await economy.close()
+        """
+        self.__client.close()
 
-        Returns:
-            User: User object containing balance information and items
+    async def __ensure_indexes(self) -> None:
+        """
+        Run index creation once, sharing it between concurrent first calls.
 
-        Raises:
-            NoItemFoundException: If the specified user doesn't exist
+        Note:
+            A failed attempt is retried by the next call.
+        """
+        if self.__indexes_ready:
+            return
 
-        Example:
-            >> user = await economy.get_user(1234567890)
-            >> print(user.bank, user.wallet, user.items)
+        if self.__setup_task is None or self.__setup_task.done():
+            self.__setup_task = asyncio.ensure_future(self.__create_indexes())
+
+            if self.__check_updates and self.__update_task is None:
+                self.__update_task = asyncio.ensure_future(check_for_updates())
+
+        await asyncio.shield(self.__setup_task)
+        self.__indexes_ready = True
+
+    async def __create_indexes(self) -> None:
         """
-        r = await self.__collection.find_one({"_id": user_id})
+        Ensure leaderboard indexes exist, backfilling the total and currency fields if needed.
 
-        if not r:
-            raise NotFoundException(f"User {user_id} not found")
+        Creates:
+        - Descending indexes on every currency and on total (bank + wallet),
+          prefixed by guild_id so every guild's leaderboard is an index range
 
-        # Convert item strings to Item objects
-        items = [
-            Item(idx, item_name, user_id) for idx, item_name in enumerate(r["items"])
-        ]
+        Note:
+            Items stored in the old list layout are migrated to quantity maps,
+            and documents written before guild scoping move to guild 0.
+            The backfills scan the whole collection, so they run only once. The
+            schema version and backfilled currencies are kept in the
+            '<collection>.schema' collection, removing its document reruns them.
+        """
+        schema = await self.__schema.find_one({"_id": "schema"}) or {}
+        upgrade = schema.get("version", 0) < _SCHEMA_VERSION
+        backfilled = (*DEFAULT_CURRENCIES, *schema.get("currencies", ()))
+        missing = [currency for currency in self.currencies if currency not in backfilled]
+
+        if upgrade:
+            await self.__collection.update_many(
+                {"total": {"$exists": False}}, [_TOTAL_STAGE]
+            )
+            await self.__collection.update_many(
+                {"guild_id": {"$exists": False}}, {"$set": {"guild_id": GLOBAL_GUILD_ID}}
+            )
+            await self.__collection.update_many(
+                {"items": {"$type": "array"}},
+                [
+                    {
+                        "$set": {
+                            "items": {
+                                "$arrayToObject": {
+                                    "$map": {
+                                        "input": {"$setUnion": ["$items", []]},
+                                        "as": "name",
+                                        "in": {
+                                            "k": _item_key_expression("$$name"),
+                                            "v": {
+                                                "$size": {
+                                                    "$filter": {
+                                                        "input": "$items",
+                                                        "cond": {"$eq": ["$$this", "$$name"]},
+                                                    }
+                                                }
+                                            },
+                                        },
+                                    }
+                                }
+                            }
+                        }
+                    }
+                ],
+            )
+
+        for currency in missing:
+            await self.__collection.update_many(
+                {currency: {"$exists": False}}, {"$set": {currency: 0}}
+            )
+
+        if upgrade or missing:
+            await self.__schema.update_one(
+                {"_id": "schema"},
+                {
+                    "$max": {"version": _SCHEMA_VERSION},
+                    "$addToSet": {"currencies": {"$each": missing}},
+                },
+                upsert=True,
+            )
 
-        return User(user_id, r["bank"], r["wallet"], items)
+        for key in (*self.currencies, "total"):
+            await self.__collection.create_index([("guild_id", 1), (key, -1), ("_id", -1)])
 
-    async def delete_user_account(self, user_id: typing.Union[str, int]) -> None:
+    def __pipeline_defaults(self, field: VALID_FIELDS_LITERAL, guild_id: int) -> dict:
         """
-        Permanently delete a user account and all associated items.
+        Build pipeline expressions keeping existing fields or falling back to defaults.
 
         Args:
-            user_id: Discord user ID or unique identifier
+            field: Balance field set by the update itself
+            guild_id: Guild the user belongs to
 
-        Note:
-            This action is irreversible and will remove all user data including items.
+        Returns:
+            dict: $ifNull expressions for the remaining fields of a user
         """
-        await self.__collection.delete_one({"_id": user_id})
+        return {
+            key: {"$ifNull": [f"${key}", value]}
+            for key, value in self.__insert_defaults(field, guild_id).items()
+        }
 
-    async def get_all_users(self) -> typing.AsyncGenerator[User, None]:
+    def __insert_defaults(self, field: VALID_FIELDS_LITERAL, guild_id: int) -> dict:
         """
-        Retrieve all users from the database as an asynchronous generator.
+        Build the default document fields for an upsert modifying the given field.
 
-        Yields:
-            User: Complete user objects with balances and items
+        Args:
+            field: Balance field set by the update itself
+            guild_id: Guild the user belongs to
 
-        Example:
-            >> async for user in economy.get_all_users():
-            ...     print(f"User {user.id}: {user.bank} coins")
+        Returns:
+            dict: Remaining fields of a freshly registered user
         """
-        data = self.__collection.find()
+        defaults = {"guild_id": guild_id}
+        defaults.update((key, 0) for key in self.currencies if key != field)
+        if field not in DEFAULT_CURRENCIES:
+            defaults["total"] = 0
+        defaults["items"] = {}
+        return defaults
+
+    def __to_balance(self, document: dict) -> Balance:
+        """
+        Convert a user document into a Balance.
 
-        async for user in data:
-            # Convert item strings to Item objects
-            items = [
-                Item(idx, item_name, user["_id"])
-                for idx, item_name in enumerate(user["items"])
-            ]
-            yield User(user["_id"], user["bank"], user["wallet"], items)
+        Args:
+            document: User document with at least the currency fields
 
-    async def add_money(
+        Returns:
+            Balance: Balance holding every currency, 0 for missing ones
+        """
+        balances = {currency: document.get(currency, 0) for currency in self.currencies}
+        return Balance(
+            _user_id(document["_id"]), balances["bank"], balances["wallet"], balances
+        )
+
+    def __to_user(self, document: dict) -> User:
+        """
+        Convert a complete user document into a User.
+
+        Args:
+            document: User document including the items map
+
+        Returns:
+            User: User holding every currency and item stack
+        """
+        balances = {currency: document.get(currency, 0) for currency in self.currencies}
+        user_id = _user_id(document["_id"])
+        return User(
+            user_id,
+            balances["bank"],
+            balances["wallet"],
+            _to_items(user_id, document.get("items", {})),
+            balances,
+        )
+
+    def __to_row(self, document: dict) -> UserRow:
+        """
+        Convert a complete user document into an immutable UserRow.
+
+        Args:
+            document: User document including the items map
+
+        Returns:
+            UserRow: Row holding every currency and item stack
+        """
+        user_id = _user_id(document["_id"])
+        items = tuple(
+            ItemRow(idx, unquote(key), user_id, qty)
+            for idx, (key, qty) in enumerate(document.get("items", {}).items())
+            if qty > 0
+        )
+        return UserRow(
+            user_id,
+            document.get("bank", 0),
+            document.get("wallet", 0),
+            items,
+            tuple(document.get(currency, 0) for currency in self.currencies[2:]),
+        )
+
+    def __validate_money(
         self,
-        user_id: typing.Union[str, int],
+        operation: str,
         field: VALID_FIELDS_LITERAL,
         amount: typing.Union[float, int],
     ) -> None:
         """
-        Add money to a user's specified balance field.
+        Validate a balance mutation before it is sent to the database.
 
         Args:
-            user_id: Discord user ID or unique identifier
-            field: Balance field to modify ('bank' or 'wallet')
-            amount: Positive amount to add
+            operation: Kind of mutation ('add', 'remove' or 'set')
+            field: Balance field to modify
+            amount: Amount used by the mutation
 
         Raises:
+            NegativeAmountException: If adding or removing a negative amount
+            EnsurePositiveBalanceException: If setting a negative balance when
+                                            ensure_positive_balance is True
             ValueError: If invalid field specified
-            NegativeAmountException: If negative amount provided
-            NoItemFoundException: If user doesn't exist
-
-        Example:
-            >> await economy.add_money(1234567890, "wallet", 100)
         """
-        if amount < 0:
+        if operation == "set":
+            if self.__ensure_positive_balance and amount < 0:
+                raise EnsurePositiveBalanceException(
+                    "Ensure positive balance is turned on."
+                    " User's balance cannot be set to less than 0."
+                )
+        elif amount < 0:
             raise NegativeAmountException(
                 "Invalid amount. Amount cannot be less than 0"
             )
 
-        if field not in VALID_FIELDS:
+        if field not in self.__projection:
             raise ValueError(
-                f"Invalid field: {field}. Must be one of: {', '.join(VALID_FIELDS)}"
+                f"Invalid field: {field}. Must be one of: {', '.join(self.currencies)}"
             )
 
-        await self.ensure_registered(user_id)
-
-        user = await self.__collection.find_one({"_id": user_id})
-        await self.__collection.update_one(
-            {"_id": user_id}, {"$set": {field: user[field] + amount}}
-        )
-
-    async def remove_money(
+    def __money_update(
         self,
+        operation: str,
         user_id: typing.Union[str, int],
         field: VALID_FIELDS_LITERAL,
         amount: typing.Union[float, int],
+        guild_id: int,
+    ) -> typing.Tuple[dict, typing.Union[dict, list]]:
+        """
+        Build the filter and update document of an upsert applying a balance mutation.
+
+        Args:
+            operation: Kind of mutation ('add', 'remove' or 'set')
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify
+            amount: Amount used by the mutation
+            guild_id: Guild the user belongs to
+
+        Returns:
+            tuple: Filter and update (document or aggregation pipeline)
+        """
+        key = {"_id": _user_key(guild_id, user_id)}
+
+        if operation == "set":
+            return key, [
+                {"$set": {field: amount, **self.__pipeline_defaults(field, guild_id)}},
+                _TOTAL_STAGE,
+            ]
+
+        if operation == "add" or not self.__ensure_positive_balance:
+            delta = amount if operation == "add" else -amount
+            increments = {field: delta}
+            if field in DEFAULT_CURRENCIES:
+                increments["total"] = delta
+
+            return key, {
+                "$inc": increments,
+                "$setOnInsert": self.__insert_defaults(field, guild_id),
+            }
+
+        # Clamp at zero server-side, fields missing on upsert fall back to defaults
+        return key, [
+            {
+                "$set": {
+                    field: {
+                        "$max": [
+                            0,
+                            {"$subtract": [{"$ifNull": [f"${field}", 0]}, amount]},
+                        ]
+                    },
+                    **self.__pipeline_defaults(field, guild_id),
+                }
+            },
+            _TOTAL_STAGE,
+        ]
+
+    def __invalidate(self, guild_id: int, *user_ids: typing.Union[str, int]) -> None:
+        """
+        Drop cached users after their data changed.
+
+        Args:
+            guild_id: Guild the users belong to
+            user_ids: Discord user IDs or unique identifiers
+        """
+        if self.__cache is not None:
+            for user_id in user_ids:
+                self.__cache.invalidate((guild_id, user_id))
+
+    async def __update_ranked(
+        self, filter: dict, update: typing.Union[dict, list], **kwargs: typing.Any
+    ) -> typing.Optional[dict]:
+        """
+        Apply a single-document update and return the balances it left behind.
+
+        Args:
+            filter: Filter of the document
+            update: Update document or aggregation pipeline
+            **kwargs: Options of find_one_and_update, e.g. upsert or session
+
+        Returns:
+            dict | None: Balances after the update, None if no document matched
+        """
+        return await self.__collection.find_one_and_update(
+            filter,
+            update,
+            projection=self.__projection,
+            return_document=ReturnDocument.AFTER,
+            **kwargs,
+        )
+
+    def __update_ranks(
+        self, guild_id: int, user_id: typing.Union[str, int], document: dict
     ) -> None:
         """
-        Remove money from a user's specified balance field.
+        Put the balances of an updated document into the rank index.
 
         Args:
+            guild_id: Guild the user belongs to
             user_id: Discord user ID or unique identifier
-            field: Balance field to modify ('bank' or 'wallet')
-            amount: Positive amount to remove
+            document: Balances returned by the update
 
-        Raises:
-            ValueError: If invalid field specified
-            NegativeAmountException: If negative amount provided
-            NoItemFoundException: If user doesn't exist
+        Note:
+            The update itself returned the new balances, so unlike a delta
+            they can be replayed over a guild that was loading concurrently.
+        """
+        self.__ranks.put(
+            guild_id, user_id, [document.get(currency, 0) for currency in self.currencies]
+        )
+
+    def scope(self, guild_id: int) -> GuildScope:
+        """
+        Return a view of this economy restricted to one guild.
+
+        Args:
+            guild_id: Discord guild ID
+
+        Returns:
+            GuildScope: View exposing every method with guild_id bound, sharing
+                        this economy's client and cache
 
         Example:
-            >> await economy.remove_money(1234567890, "bank", 50)
+            >> guild = economy.scope(ctx.guild.id)
+            >> await guild.add_money(ctx.author.id, "wallet", 100)
         """
-        if amount < 0:
-            raise NegativeAmountException(
-                "Invalid amount. Amount cannot be less than 0"
-            )
+        return GuildScope(self, guild_id)
 
-        if field not in VALID_FIELDS:
-            raise ValueError(
-                f"Invalid field: {field}. Must be one of: {', '.join(VALID_FIELDS)}"
-            )
+    def cache_stats(self) -> typing.Optional[CacheStats]:
+        """
+        Return counters of the user cache.
+
+        Returns:
+            CacheStats: Hits, misses, evictions and size, or None if caching is disabled
 
-        await self.ensure_registered(user_id)
+        Example:
+            >> stats = economy.cache_stats()
+            >> print(stats.hits / max(stats.hits + stats.misses, 1))
+        """
+        return self.__cache.stats() if self.__cache is not None else None
 
-        user = await self.__collection.find_one({"_id": user_id})
+    async def ensure_registered(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> None:
+        """
+        Check if a user exists in the database, registering them if not found.
 
-        if self.__ensure_positive_balance:
-            balance = user[field]
-            if balance - amount < 0:
-                await self.set_money(user_id, field, 0)
-                return
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
 
-        await self.__collection.update_one(
-            {"_id": user_id}, {"$set": {field: user[field] - amount}}
-        )
+        Example:
+            >> await economy.ensure_registered(1234567890)
+        """
+        await self.__ensure_indexes()
 
-    async def set_money(
+        key = _user_key(guild_id, user_id)
+        user = await self.__collection.find_one({"_id": key})
+        if not user:
+            user_obj = {
+                "_id": key,
+                "guild_id": guild_id,
+                **{currency: 0 for currency in self.currencies},
+                "total": 0,
+                "items": {},
+            }
+            await self.__collection.insert_one(user_obj)
+
+            if self.__ranks is not None:
+                self.__update_ranks(guild_id, user_id, user_obj)
+
+    async def get_user(
         self,
         user_id: typing.Union[str, int],
-        field: VALID_FIELDS_LITERAL,
-        amount: typing.Union[float, int],
-    ) -> None:
+        include_items: bool = True,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> User:
         """
-        Set a user's balance field to a specific amount.
+        Retrieve a user's complete economic profile including items.
 
         Args:
             user_id: Discord user ID or unique identifier
-            field: Balance field to modify ('bank' or 'wallet')
-            amount: New absolute value for the balance
+            include_items: If False, the items map is excluded by a projection
+                           and items is set to None. Defaults to True
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            User: User object containing balance information and items
 
         Raises:
-            ValueError: If invalid field specified
-            EnsurePositiveBalanceException: If trying to set negative balance when ensure_positive_balance is True
-            NoItemFoundException: If user doesn't exist
+            NoItemFoundException: If the specified user doesn't exist
 
         Example:
-            >> await economy.set_money(1234567890, "wallet", 200)
+            >> user = await economy.get_user(1234567890)
+            >> print(user.bank, user.wallet, user.items)
+
+        Note:
+            With the cache enabled the returned object may be shared between
+            callers and must be treated as read-only.
         """
-        if self.__ensure_positive_balance and amount < 0:
-            raise EnsurePositiveBalanceException(
-                "Ensure positive balance is turned on."
-                " User's balance cannot be set to less than 0."
-            )
+        await self.__ensure_indexes()
 
-        if field not in VALID_FIELDS:
-            raise ValueError(
-                f"Invalid field: {field}. Must be one of: {', '.join(VALID_FIELDS)}"
-            )
+        if not include_items:
+            balance = await self.get_balance(user_id, guild_id=guild_id)
+            return User(balance.id, balance.bank, balance.wallet, None, balance.balances)
 
-        await self.ensure_registered(user_id)
+        if self.__cache is not None:
+            return await self.__cache.get_or_load((guild_id, user_id), self.__load_user)
 
-        await self.__collection.update_one({"_id": user_id}, {"$set": {field: amount}})
+        return await self.__fetch_user(user_id, guild_id)
 
-    async def add_item(self, user_id: typing.Union[str, int], item_name: str) -> None:
+    async def get_balance(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> Balance:
         """
-        Add an item to a user's inventory.
+        Retrieve a user's balances without transferring their items.
 
         Args:
             user_id: Discord user ID or unique identifier
-            item_name: Name of the item to add
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            Balance: Bank and wallet of the user
 
         Raises:
-            ItemAlreadyExists: If user already possesses this item
-            NoItemFoundException: If user doesn't exist
+            NotFoundException: If the specified user doesn't exist
 
         Example:
-            >> await economy.add_item(1234567890, "magic_sword")
-        """
-        await self.ensure_registered(user_id)
+            >> balance = await economy.get_balance(1234567890)
+            >> print(balance.bank, balance.wallet)
 
-        r = await self.__collection.find_one({"_id": user_id})
+        Note:
+            With the cache enabled an already cached user is served from memory,
+            a miss is read from the database without being cached.
+        """
+        await self.__ensure_indexes()
 
-        if item_name in r["items"]:
-            raise ItemAlreadyExists("User already have this item")
+        if self.__cache is not None:
+            user = self.__cache.get((guild_id, user_id))
+            if user is not None:
+                return Balance(user.id, user.bank, user.wallet, user.balances)
 
-        r["items"].append(item_name)
-        await self.__collection.update_one(
-            {"_id": user_id}, {"$set": {"items": r["items"]}}
+        r = await self.__collection.find_one(
+            {"_id": _user_key(guild_id, user_id)}, self.__projection
         )
 
-    async def remove_item(
-        self, user_id: typing.Union[str, int], item_name: str
-    ) -> None:
+        if not r:
+            raise NotFoundException(f"User {user_id} not found")
+
+        return self.__to_balance(r)
+
+    async def get_items(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> typing.List[Item]:
         """
-        Remove an item from a user's inventory.
+        Retrieve a user's item stacks without their balances.
 
         Args:
             user_id: Discord user ID or unique identifier
-            item_name: Name of the item to remove
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
 
-        Raises:
-            NoItemFoundException: If either user doesn't exist or item not found
+        Returns:
+            List[Item]: Owned item stacks, empty if the user has none or doesn't exist
 
         Example:
-            >> await economy.remove_item(1234567890, "old_sword")
+            >> items = await economy.get_items(1234567890)
+            >> print([(item.name, item.quantity) for item in items])
         """
-        await self.ensure_registered(user_id)
+        await self.__ensure_indexes()
+
+        if self.__cache is not None:
+            user = self.__cache.get((guild_id, user_id))
+            if user is not None:
+                return list(user.items)
 
-        r = await self.__collection.find_one({"_id": user_id})
+        r = await self.__collection.find_one(
+            {"_id": _user_key(guild_id, user_id)}, {"items": 1, "_id": 0}
+        )
 
-        if item_name in r["items"]:
-            r["items"].pop(r["items"].index(item_name))
+        if not r:
+            return []
 
-            await self.__collection.update_one(
-                {"_id": user_id}, {"$set": {"items": r["items"]}}
-            )
-        else:
-            raise NotFoundException(f"Item {item_name} not found for user {user_id}")
+        return _to_items(user_id, r.get("items", {}))
+
+    async def __load_user(self, key: typing.Tuple[int, typing.Union[str, int]]) -> User:
+        """
+        Cache loader of get_user.
+
+        Args:
+            key: (guild_id, user_id) cache key
+
+        Returns:
+            User: User object containing balance information and items
+        """
+        guild_id, user_id = key
+        return await self.__fetch_user(user_id, guild_id)
+
+    async def __fetch_user(
+        self, user_id: typing.Union[str, int], guild_id: int
+    ) -> User:
+        """
+        Load a user document from the database, bypassing the cache.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to
+
+        Returns:
+            User: User object containing balance information and items
+
+        Raises:
+            NotFoundException: If the specified user doesn't exist
+        """
+        r = await self.__collection.find_one({"_id": _user_key(guild_id, user_id)})
+
+        if not r:
+            raise NotFoundException(f"User {user_id} not found")
+
+        return self.__to_user(r)
+
+    async def delete_user_account(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> None:
+        """
+        Permanently delete a user account and all associated items.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Note:
+            This action is irreversible and will remove all user data including items.
+        """
+        await self.__ensure_indexes()
+
+        await self.__collection.delete_one({"_id": _user_key(guild_id, user_id)})
+        self.__invalidate(guild_id, user_id)
+
+        if self.__ranks is not None:
+            self.__ranks.discard(guild_id, user_id)
+
+    async def wipe_guild(self, guild_id: int) -> int:
+        """
+        Permanently delete every user of a guild and all their items.
+
+        Args:
+            guild_id: Discord guild ID, 0 wipes the unscoped economy
+
+        Returns:
+            int: Number of deleted users
+
+        Note:
+            Runs as one delete_many over the guild_id prefix of the leaderboard indexes.
+
+        Example:
+            >> await economy.wipe_guild(guild.id)
+        """
+        await self.__ensure_indexes()
+
+        try:
+            result = await self.__collection.delete_many({"guild_id": guild_id})
+        finally:
+            if self.__cache is not None:
+                self.__cache.clear()
+            if self.__ranks is not None:
+                self.__ranks.clear(guild_id)
+
+        return result.deleted_count
+
+    async def get_all_users(
+        self,
+        chunk_size: int = 1000,
+        raw: bool = False,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.AsyncGenerator[typing.Union[User, UserRow], None]:
+        """
+        Retrieve all users of a guild from the database as an asynchronous generator.
+
+        Args:
+            chunk_size: Number of documents fetched per cursor batch. Defaults to 1000
+            raw: If True, yield immutable UserRow tuples instead of User objects.
+                 Defaults to False
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Yields:
+            User: Complete user objects with balances and items, or UserRow
+                  tuples with raw enabled
+
+        Raises:
+            ValueError: If chunk_size is less than 1
+
+        Example:
+            >> async for user in economy.get_all_users():
+            ...     print(f"User {user.id}: {user.bank} coins")
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than 0")
+
+        await self.__ensure_indexes()
+
+        data = self.__collection.find({"guild_id": guild_id}, batch_size=chunk_size)
+
+        convert = self.__to_row if raw else self.__to_user
+        async for user in data:
+            yield convert(user)
+
+    async def export_balances(
+        self,
+        format: str = "numpy",
+        chunk_size: int = 10000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.Any:
+        """
+        Export the balances of a guild into typed columns for analytics.
+
+        Args:
+            format: 'numpy' for a dict of arrays or 'arrow' for a pyarrow.Table.
+                    Defaults to 'numpy'
+            chunk_size: Cursor batch size and number of rows copied into the
+                        columns at a time. Defaults to 10000
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            dict | pyarrow.Table: int64 'id' column and a float64 column per currency
+
+        Raises:
+            ValueError: If format is not supported or chunk_size is less than 1
+            ImportError: If numpy (or pyarrow for 'arrow') is not installed
+
+        Note:
+            Only the balance fields are projected, so items are never sent over
+            the network. The columns are sized from a count taken first and grow
+            if users are added during the scan.
+
+        Example:
+            >> columns = await economy.export_balances()
+            >> print(columns["bank"].sum(), np.percentile(columns["wallet"], 99))
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than 0")
+
+        builder = ColumnarBuilder(format, self.currencies)
+        await self.__ensure_indexes()
+
+        query = {"guild_id": guild_id}
+        builder.reserve(await self.__collection.count_documents(query))
+
+        rows = []
+        async for user in self.__collection.find(query, self.__projection, batch_size=chunk_size):
+            rows.append(
+                (_user_id(user["_id"]), *(user.get(currency, 0) for currency in self.currencies))
+            )
+            if len(rows) >= chunk_size:
+                builder.append(rows)
+                rows = []
+
+        builder.append(rows)
+        return builder.build()
+
+    async def export_to(
+        self,
+        target: typing.Union[str, os.PathLike, typing.TextIO],
+        chunk_size: int = 1000,
+        progress: Progress = None,
+        guild_id: typing.Optional[int] = None,
+    ) -> int:
+        """
+        Stream users with their balances and items to line-delimited JSON.
+
+        Args:
+            target: File path or writable text stream
+            chunk_size: Number of users written at a time. Defaults to 1000
+            progress: Called with the number of exported users after every chunk.
+                      Defaults to None
+            guild_id: Guild to export, None exports every guild. Defaults to None
+
+        Returns:
+            int: Number of exported users
+
+        Note:
+            Every line is one {"guild_id", "id", "balances", "items"} object, the
+            format read by import_from of every backend. Memory stays bounded by
+            the chunk size. Writes made during the export may or may not be included.
+
+        Example:
+            >> await economy.export_to("backup.ndjson", progress=print)
+        """
+        await self.__ensure_indexes()
+
+        if guild_id is None:
+            guild_ids = sorted(await self.__collection.distinct("guild_id"))
+        else:
+            guild_ids = [guild_id]
+
+        async def rows() -> typing.AsyncGenerator[typing.Tuple[int, UserRow], None]:
+            for guild in guild_ids:
+                async for row in self.get_all_users(chunk_size, raw=True, guild_id=guild):
+                    yield guild, row
+
+        with open_target(target) as stream:
+            return await write_records(stream, rows(), self.currencies, chunk_size, progress)
+
+    async def import_from(
+        self,
+        source: typing.Union[str, os.PathLike, typing.Iterable],
+        chunk_size: int = 10000,
+        progress: Progress = None,
+        guild_id: typing.Optional[int] = None,
+    ) -> int:
+        """
+        Load users from line-delimited JSON written by export_to.
+
+        Args:
+            source: File path, text stream or iterable of lines or decoded records
+            chunk_size: Number of users per unordered bulk write. Defaults to 10000
+            progress: Called with the number of imported users after every chunk.
+                      Defaults to None
+            guild_id: Guild every user is imported into, None keeps the guild
+                      stored in each record. Defaults to None
+
+        Returns:
+            int: Number of imported users
+
+        Raises:
+            ValueError: If a record is malformed, has an id that is not an int or
+                        str or holds a currency this economy doesn't have
+            EnsurePositiveBalanceException: If a record holds a negative balance
+                                            when ensure_positive_balance is True
+
+        Note:
+            Imported users replace existing documents with the same id, including
+            their items, so an import that fails partway can simply be run again.
+
+        Example:
+            >> await economy.import_from("backup.ndjson", progress=print)
+        """
+        await self.__ensure_indexes()
+        imported = 0
+
+        with open_source(source) as lines:
+            for chunk in iterate_records(
+                lines, self.currencies, chunk_size, guild_id, self.__ensure_positive_balance
+            ):
+                requests = []
+                for guild, user_id, values, items in chunk:
+                    document = {"guild_id": guild, **dict(zip(self.currencies, values))}
+                    document["total"] = document["bank"] + document["wallet"]
+                    document["items"] = {_item_key(name): qty for name, qty in items.items()}
+                    requests.append(
+                        ReplaceOne({"_id": _user_key(guild, user_id)}, document, upsert=True)
+                    )
+
+                try:
+                    await self.__collection.bulk_write(requests, ordered=False)
+                finally:
+                    if self.__cache is not None:
+                        self.__cache.clear()
+                    if self.__ranks is not None:
+                        for guild in {record[0] for record in chunk}:
+                            self.__ranks.clear(guild)
+
+                imported += len(chunk)
+                if progress is not None:
+                    progress(imported)
+
+        return imported
+
+    def __sort_key(self, field: LEADERBOARD_FIELDS_LITERAL) -> str:
+        """
+        Resolve a leaderboard field to the document field its index is built on.
+
+        Args:
+            field: 'bank+wallet' or a registered currency
+
+        Returns:
+            str: 'total' for 'bank+wallet', otherwise the currency itself
+
+        Raises:
+            ValueError: If the field is not a currency or 'bank+wallet'
+        """
+        if field == "bank+wallet":
+            return "total"
+
+        if field in self.__projection:
+            return field
+
+        raise ValueError(
+            f"Invalid field: {field}. Must be one of: "
+            f"{', '.join((*self.currencies, 'bank+wallet'))}"
+        )
+
+    async def stats(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        percentiles: typing.Iterable[float] = (),
+        buckets: typing.Union[int, typing.Iterable[float], None] = None,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> EconomyStats:
+        """
+        Summarize a balance field over the users of a guild without loading them.
+
+        Args:
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency.
+                   Defaults to "bank"
+            percentiles: Percentiles between 0 and 100 to look up, such as (50, 99).
+                         Defaults to none
+            buckets: Number of equal-width histogram buckets between min and max,
+                     or ascending upper bounds of the buckets. Defaults to none
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            EconomyStats: Count, sum, min, max, mean, nearest-rank percentiles and histogram
+
+        Raises:
+            ValueError: If invalid field, percentile or buckets specified
+
+        Note:
+            Count, sum, min and max are computed server-side by a $group stage.
+            Each percentile is one sorted, skipped lookup on the leaderboard
+            index, which works on every server version and matches SQLite.
+            The histogram is a second $group on a $switch over the bucket
+            bounds. $bucketAuto is not used, it picks its own bounds which
+            SQLite couldn't reproduce.
+
+        Example:
+            >> stats = await economy.stats("bank+wallet", percentiles=[99], buckets=10)
+            >> print(f"{stats.sum} coins in circulation, top 1% above {stats.percentiles[99]}")
+        """
+        await self.__ensure_indexes()
+
+        key = self.__sort_key(field)
+        percentiles = resolve_percentiles(percentiles)
+        buckets = resolve_buckets(buckets)
+        query = {"guild_id": guild_id}
+
+        cursor = self.__collection.aggregate(
+            [
+                {"$match": query},
+                {
+                    "$group": {
+                        "_id": None,
+                        "count": {"$sum": 1},
+                        "sum": {"$sum": f"${key}"},
+                        "min": {"$min": f"${key}"},
+                        "max": {"$max": f"${key}"},
+                    }
+                },
+            ]
+        )
+        groups = await cursor.to_list(length=1)
+        group = groups[0] if groups else {"count": 0, "sum": 0, "min": None, "max": None}
+        count = group["count"]
+
+        values = {}
+        for percentile in percentiles:
+            if not count:
+                values[percentile] = None
+                continue
+
+            cursor = (
+                self.__collection.find(query, {key: 1})
+                .sort([(key, 1), ("_id", 1)])
+                .skip(percentile_rank(percentile, count))
+                .limit(1)
+            )
+            users = await cursor.to_list(length=1)
+            values[percentile] = users[0].get(key, 0) if users else None
+
+        bounds = bucket_bounds(buckets, group["min"], group["max"])
+        histogram = dict.fromkeys(bounds, 0)
+        if bounds:
+            branches = [
+                {"case": {"$lte": [f"${key}", bound]}, "then": index}
+                for index, bound in enumerate(bounds)
+            ]
+            cursor = self.__collection.aggregate(
+                [
+                    {"$match": {**query, key: {"$lte": bounds[-1]}}},
+                    {"$group": {"_id": {"$switch": {"branches": branches}}, "count": {"$sum": 1}}},
+                ]
+            )
+            for bucket in await cursor.to_list(length=None):
+                histogram[bounds[bucket["_id"]]] = bucket["count"]
+
+        return EconomyStats(
+            field,
+            count,
+            group["sum"],
+            group["min"],
+            group["max"],
+            group["sum"] / count if count else None,
+            values,
+            histogram,
+        )
+
+    async def get_rank(
+        self,
+        user_id: typing.Union[str, int],
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> Rank:
+        """
+        Find a user's position on a leaderboard without sorting it.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency.
+                   Defaults to "bank"
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            Rank: 1-based rank, number of users and the user's balance
+
+        Raises:
+            NotFoundException: If the user doesn't exist
+            ValueError: If invalid field specified
+
+        Note:
+            The rank counts the users above the balance on the field's index.
+            With rank_index both counts are binary searches in memory.
+
+        Example:
+            >> rank = await economy.get_rank(ctx.author.id, "bank+wallet")
+            >> print(f"You are #{rank.rank:,} of {rank.total:,}")
+        """
+        await self.__ensure_indexes()
+        key = self.__sort_key(field)
+
+        if self.__ranks is not None:
+            await self.__load_ranks(guild_id)
+            value = self.__ranks.value(guild_id, field, user_id)
+
+            if value is None:
+                raise NotFoundException(f"User {user_id} not found")
+
+            return Rank(
+                user_id,
+                field,
+                self.__ranks.count_above(guild_id, field, value) + 1,
+                self.__ranks.count(guild_id),
+                value,
+            )
+
+        user = await self.__collection.find_one({"_id": _user_key(guild_id, user_id)}, {key: 1})
+
+        if not user:
+            raise NotFoundException(f"User {user_id} not found")
+
+        value = user.get(key, 0)
+        above, total = await asyncio.gather(
+            self.__collection.count_documents({"guild_id": guild_id, key: {"$gt": value}}),
+            self.__collection.count_documents({"guild_id": guild_id}),
+        )
+
+        return Rank(user_id, field, above + 1, total, value)
+
+    async def count_above(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL,
+        value: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> int:
+        """
+        Count the users whose balance is strictly greater than value.
+
+        Args:
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency
+            value: Balance to compare against
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            int: Number of users above value
+
+        Raises:
+            ValueError: If invalid field specified
+
+        Example:
+            >> richer = await economy.count_above("bank", 1_000_000)
+        """
+        await self.__ensure_indexes()
+        key = self.__sort_key(field)
+
+        if self.__ranks is not None:
+            await self.__load_ranks(guild_id)
+            return self.__ranks.count_above(guild_id, field, value)
+
+        return await self.__collection.count_documents({"guild_id": guild_id, key: {"$gt": value}})
+
+    async def __load_ranks(self, guild_id: int) -> None:
+        """
+        Load the balances of a guild into the rank index on first use.
+
+        Args:
+            guild_id: Guild the users belong to
+        """
+        if self.__ranks.loaded(guild_id):
+            return
+
+        async def load_all() -> typing.List[tuple]:
+            return [
+                (_user_id(user["_id"]), *(user.get(currency, 0) for currency in self.currencies))
+                async for user in self.__collection.find({"guild_id": guild_id}, self.__projection)
+            ]
+
+        await self.__ranks.load(guild_id, load_all)
+
+    async def get_leaderboard(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        limit: int = 10,
+        offset: int = 0,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.List[Balance]:
+        """
+        Retrieve the richest users ordered by the given balance field.
+
+        Args:
+            field: Balance to rank by ('bank', 'wallet', 'bank+wallet' or a
+                   registered currency). Defaults to "bank"
+            limit: Maximum number of users returned. Defaults to 10
+            offset: Number of top users to skip. Defaults to 0
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            List[Balance]: Balances in descending order, without items
+
+        Raises:
+            ValueError: If invalid field, limit or offset specified
+
+        Example:
+            >> top = await economy.get_leaderboard("bank+wallet", limit=10)
+            >> print([(entry.id, entry.bank + entry.wallet) for entry in top])
+        """
+        await self.__ensure_indexes()
+
+        key = self.__sort_key(field)
+
+        if limit < 1 or offset < 0:
+            raise ValueError("Limit must be greater than 0 and offset cannot be negative")
+        cursor = (
+            self.__collection.find({"guild_id": guild_id}, self.__projection)
+            .sort([(key, -1), ("_id", -1)])
+            .skip(offset)
+            .limit(limit)
+        )
+        users = await cursor.to_list(length=limit)
+
+        return [self.__to_balance(user) for user in users]
+
+    async def add_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Add money to a user's specified balance field.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to add
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Note:
+            Runs as a single upsert, unregistered users are created on the fly.
+
+        Example:
+            >> await economy.add_money(1234567890, "wallet", 100)
+        """
+        await self.__ensure_indexes()
+
+        self.__validate_money("add", field, amount)
+
+        update = self.__money_update("add", user_id, field, amount, guild_id)
+
+        if self.__ranks is None:
+            await self.__collection.update_one(*update, upsert=True)
+        else:
+            self.__update_ranks(
+                guild_id, user_id, await self.__update_ranked(*update, upsert=True)
+            )
+
+        self.__invalidate(guild_id, user_id)
+
+    async def remove_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove money from a user's specified balance field.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to remove
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Note:
+            Runs as a single upsert, unregistered users are created on the fly.
+
+        Example:
+            >> await economy.remove_money(1234567890, "bank", 50)
+        """
+        await self.__ensure_indexes()
+
+        self.__validate_money("remove", field, amount)
+
+        update = self.__money_update("remove", user_id, field, amount, guild_id)
+
+        if self.__ranks is None:
+            await self.__collection.update_one(*update, upsert=True)
+        else:
+            self.__update_ranks(
+                guild_id, user_id, await self.__update_ranked(*update, upsert=True)
+            )
+
+        self.__invalidate(guild_id, user_id)
+
+    async def set_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Set a user's balance field to a specific amount.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: New absolute value for the balance
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            EnsurePositiveBalanceException: If trying to set negative balance when ensure_positive_balance is True
+
+        Note:
+            Runs as a single upsert, unregistered users are created on the fly.
+
+        Example:
+            >> await economy.set_money(1234567890, "wallet", 200)
+        """
+        await self.__ensure_indexes()
+
+        self.__validate_money("set", field, amount)
+
+        update = self.__money_update("set", user_id, field, amount, guild_id)
+
+        if self.__ranks is None:
+            await self.__collection.update_one(*update, upsert=True)
+        else:
+            self.__update_ranks(
+                guild_id, user_id, await self.__update_ranked(*update, upsert=True)
+            )
+
+        self.__invalidate(guild_id, user_id)
+
+    async def withdraw(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove money from a balance only if it covers the whole amount.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to remove
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+            InsufficientFundsException: If the balance is lower than amount
+                                        or the user doesn't exist
+
+        Note:
+            Unlike remove_money the balance is never clamped and unregistered
+            users are not created.
+
+        Example:
+            >> await economy.withdraw(1234567890, "wallet", 25)
+        """
+        await self.__ensure_indexes()
+
+        self.__validate_money("remove", field, amount)
+
+        debit = {field: -amount}
+        if field in DEFAULT_CURRENCIES:
+            debit["total"] = -amount
+
+        guarded = {"_id": _user_key(guild_id, user_id), field: {"$gte": amount}}
+
+        if self.__ranks is None:
+            result = await self.__collection.update_one(guarded, {"$inc": debit})
+            matched = result.matched_count
+        else:
+            document = await self.__update_ranked(guarded, {"$inc": debit})
+            matched = document is not None
+
+        if not matched:
+            raise InsufficientFundsException(
+                f"User {user_id} doesn't have {amount} in {field}"
+            )
+
+        if self.__ranks is not None:
+            self.__update_ranks(guild_id, user_id, document)
+
+        self.__invalidate(guild_id, user_id)
+
+    async def __bulk_money(
+        self,
+        operation: str,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int,
+        guild_id: int,
+    ) -> BulkResult:
+        """
+        Apply many balance mutations of one kind through unordered bulk writes.
+
+        Args:
+            operation: Kind of mutation ('add', 'remove' or 'set')
+            operations: (user_id, field, amount) tuples to apply
+            chunk_size: Number of tuples sent per bulk_write call
+            guild_id: Guild all users belong to
+
+        Returns:
+            BulkResult: Number of processed tuples and changed documents
+
+        Note:
+            Writes are unordered, so several tuples targeting the same user
+            may be applied in any order. Chunks written before a validation
+            error are not rolled back.
+        """
+        await self.__ensure_indexes()
+
+        result = BulkResult(0, 0)
+
+        try:
+            async for chunk in iterate_chunks(operations, chunk_size):
+                requests = []
+                for user_id, field, amount in chunk:
+                    self.__validate_money(operation, field, amount)
+                    requests.append(
+                        UpdateOne(
+                            *self.__money_update(operation, user_id, field, amount, guild_id),
+                            upsert=True,
+                        )
+                    )
+
+                write = await self.__collection.bulk_write(requests, ordered=False)
+                result.operations += len(chunk)
+                result.changed += write.modified_count + write.upserted_count
+        finally:
+            if self.__cache is not None:
+                self.__cache.clear()
+            # Reloading is cheaper than refreshing a large batch one user at a time
+            if self.__ranks is not None:
+                self.__ranks.clear(guild_id)
+
+        return result
+
+    async def bulk_add_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Add money to many users with unordered bulk writes.
+
+        Args:
+            operations: Iterable or async iterable of (user_id, field, amount) tuples
+            chunk_size: Number of tuples sent per bulk_write call. Defaults to 1000
+            guild_id: Guild all users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            BulkResult: Number of processed tuples and changed documents
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Example:
+            >> await economy.bulk_add_money((member.id, "wallet", 100) for member in guild.members)
+        """
+        return await self.__bulk_money("add", operations, chunk_size, guild_id)
+
+    async def bulk_remove_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Remove money from many users with unordered bulk writes.
+
+        Args:
+            operations: Iterable or async iterable of (user_id, field, amount) tuples
+            chunk_size: Number of tuples sent per bulk_write call. Defaults to 1000
+            guild_id: Guild all users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            BulkResult: Number of processed tuples and changed documents
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Example:
+            >> await economy.bulk_remove_money([(1234567890, "bank", 50), (987654321, "wallet", 10)])
+        """
+        return await self.__bulk_money("remove", operations, chunk_size, guild_id)
+
+    async def bulk_set_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Set balances of many users with unordered bulk writes.
+
+        Args:
+            operations: Iterable or async iterable of (user_id, field, amount) tuples
+            chunk_size: Number of tuples sent per bulk_write call. Defaults to 1000
+            guild_id: Guild all users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            BulkResult: Number of processed tuples and changed documents
+
+        Raises:
+            ValueError: If invalid field specified
+            EnsurePositiveBalanceException: If trying to set negative balance when ensure_positive_balance is True
+
+        Example:
+            >> await economy.bulk_set_money((user.id, "bank", 0) for user in season_players)
+        """
+        return await self.__bulk_money("set", operations, chunk_size, guild_id)
+
+    async def transfer(
+        self,
+        src_user_id: typing.Union[str, int],
+        src_field: VALID_FIELDS_LITERAL,
+        dst_user_id: typing.Union[str, int],
+        dst_field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Atomically move money between two balance fields, possibly of different users.
+
+        Args:
+            src_user_id: User the money is taken from
+            src_field: Balance field debited ('bank', 'wallet' or a registered currency)
+            dst_user_id: User the money is given to
+            dst_field: Balance field credited ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to move
+            guild_id: Guild both users belong to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+            InsufficientFundsException: If source balance is lower than amount
+
+        Note:
+            Moves within one user are a single guarded update. Moves between
+            users run in a session transaction, which requires a replica set.
+
+        Example:
+            >> await economy.transfer(1234567890, "bank", 1234567890, "wallet", 100)
+        """
+        await self.__ensure_indexes()
+
+        self.__validate_money("remove", src_field, amount)
+        self.__validate_money("add", dst_field, amount)
+
+        src_filter = {"_id": _user_key(guild_id, src_user_id), src_field: {"$gte": amount}}
+
+        if src_user_id == dst_user_id:
+            delta = {src_field: -amount}
+            delta[dst_field] = delta.get(dst_field, 0) + amount
+
+            total = sum(delta.get(field, 0) for field in DEFAULT_CURRENCIES)
+            if total:
+                delta["total"] = total
+
+            if self.__ranks is None:
+                result = await self.__collection.update_one(src_filter, {"$inc": delta})
+                matched = result.matched_count
+            else:
+                document = await self.__update_ranked(src_filter, {"$inc": delta})
+                matched = document is not None
+
+            if not matched:
+                raise InsufficientFundsException(
+                    f"User {src_user_id} doesn't have {amount} in {src_field}"
+                )
+
+            if self.__ranks is not None:
+                self.__update_ranks(guild_id, src_user_id, document)
+
+            self.__invalidate(guild_id, src_user_id)
+            return
+
+        async with await self.__client.start_session() as session:
+            async with session.start_transaction():
+                debit = {src_field: -amount}
+                if src_field in DEFAULT_CURRENCIES:
+                    debit["total"] = -amount
+
+                credit = self.__money_update("add", dst_user_id, dst_field, amount, guild_id)
+
+                if self.__ranks is None:
+                    result = await self.__collection.update_one(
+                        src_filter, {"$inc": debit}, session=session
+                    )
+                    matched = result.matched_count
+                else:
+                    source = await self.__update_ranked(
+                        src_filter, {"$inc": debit}, session=session
+                    )
+                    matched = source is not None
+
+                if not matched:
+                    raise InsufficientFundsException(
+                        f"User {src_user_id} doesn't have {amount} in {src_field}"
+                    )
+
+                if self.__ranks is None:
+                    await self.__collection.update_one(*credit, upsert=True, session=session)
+                else:
+                    destination = await self.__update_ranked(
+                        *credit, upsert=True, session=session
+                    )
+
+        # Balances read inside the transaction only count once it committed
+        if self.__ranks is not None:
+            self.__update_ranks(guild_id, src_user_id, source)
+            self.__update_ranks(guild_id, dst_user_id, destination)
+
+        self.__invalidate(guild_id, src_user_id, dst_user_id)
+
+    async def purchase(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        price: typing.Union[float, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> PurchaseResult:
+        """
+        Atomically debit a balance and grant items if the user can afford them.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field paying the price ('bank', 'wallet' or a registered currency)
+            price: Total price of the purchase
+            item_name: Name of the item granted
+            qty: Number of units granted. Defaults to 1
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            PurchaseResult: Success flag and the balance after the purchase,
+                            or the unchanged balance if funds were insufficient
+
+        Raises:
+            ValueError: If invalid field or quantity specified
+            NegativeAmountException: If negative price provided
+            NotFoundException: If the specified user doesn't exist
+
+        Note:
+            A single find_one_and_update guarded by the balance, a failed
+            purchase costs one more read to report the current balance.
+
+        Example:
+            >> result = await economy.purchase(1234567890, "bank", 250, "pickaxe")
+            >> if not result.success:
+            ...     print(f"Missing {250 - result.balance.bank} coins")
+        """
+        await self.__ensure_indexes()
+
+        self.__validate_money("remove", field, price)
+
+        if qty < 1:
+            raise ValueError("Quantity must be greater than 0")
+
+        increments = {field: -price, f"items.{_item_key(item_name)}": qty}
+        if field in DEFAULT_CURRENCIES:
+            increments["total"] = -price
+
+        r = await self.__collection.find_one_and_update(
+            {"_id": _user_key(guild_id, user_id), field: {"$gte": price}},
+            {"$inc": increments},
+            projection=self.__projection,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if r:
+            if self.__ranks is not None:
+                self.__update_ranks(guild_id, user_id, r)
+
+            self.__invalidate(guild_id, user_id)
+            return PurchaseResult(True, self.__to_balance(r))
+
+        return PurchaseResult(False, await self.get_balance(user_id, guild_id=guild_id))
+
+    async def add_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Add items to a user's inventory, stacking them with units already owned.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item to add
+            qty: Number of units to add. Defaults to 1
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If quantity is lower than 1
+
+        Note:
+            The user is registered if they don't exist yet.
+
+        Example:
+            >> await economy.add_item(1234567890, "iron_ore", 16)
+        """
+        await self.__ensure_indexes()
+
+        if qty < 1:
+            raise ValueError("Quantity must be greater than 0")
+
+        update = (
+            {"_id": _user_key(guild_id, user_id)},
+            {
+                "$inc": {f"items.{_item_key(item_name)}": qty},
+                "$setOnInsert": {
+                    "guild_id": guild_id,
+                    **{currency: 0 for currency in self.currencies},
+                    "total": 0,
+                },
+            },
+        )
+
+        if self.__ranks is None:
+            await self.__collection.update_one(*update, upsert=True)
+        else:
+            # The upsert may register the user, who then ranks with zero balances
+            self.__update_ranks(
+                guild_id, user_id, await self.__update_ranked(*update, upsert=True)
+            )
+
+        self.__invalidate(guild_id, user_id)
+
+    async def remove_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove units of an item from a user's inventory.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item to remove
+            qty: Number of units to remove. Defaults to 1
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If quantity is lower than 1
+            NotFoundException: If either user doesn't exist or item not found
+            NotEnoughItemsException: If user owns fewer units than requested
+
+        Note:
+            The stack is deleted once its last unit is removed.
+
+        Example:
+            >> await economy.remove_item(1234567890, "old_sword")
+        """
+        await self.__ensure_indexes()
+
+        if qty < 1:
+            raise ValueError("Quantity must be greater than 0")
+
+        key = _user_key(guild_id, user_id)
+        path = f"items.{_item_key(item_name)}"
+        result = await self.__collection.update_one(
+            {"_id": key, path: {"$gte": qty}}, {"$inc": {path: -qty}}
+        )
+
+        if result.matched_count == 0:
+            count = await self.get_item_count(user_id, item_name, guild_id=guild_id)
+            if not count:
+                raise NotFoundException(f"Item {item_name} not found for user {user_id}")
+            raise NotEnoughItemsException(
+                f"User {user_id} has only {count} of {item_name}"
+            )
+
+        await self.__collection.update_one(
+            {"_id": key, path: {"$lte": 0}}, {"$unset": {path: ""}}
+        )
+        self.__invalidate(guild_id, user_id)
+
+    async def get_item_count(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> int:
+        """
+        Return how many units of an item a user owns.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            int: Number of units, 0 if the user doesn't own the item
+
+        Example:
+            >> await economy.get_item_count(1234567890, "iron_ore")
+        """
+        await self.__ensure_indexes()
+
+        key = _item_key(item_name)
+        r = await self.__collection.find_one(
+            {"_id": _user_key(guild_id, user_id)}, {f"items.{key}": 1}
+        )
+
+        if not r:
+            return 0
+
+        return max(r.get("items", {}).get(key, 0), 0)
+
+    async def has_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> bool:
+        """
+        Check whether a user owns at least one unit of an item.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            bool: True if the user owns the item
+
+        Example:
+            >> if await economy.has_item(1234567890, "fishing_rod"):
+            ...     print("Ready to fish")
+        """
+        await self.__ensure_indexes()
+
+        count = await self.__collection.count_documents(
+            {"_id": _user_key(guild_id, user_id), f"items.{_item_key(item_name)}": {"$gt": 0}},
+            limit=1,
+        )
+        return count > 0
+
+    async def has_items(
+        self,
+        user_id: typing.Union[str, int],
+        item_names: typing.Iterable[str],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.Dict[str, bool]:
+        """
+        Check which of the given items a user owns.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_names: Names of the items
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            Dict[str, bool]: Ownership of every requested item
+
+        Example:
+            >> owned = await economy.has_items(1234567890, ["pickaxe", "lamp"])
+            >> print(all(owned.values()))
+        """
+        await self.__ensure_indexes()
+
+        keys = {item_name: _item_key(item_name) for item_name in item_names}
+        if not keys:
+            return {}
+
+        r = await self.__collection.find_one(
+            {"_id": _user_key(guild_id, user_id)},
+            {"_id": 0, **{f"items.{key}": 1 for key in keys.values()}},
+        )
+        items = r.get("items", {}) if r else {}
+
+        return {item_name: items.get(key, 0) > 0 for item_name, key in keys.items()}
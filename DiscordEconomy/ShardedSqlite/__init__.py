@@ -0,0 +1,1065 @@
+import asyncio
+import heapq
+import itertools
+import os
+import typing
+import zlib
+
+from ..constants import (
+    VALID_FIELDS_LITERAL,
+    MoneyOperation,
+    LEADERBOARD_FIELDS_LITERAL,
+    GLOBAL_GUILD_ID,
+)
+from ..objects import (
+    User,
+    Item,
+    Balance,
+    BulkResult,
+    CacheStats,
+    PurchaseResult,
+    PoolStats,
+    UserRow,
+    EconomyStats,
+    Rank,
+)
+from ..backup import Progress, iterate_records, open_source, open_target
+from ..columnar import ColumnarBuilder, concat_columnar
+from ..scope import GuildScope
+from ..utils import (
+    iterate_chunks,
+    resolve_percentiles,
+    resolve_buckets,
+    bucket_bounds,
+    percentile_rank,
+)
+from ..Sqlite import Economy as SqliteEconomy
+
+__all__ = ["Economy"]
+
+T = typing.TypeVar("T")
+
+# Number of leaderboard positions left on all shards before percentiles are read
+_STATS_WINDOW = 1000
+
+
+def _shard_index(user_id: typing.Union[str, int], shards: int) -> int:
+    """
+    Map a user to a shard with a hash that is stable across processes.
+
+    Args:
+        user_id: Discord user ID or unique identifier
+        shards: Number of shards
+
+    Returns:
+        int: Index of the shard owning the user
+    """
+    return zlib.crc32(str(user_id).encode()) % shards
+
+
+async def _gather(*awaitables: typing.Awaitable[T]) -> typing.List[T]:
+    """
+    Run awaitables concurrently and wait for all of them, even if one fails.
+
+    Args:
+        awaitables: Coroutines or futures to run
+
+    Returns:
+        list: Results in the order of the awaitables
+
+    Raises:
+        Exception: The first exception raised, once every awaitable has finished
+    """
+    results = await asyncio.gather(*awaitables, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    return results
+
+
+async def _merge_sorted(
+    iterators: typing.List[typing.AsyncIterator[T]],
+    key: typing.Callable[[T], typing.Any],
+) -> typing.AsyncGenerator[T, None]:
+    """
+    K-way merge of async iterators that are each sorted by key.
+
+    Args:
+        iterators: Async iterators in ascending key order
+        key: Function returning the sort key of an element
+
+    Yields:
+        Elements of all iterators in ascending key order
+    """
+    heap = []
+
+    async def advance(index: int) -> None:
+        try:
+            item = await iterators[index].__anext__()
+        except StopAsyncIteration:
+            return
+        heapq.heappush(heap, (key(item), index, item))
+
+    try:
+        await _gather(*(advance(index) for index in range(len(iterators))))
+
+        while heap:
+            _, index, item = heapq.heappop(heap)
+            yield item
+            await advance(index)
+    finally:
+        for iterator in iterators:
+            await iterator.aclose()
+
+
+class Economy:
+    """
+    An asynchronous SQLite economy spreading users over several database files.
+
+    Every user is routed by a stable hash of their ID to one shard, a regular
+    DiscordEconomy.Sqlite.Economy with its own writer connection, reader pool
+    and cache. Writes to different shards commit in parallel. Operations on one
+    user run on its shard, while leaderboards, bulk operations, full scans and
+    guild wipes fan out to every shard concurrently and merge the results.
+
+    Attributes:
+        database_name (str): Path the shard file names are derived from
+        shards (List[DiscordEconomy.Sqlite.Economy]): One economy per database file
+        currencies (tuple): Balance columns, bank and wallet followed by extra currencies
+    """
+
+    def __init__(
+        self,
+        database_name: str = "economy.db",
+        shards: int = 4,
+        **options: typing.Any,
+    ):
+        """
+        Initialize one SQLite economy per shard.
+
+        Args:
+            database_name: Path the shard files are derived from, "economy.db"
+                           with 4 shards uses economy.0.db to economy.3.db.
+                           Defaults to "economy.db"
+            shards: Number of database files. Defaults to 4
+            **options: Keyword arguments of DiscordEconomy.Sqlite.Economy applied
+                       to every shard, e.g. pool_size, cache_size or currencies
+
+        Raises:
+            ValueError: If shards is lower than 1 or an option is invalid
+
+        Note:
+            Users are assigned by hash, so an existing set of shards must always
+            be opened with the same shard count.
+        """
+        if shards < 1:
+            raise ValueError("Shards must be greater than 0")
+
+        root, extension = os.path.splitext(database_name)
+
+        self.database_name = database_name
+        self.shards = [
+            SqliteEconomy(f"{root}.{index}{extension}", **options)
+            for index in range(shards)
+        ]
+        self.currencies = self.shards[0].currencies
+        self.__ensure_positive_balance = options.get("ensure_positive_balance", True)
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> "Economy":
+        """
+        Create a sharded economy and eagerly prepare the schema of every shard.
+
+        Args:
+            *args: Positional arguments passed to the constructor
+            **kwargs: Keyword arguments passed to the constructor
+
+        Returns:
+            Economy: Ready to use economy instance
+
+        Example:
+            >> economy = await Economy.create("economy.db", shards=8)
+        """
+        economy = cls(*args, **kwargs)
+        await economy.__aenter__()
+        return economy
+
+    async def __aenter__(self) -> "Economy":
+        await _gather(*(shard.__aenter__() for shard in self.shards))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Commit pending writes and close the connections of every shard.
+
+        Example:
+            >> await economy.close()
+        """
+        await _gather(*(shard.close() for shard in self.shards))
+
+    def shard_for(self, user_id: typing.Union[str, int]) -> SqliteEconomy:
+        """
+        Return the shard owning a user.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+
+        Returns:
+            DiscordEconomy.Sqlite.Economy: Economy of the user's database file
+        """
+        return self.shards[_shard_index(user_id, len(self.shards))]
+
+    def scope(self, guild_id: int) -> GuildScope:
+        """
+        Return a view of this economy restricted to one guild.
+
+        Args:
+            guild_id: Discord guild ID
+
+        Returns:
+            GuildScope: View exposing every method with guild_id bound
+
+        Example:
+            >> guild = economy.scope(ctx.guild.id)
+        """
+        return GuildScope(self, guild_id)
+
+    def cache_stats(self) -> typing.Optional[CacheStats]:
+        """
+        Return counters of the user caches summed over all shards.
+
+        Returns:
+            CacheStats: Hits, misses, evictions and size, or None if caching is disabled
+        """
+        stats = [shard.cache_stats() for shard in self.shards]
+
+        if stats[0] is None:
+            return None
+
+        return CacheStats(
+            hits=sum(s.hits for s in stats),
+            misses=sum(s.misses for s in stats),
+            evictions=sum(s.evictions for s in stats),
+            size=sum(s.size for s in stats),
+        )
+
+    def pool_stats(self) -> PoolStats:
+        """
+        Return counters of the connection pools summed over all shards.
+
+        Returns:
+            PoolStats: Totals of every shard's reader pool and writer connection
+        """
+        stats = [shard.pool_stats() for shard in self.shards]
+        histogram = {}
+        known = all(s.idle is not None for s in stats)
+
+        for s in stats:
+            for bound, count in s.wait_histogram.items():
+                histogram[bound] = histogram.get(bound, 0) + count
+
+        return PoolStats(
+            size=sum(s.size for s in stats),
+            open=sum(s.open for s in stats) if known else None,
+            active=sum(s.active for s in stats),
+            idle=sum(s.idle for s in stats) if known else None,
+            checkouts=sum(s.checkouts for s in stats),
+            acquire_timeouts=sum(s.acquire_timeouts for s in stats),
+            lock_errors=sum(s.lock_errors for s in stats),
+            wait_time_total=sum(s.wait_time_total for s in stats),
+            wait_histogram=histogram,
+            writer_checkouts=sum(s.writer_checkouts for s in stats),
+            writer_wait_time_total=sum(s.writer_wait_time_total for s in stats),
+        )
+
+    async def ensure_registered(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> None:
+        """
+        Register a user on their shard if not found. See Sqlite Economy.ensure_registered.
+        """
+        await self.shard_for(user_id).ensure_registered(user_id, guild_id=guild_id)
+
+    async def get_user(
+        self,
+        user_id: typing.Union[str, int],
+        include_items: bool = True,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> User:
+        """
+        Retrieve a user from their shard. See Sqlite Economy.get_user.
+        """
+        return await self.shard_for(user_id).get_user(
+            user_id, include_items, guild_id=guild_id
+        )
+
+    async def get_balance(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> Balance:
+        """
+        Retrieve a user's balances from their shard. See Sqlite Economy.get_balance.
+        """
+        return await self.shard_for(user_id).get_balance(user_id, guild_id=guild_id)
+
+    async def get_items(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> typing.List[Item]:
+        """
+        Retrieve a user's item stacks from their shard. See Sqlite Economy.get_items.
+        """
+        return await self.shard_for(user_id).get_items(user_id, guild_id=guild_id)
+
+    async def delete_user_account(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> None:
+        """
+        Delete a user and their items from their shard. See Sqlite Economy.delete_user_account.
+        """
+        await self.shard_for(user_id).delete_user_account(user_id, guild_id=guild_id)
+
+    async def wipe_guild(self, guild_id: int) -> int:
+        """
+        Delete every user of a guild from all shards concurrently.
+
+        Args:
+            guild_id: Discord guild ID, 0 wipes the unscoped economy
+
+        Returns:
+            int: Number of deleted users
+        """
+        deleted = await _gather(*(shard.wipe_guild(guild_id) for shard in self.shards))
+        return sum(deleted)
+
+    async def get_all_users(
+        self,
+        chunk_size: int = 1000,
+        raw: bool = False,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.AsyncGenerator[typing.Union[User, UserRow], None]:
+        """
+        Retrieve all users of a guild from every shard as an asynchronous generator.
+
+        Args:
+            chunk_size: Number of users fetched per query and shard. Defaults to 1000
+            raw: If True, yield UserRow tuples instead of User objects. Defaults to False
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Yields:
+            User: Complete user objects in ascending id order, as with a single file
+
+        Example:
+            >> async for user in economy.get_all_users():
+            ...     print(f"User {user.id}: {user.bank} coins")
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than 0")
+
+        generators = [
+            shard.get_all_users(chunk_size, raw, guild_id=guild_id) for shard in self.shards
+        ]
+
+        async for user in _merge_sorted(generators, key=lambda user: user.id):
+            yield user
+
+    async def export_balances(
+        self,
+        format: str = "numpy",
+        chunk_size: int = 10000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.Any:
+        """
+        Export the balances of a guild from every shard concurrently into typed columns.
+
+        Args:
+            format: 'numpy' for a dict of arrays or 'arrow' for a pyarrow.Table.
+                    Defaults to 'numpy'
+            chunk_size: Number of rows copied into the columns at a time. Defaults to 10000
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            dict | pyarrow.Table: int64 'id' column and a float64 column per currency.
+                                  Rows are in ascending id order within each shard
+
+        Raises:
+            ValueError: If format is not supported or chunk_size is less than 1
+            ImportError: If numpy (or pyarrow for 'arrow') is not installed
+
+        Example:
+            >> columns = await economy.export_balances()
+            >> print(columns["bank"].sum(), np.percentile(columns["wallet"], 99))
+        """
+        # Fail on a bad format or missing dependency before touching the shards
+        ColumnarBuilder(format, self.currencies)
+
+        parts = await _gather(
+            *(shard.export_balances(format, chunk_size, guild_id=guild_id) for shard in self.shards)
+        )
+        return concat_columnar(format, parts)
+
+    async def export_to(
+        self,
+        target: typing.Union[str, os.PathLike, typing.TextIO],
+        chunk_size: int = 1000,
+        progress: Progress = None,
+        guild_id: typing.Optional[int] = None,
+    ) -> int:
+        """
+        Stream the users of every shard to line-delimited JSON, one shard after another.
+
+        Args:
+            target: File path or writable text stream
+            chunk_size: Number of users read and written at a time. Defaults to 1000
+            progress: Called with the number of exported users after every chunk.
+                      Defaults to None
+            guild_id: Guild to export, None exports every guild. Defaults to None
+
+        Returns:
+            int: Number of exported users
+
+        Example:
+            >> await economy.export_to("backup.ndjson", progress=print)
+        """
+        exported = 0
+
+        with open_target(target) as stream:
+            for shard in self.shards:
+                def report(count: int, offset: int = exported) -> None:
+                    progress(offset + count)
+
+                exported += await shard.export_to(
+                    stream, chunk_size, report if progress is not None else None, guild_id
+                )
+
+        return exported
+
+    async def import_from(
+        self,
+        source: typing.Union[str, os.PathLike, typing.Iterable],
+        chunk_size: int = 10000,
+        progress: Progress = None,
+        guild_id: typing.Optional[int] = None,
+    ) -> int:
+        """
+        Load users from line-delimited JSON, writing to all shards concurrently.
+
+        Args:
+            source: File path, text stream or iterable of lines or decoded records
+            chunk_size: Number of users read per round, split over the shards.
+                        Defaults to 10000
+            progress: Called with the number of imported users after every chunk.
+                      Defaults to None
+            guild_id: Guild every user is imported into, None keeps the guild
+                      stored in each record. Defaults to None
+
+        Returns:
+            int: Number of imported users
+
+        Raises:
+            ValueError: If a record is malformed, has an id that is not an int or
+                        str or holds a currency this economy doesn't have
+            EnsurePositiveBalanceException: If a record holds a negative balance
+                                            when ensure_positive_balance is True
+
+        Example:
+            >> await economy.import_from("backup.ndjson", progress=print)
+        """
+        imported = 0
+
+        with open_source(source) as lines:
+            # Validated here, so errors point at the line of the whole source
+            for chunk in iterate_records(
+                lines, self.currencies, chunk_size, guild_id, self.__ensure_positive_balance
+            ):
+                records_by_shard = {}
+                for guild, user_id, balances, items in chunk:
+                    records_by_shard.setdefault(self.shard_for(user_id), []).append(
+                        {
+                            "guild_id": guild,
+                            "id": user_id,
+                            "balances": dict(zip(self.currencies, balances)),
+                            "items": items,
+                        }
+                    )
+
+                counts = await _gather(
+                    *(
+                        shard.import_from(records, chunk_size)
+                        for shard, records in records_by_shard.items()
+                    )
+                )
+
+                imported += sum(counts)
+                if progress is not None:
+                    progress(imported)
+
+        return imported
+
+    async def stats(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        percentiles: typing.Iterable[float] = (),
+        buckets: typing.Union[int, typing.Iterable[float], None] = None,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> EconomyStats:
+        """
+        Summarize a balance field over the users of a guild on all shards.
+
+        Args:
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency.
+                   Defaults to "bank"
+            percentiles: Percentiles between 0 and 100 to look up, such as (50, 99).
+                         Defaults to none
+            buckets: Number of equal-width histogram buckets between min and max,
+                     or ascending upper bounds of the buckets. Defaults to none
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            EconomyStats: Count, sum, min, max, mean, nearest-rank percentiles and histogram
+
+        Raises:
+            ValueError: If invalid field, percentile or buckets specified
+
+        Note:
+            Count, sum, min and max combine the stats of every shard. Each
+            percentile narrows a window of leaderboard positions on every shard
+            by counting the users above candidate balances, so it takes a
+            logarithmic number of indexed lookups instead of walking the shards.
+            The histogram adds up the shards' counts over the same bounds, a
+            number of buckets reads the shards again once min and max are known.
+            Shards are read separately, not as one snapshot.
+        """
+        percentiles = resolve_percentiles(percentiles)
+        buckets = resolve_buckets(buckets)
+
+        # Given bounds are counted right away, equal widths need the min and max of all shards
+        bounds = () if isinstance(buckets, int) else buckets
+        parts = await _gather(
+            *(shard.stats(field, buckets=bounds, guild_id=guild_id) for shard in self.shards)
+        )
+
+        count = sum(part.count for part in parts)
+        total = sum(part.sum for part in parts)
+        low = min((part.min for part in parts if part.count), default=None)
+        high = max((part.max for part in parts if part.count), default=None)
+        values = dict.fromkeys(percentiles)
+
+        if isinstance(buckets, int) and count:
+            bounds = bucket_bounds(buckets, low, high)
+            histograms = await _gather(
+                *(shard.stats(field, buckets=bounds, guild_id=guild_id) for shard in self.shards)
+            )
+        else:
+            histograms = parts
+
+        histogram = dict.fromkeys(bounds, 0)
+        for part in histograms:
+            for bound, users in part.histogram.items():
+                histogram[bound] += users
+
+        for percentile in percentiles if count else ():
+            # Position of the percentile counted from the richest user
+            depth = count - 1 - percentile_rank(percentile, count)
+            values[percentile] = await self.__value_at_depth(
+                field, depth, [part.count for part in parts], guild_id
+            )
+
+        return EconomyStats(
+            field,
+            count,
+            total,
+            low,
+            high,
+            total / count if count else None,
+            values,
+            histogram,
+        )
+
+    async def __value_at_depth(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL,
+        depth: int,
+        counts: typing.List[int],
+        guild_id: int,
+    ) -> typing.Optional[typing.Union[float, int]]:
+        """
+        Find the balance at a position of the leaderboard of all shards.
+
+        The balance at depth is the smallest one with at most depth users above it.
+        Each shard keeps a window of leaderboard positions that can still hold it,
+        every round counts the users above the weighted median of the windows'
+        middle balances and narrows all windows. Small windows are read at once
+        and bisected in memory.
+
+        Args:
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency
+            depth: 0-based position counted from the richest user
+            counts: Number of users of the guild on each shard
+            guild_id: Guild the users belong to
+
+        Returns:
+            float | int | None: Balance, None if the users were removed meanwhile
+        """
+
+        def value(balance: Balance) -> typing.Union[float, int]:
+            if field == "bank+wallet":
+                return balance.bank + balance.wallet
+            return balance.balances[field]
+
+        async def fits(candidate: typing.Union[float, int]) -> bool:
+            return await self.count_above(field, candidate, guild_id=guild_id) <= depth
+
+        # A shard's users below its position depth can't hold the balance
+        windows = [[0, min(count, depth + 1)] for count in counts]
+        found = None
+
+        while sum(high - low for low, high in windows) > _STATS_WINDOW:
+            positions = {
+                index: (low + high) // 2 for index, (low, high) in enumerate(windows) if low < high
+            }
+            pages = await _gather(
+                *(
+                    self.shards[index].get_leaderboard(field, 1, position, guild_id=guild_id)
+                    for index, position in positions.items()
+                )
+            )
+
+            middles = []
+            for (index, position), page in zip(positions.items(), pages):
+                if page:
+                    middles.append((value(page[0]), index))
+                else:
+                    windows[index][1] = position
+
+            if not middles:
+                continue
+
+            middles.sort()
+            weight = sum(windows[index][1] - windows[index][0] for _, index in middles) / 2
+            for pivot, owner in middles:
+                weight -= windows[owner][1] - windows[owner][0]
+                if weight <= 0:
+                    break
+
+            above = await _gather(
+                *(shard.count_above(field, pivot, guild_id=guild_id) for shard in self.shards)
+            )
+
+            if sum(above) <= depth:
+                # The answer is at most the pivot, richer users are out
+                found = pivot if found is None else min(found, pivot)
+                for window, count in zip(windows, above):
+                    window[0] = max(window[0], count)
+                windows[owner][0] = max(windows[owner][0], positions[owner] + 1)
+            else:
+                # The answer is above the pivot, users at or below it are out
+                for window, count in zip(windows, above):
+                    window[1] = min(window[1], count)
+                windows[owner][1] = min(windows[owner][1], positions[owner])
+
+        pages = await _gather(
+            *(
+                shard.get_leaderboard(field, high - low, low, guild_id=guild_id)
+                for shard, (low, high) in zip(self.shards, windows)
+                if low < high
+            )
+        )
+        candidates = sorted({value(balance) for page in pages for balance in page})
+        if found is not None:
+            candidates = [candidate for candidate in candidates if candidate < found] + [found]
+
+        # Candidates fit from some position on, the first one that fits is the answer
+        low, high = 0, len(candidates)
+        while low < high:
+            middle = (low + high) // 2
+            if await fits(candidates[middle]):
+                high = middle
+            else:
+                low = middle + 1
+
+        return candidates[low] if low < len(candidates) else found
+
+    async def get_rank(
+        self,
+        user_id: typing.Union[str, int],
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> Rank:
+        """
+        Find a user's position on the leaderboard of all shards without sorting it.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency.
+                   Defaults to "bank"
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            Rank: 1-based rank, number of users and the user's balance
+
+        Raises:
+            NotFoundException: If the user doesn't exist
+            ValueError: If invalid field specified
+
+        Note:
+            The user's shard returns its local rank, and the other shards
+            count their users above the balance concurrently.
+        """
+        owner = self.shard_for(user_id)
+        local = await owner.get_rank(user_id, field, guild_id=guild_id)
+        others = [shard for shard in self.shards if shard is not owner]
+
+        counts = await _gather(
+            *(shard.count_above(field, local.value, guild_id=guild_id) for shard in others),
+            *(shard.stats(field, guild_id=guild_id) for shard in others),
+        )
+        above, parts = counts[:len(others)], counts[len(others):]
+
+        return Rank(
+            user_id,
+            field,
+            local.rank + sum(above),
+            local.total + sum(part.count for part in parts),
+            local.value,
+        )
+
+    async def count_above(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL,
+        value: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> int:
+        """
+        Count the users of all shards whose balance is strictly greater than value.
+
+        Args:
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency
+            value: Balance to compare against
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            int: Number of users above value
+
+        Raises:
+            ValueError: If invalid field specified
+        """
+        counts = await _gather(
+            *(shard.count_above(field, value, guild_id=guild_id) for shard in self.shards)
+        )
+        return sum(counts)
+
+    async def get_leaderboard(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        limit: int = 10,
+        offset: int = 0,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.List[Balance]:
+        """
+        Retrieve the richest users of all shards ordered by the given balance field.
+
+        Args:
+            field: Balance to rank by ('bank', 'wallet', 'bank+wallet' or a
+                   registered currency). Defaults to "bank"
+            limit: Maximum number of users returned. Defaults to 10
+            offset: Number of top users to skip. Defaults to 0
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            List[Balance]: Balances in descending order, without items
+
+        Raises:
+            ValueError: If invalid field, limit or offset specified
+
+        Note:
+            Every shard reads its top offset + limit users from its index, and
+            the sorted pages are combined with a k-way heap merge.
+        """
+        if limit < 1 or offset < 0:
+            raise ValueError("Limit must be greater than 0 and offset cannot be negative")
+
+        pages = await _gather(
+            *(
+                shard.get_leaderboard(field, offset + limit, 0, guild_id=guild_id)
+                for shard in self.shards
+            )
+        )
+
+        def key(balance: Balance) -> tuple:
+            if field == "bank+wallet":
+                return balance.bank + balance.wallet, balance.id
+            return balance.balances[field], balance.id
+
+        merged = heapq.merge(*pages, key=key, reverse=True)
+        return list(itertools.islice(merged, offset, offset + limit))
+
+    async def add_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Add money to a user's balance on their shard. See Sqlite Economy.add_money.
+        """
+        await self.shard_for(user_id).add_money(user_id, field, amount, guild_id=guild_id)
+
+    async def remove_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove money from a user's balance on their shard. See Sqlite Economy.remove_money.
+        """
+        await self.shard_for(user_id).remove_money(user_id, field, amount, guild_id=guild_id)
+
+    async def set_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Set a user's balance on their shard. See Sqlite Economy.set_money.
+        """
+        await self.shard_for(user_id).set_money(user_id, field, amount, guild_id=guild_id)
+
+    async def withdraw(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove money only if the balance covers it, on the user's shard. See Sqlite Economy.withdraw.
+        """
+        await self.shard_for(user_id).withdraw(user_id, field, amount, guild_id=guild_id)
+
+    async def __bulk_money(
+        self,
+        method: str,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int,
+        guild_id: int,
+    ) -> BulkResult:
+        """
+        Split balance mutations by shard and apply them on all shards concurrently.
+
+        Args:
+            method: Name of the bulk method called on each shard
+            operations: (user_id, field, amount) tuples to apply
+            chunk_size: Number of tuples read from operations at a time
+            guild_id: Guild all users belong to
+
+        Returns:
+            BulkResult: Number of processed tuples and changed rows
+
+        Note:
+            Each shard commits its part of a chunk in its own transaction, so
+            chunks and shards written before a validation error are not rolled back.
+        """
+        result = BulkResult(0, 0)
+        shards = len(self.shards)
+
+        async for chunk in iterate_chunks(operations, chunk_size):
+            by_shard = {}
+            for operation in chunk:
+                by_shard.setdefault(_shard_index(operation[0], shards), []).append(operation)
+
+            results = await _gather(
+                *(
+                    getattr(self.shards[index], method)(
+                        shard_operations, chunk_size, guild_id=guild_id
+                    )
+                    for index, shard_operations in by_shard.items()
+                )
+            )
+
+            for shard_result in results:
+                result.operations += shard_result.operations
+                result.changed += shard_result.changed
+
+        return result
+
+    async def bulk_add_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Add money to many users, one concurrent transaction per shard and chunk.
+        See Sqlite Economy.bulk_add_money.
+        """
+        return await self.__bulk_money("bulk_add_money", operations, chunk_size, guild_id)
+
+    async def bulk_remove_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Remove money from many users, one concurrent transaction per shard and chunk.
+        See Sqlite Economy.bulk_remove_money.
+        """
+        return await self.__bulk_money("bulk_remove_money", operations, chunk_size, guild_id)
+
+    async def bulk_set_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Set balances of many users, one concurrent transaction per shard and chunk.
+        See Sqlite Economy.bulk_set_money.
+        """
+        return await self.__bulk_money("bulk_set_money", operations, chunk_size, guild_id)
+
+    async def transfer(
+        self,
+        src_user_id: typing.Union[str, int],
+        src_field: VALID_FIELDS_LITERAL,
+        dst_user_id: typing.Union[str, int],
+        dst_field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Move money between two balance fields, possibly of users on different shards.
+
+        Args:
+            src_user_id: User the money is taken from
+            src_field: Balance field debited ('bank', 'wallet' or a registered currency)
+            dst_user_id: User the money is given to
+            dst_field: Balance field credited ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to move
+            guild_id: Guild both users belong to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+            InsufficientFundsException: If source balance is lower than amount
+
+        Note:
+            Users of the same shard are handled by one transaction. Across
+            shards the source is debited first and refunded if the credit
+            fails, which is not atomic if the process dies in between.
+        """
+        src_shard = self.shard_for(src_user_id)
+        dst_shard = self.shard_for(dst_user_id)
+
+        if src_shard is dst_shard:
+            await src_shard.transfer(
+                src_user_id, src_field, dst_user_id, dst_field, amount, guild_id=guild_id
+            )
+            return
+
+        if dst_field not in self.currencies:
+            raise ValueError(
+                f"Invalid field: {dst_field}. Must be one of: {', '.join(self.currencies)}"
+            )
+
+        await src_shard.withdraw(src_user_id, src_field, amount, guild_id=guild_id)
+
+        try:
+            await dst_shard.add_money(dst_user_id, dst_field, amount, guild_id=guild_id)
+        except BaseException:
+            await src_shard.add_money(src_user_id, src_field, amount, guild_id=guild_id)
+            raise
+
+    async def purchase(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        price: typing.Union[float, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> PurchaseResult:
+        """
+        Atomically debit a balance and grant items on the user's shard. See Sqlite Economy.purchase.
+        """
+        return await self.shard_for(user_id).purchase(
+            user_id, field, price, item_name, qty, guild_id=guild_id
+        )
+
+    async def add_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Add items to a user's inventory on their shard. See Sqlite Economy.add_item.
+        """
+        await self.shard_for(user_id).add_item(user_id, item_name, qty, guild_id=guild_id)
+
+    async def remove_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove items from a user's inventory on their shard. See Sqlite Economy.remove_item.
+        """
+        await self.shard_for(user_id).remove_item(user_id, item_name, qty, guild_id=guild_id)
+
+    async def get_item_count(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> int:
+        """
+        Return how many units of an item a user owns. See Sqlite Economy.get_item_count.
+        """
+        return await self.shard_for(user_id).get_item_count(
+            user_id, item_name, guild_id=guild_id
+        )
+
+    async def has_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> bool:
+        """
+        Check whether a user owns an item. See Sqlite Economy.has_item.
+        """
+        return await self.shard_for(user_id).has_item(user_id, item_name, guild_id=guild_id)
+
+    async def has_items(
+        self,
+        user_id: typing.Union[str, int],
+        item_names: typing.Iterable[str],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.Dict[str, bool]:
+        """
+        Check which of the given items a user owns. See Sqlite Economy.has_items.
+        """
+        return await self.shard_for(user_id).has_items(
+            user_id, item_names, guild_id=guild_id
+        )
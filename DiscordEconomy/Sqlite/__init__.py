@@ -1,20 +1,102 @@
 import asyncio
+import bisect
+import contextlib
+import functools
+import os
+import re
+import sqlite3
+import time
 import typing
 import aiosqlite
 
-from aiosqlitepool import SQLiteConnectionPool
+from aiosqlitepool import SQLiteConnectionPool, PoolConnectionAcquireTimeoutError
 
-from ..constants import VALID_FIELDS, VALID_FIELDS_LITERAL
+from ..constants import (
+    VALID_FIELDS_LITERAL,
+    MoneyOperation,
+    LEADERBOARD_FIELDS_LITERAL,
+    GLOBAL_GUILD_ID,
+)
 from ..exceptions import (
     NotFoundException,
     NegativeAmountException,
     EnsurePositiveBalanceException,
+    InsufficientFundsException,
+    NotEnoughItemsException,
+)
+from ..objects import (
+    User,
+    Item,
+    Balance,
+    BulkResult,
+    CacheStats,
+    PurchaseResult,
+    PoolStats,
+    ItemRow,
+    UserRow,
+    EconomyStats,
+    Rank,
+)
+from ..cache import UserCache
+from ..backup import Progress, open_source, open_target, iterate_records, write_records
+from ..columnar import ColumnarBuilder
+from ..ranking import RankIndex
+from ..scope import GuildScope
+from ..utils import (
+    iterate_chunks,
+    resolve_currencies,
+    resolve_percentiles,
+    resolve_buckets,
+    bucket_bounds,
+    percentile_rank,
 )
-from ..objects import User, Item
 from ..__version__ import check_for_updates
 
 __all__ = ["Economy"]
 
+# ORDER BY expression of the combined leaderboard, must match total_idx exactly to use it
+_TOTAL_ORDER = "bank + wallet"
+
+# Per-connection sqlite3 statement cache, holds every precompiled statement
+_CACHED_STATEMENTS = 256
+
+# Upper bounds in milliseconds of the pool wait time histogram buckets
+_WAIT_BUCKETS_MS = (0.1, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_ADD_ITEM_STATEMENT = """INSERT INTO items (guild_id, itemName, ownerID, qty) VALUES (?, ?, ?, ?)
+                         ON CONFLICT(guild_id, ownerID, itemName) DO UPDATE SET qty = qty + excluded.qty"""
+
+# Text SQLite converts to a number when stored in a column with INTEGER affinity
+_NUMERIC_TEXT = re.compile(r"[ \t\n\v\f\r]*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?[ \t\n\v\f\r]*")
+
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def _stored_id(user_id: typing.Union[str, int]) -> typing.Union[str, int, float]:
+    """
+    Return a user ID the way the INTEGER id column stores it.
+
+    Args:
+        user_id: Discord user ID or unique identifier
+
+    Returns:
+        Union[str, int, float]: The ID as an integer if it is numeric text that
+                                fits into 64 bits, e.g. "1" becomes 1 like it
+                                does in the database, otherwise unchanged or a float
+    """
+    if not isinstance(user_id, str) or not _NUMERIC_TEXT.fullmatch(user_id):
+        return user_id
+
+    text = user_id.strip(" \t\n\v\f\r")
+    if text.lstrip("+-").isdigit():
+        value = int(text)
+        return value if _INT64_MIN <= value <= _INT64_MAX else float(value)
+
+    value = float(text)
+    if value.is_integer() and _INT64_MIN <= value <= _INT64_MAX:
+        return int(value)
+    return value
+
 
 class Economy:
     """
@@ -23,16 +105,50 @@ class Economy:
     This class provides methods to manage user accounts, currency balances, and inventory items
     using SQLite with connection pooling for efficient database operations.
 
+    Reads use a pool of query_only connections, while every write goes through a
+    single dedicated writer connection, so WAL readers never wait for writers and
+    writers of this instance never contend for the database lock.
+
+    Users are keyed by (guild_id, user_id). Methods default to guild 0, the
+    unscoped economy, and scope() returns a view bound to one guild.
+
     Attributes:
         database_name (str): The name/path of the SQLite database file
         ensure_positive_balance (bool): If True, prevents balances from going negative
                                         through validation checks
+        commit_interval_ms (int): If set, single-row writes are grouped and committed
+                                  together once per interval
+        max_batch (int): Maximum number of writes committed in one group
+        cache_size (int): If set, get_user results are cached for up to this many users
+        cache_ttl (float): Seconds after which a cached user expires
+        check_updates (bool): If True, checks PyPI for a newer version in the background
+        pool_size (int): Maximum number of pooled reader connections
+        acquire_timeout (int): Seconds to wait for a free connection
+        idle_timeout (int): Seconds after which an idle connection is replaced
+        page_cache_size (int): SQLite page cache size per connection (PRAGMA cache_size)
+        mmap_size (int): Bytes of the database file memory-mapped per connection
+        busy_timeout_ms (int): Milliseconds SQLite retries a locked database before failing
+        currencies (tuple): Balance columns, bank and wallet followed by extra currencies
     """
 
     def __init__(
         self,
         database_name: typing.Optional[str] = "economy.db",
         ensure_positive_balance: bool = True,
+        commit_interval_ms: typing.Optional[int] = None,
+        max_batch: int = 500,
+        cache_size: typing.Optional[int] = None,
+        cache_ttl: typing.Optional[float] = 60,
+        check_updates: bool = False,
+        pool_size: int = 5,
+        acquire_timeout: int = 30,
+        idle_timeout: int = 86400,
+        page_cache_size: int = 10000,
+        mmap_size: int = 268435456,
+        busy_timeout_ms: int = 5000,
+        currencies: typing.Optional[typing.Iterable[str]] = None,
+        track_supply: bool = False,
+        rank_index: bool = False,
     ):
         """
         Initialize the economy system with database connection settings.
@@ -42,353 +158,2295 @@ class Economy:
                          Defaults to "economy.db"
             ensure_positive_balance: Whether to prevent negative balances.
                                     Defaults to True
+            commit_interval_ms: Enables group commit mode, writes are collected for
+                                this many milliseconds and committed in one
+                                transaction. Defaults to None (commit every write)
+            max_batch: Maximum number of writes per group commit. Defaults to 500
+            cache_size: Enables an in-process LRU cache of users returned by get_user,
+                        invalidated by every write of this instance.
+                        Defaults to None (no cache)
+            cache_ttl: Seconds after which a cached user is reloaded, None to keep
+                       users until evicted. Defaults to 60
+            check_updates: Whether to check for package updates in a background
+                           task once the database is first used. Defaults to False
+            pool_size: Maximum number of pooled reader connections, the writer
+                       connection is not counted. Defaults to 5
+            acquire_timeout: Seconds to wait for a free connection before raising
+                             PoolConnectionAcquireTimeoutError. Defaults to 30
+            idle_timeout: Seconds after which an idle connection is closed and
+                          replaced on its next checkout. Defaults to 86400
+            page_cache_size: Value of PRAGMA cache_size, pages if positive or KiB
+                             if negative. Defaults to 10000
+            mmap_size: Value of PRAGMA mmap_size in bytes, 0 disables memory
+                       mapping. Defaults to 268435456 (256 MiB)
+            busy_timeout_ms: Value of PRAGMA busy_timeout. Defaults to 5000
+            currencies: Extra balance columns such as ["gems", "tokens"], each
+                        with its own leaderboard index. bank and wallet are always
+                        present. Defaults to None (bank and wallet only)
+            track_supply: Maintain a per-guild summary of user counts and currency
+                          totals with triggers, so stats() reads them in O(1).
+                          Every balance write also updates the summary row.
+                          Defaults to False
+            rank_index: Keep an in-memory sorted index of each leaderboard that
+                        get_rank is called for, updated after writes of this
+                        instance, so ranks are binary searches. Defaults to False
+
+        Raises:
+            ValueError: If a currency name is not an identifier or is reserved
 
         Note:
-            Automatically checks for table existence and creates them if needed.
-            Also checks for package updates during initialization.
+            Construction performs no I/O. Tables are created when the first
+            connection is opened, either on first use or through create().
+            Currencies missing from an existing database are added as columns
+            defaulting to 0.
         """
+        if max_batch < 1:
+            raise ValueError("Max batch must be greater than 0")
+
+        if pool_size < 1:
+            raise ValueError("Pool size must be greater than 0")
+
         self.__ensure_positive_balance = ensure_positive_balance
+        self.currencies = resolve_currencies(currencies)
+        self.__columns = ", ".join(f'"{field}"' for field in self.currencies)
+        self.__statements = self.__compile_statements(self.currencies)
         self.__database_name = database_name
+        self.__track_supply = track_supply
+        self.__commit_interval = (
+            commit_interval_ms / 1000 if commit_interval_ms is not None else None
+        )
+        self.__max_batch = max_batch
+        self.__write_queue = None
+        self.__commit_task = None
+        self.__cache = UserCache(cache_size, cache_ttl) if cache_size else None
+        self.__ranks = RankIndex(self.currencies) if rank_index else None
+        self.__check_updates = check_updates
+        self.__schema_ready = False
+        self.__update_task = None
+        self.__pragmas = {
+            "cache_size": int(page_cache_size),
+            "mmap_size": int(mmap_size),
+            "busy_timeout": int(busy_timeout_ms),
+        }
+
+        self.__pool_size = pool_size
+        self.__active = 0
+        self.__checkouts = 0
+        self.__acquire_timeouts = 0
+        self.__lock_errors = 0
+        self.__wait_time = 0.0
+        self.__wait_counts = [0] * len(_WAIT_BUCKETS_MS)
+
+        self.__writer = None
+        self.__writer_lock = None
+        self.__writer_checkouts = 0
+        self.__writer_wait_time = 0.0
+
+        self.pool = SQLiteConnectionPool(
+            self.__connection_factory,
+            pool_size=pool_size,
+            acquisition_timeout=acquire_timeout,
+            idle_timeout=idle_timeout,
+        )
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> "Economy":
+        """
+        Create an economy and eagerly prepare the database schema.
 
-        try:
-            self.__loop = asyncio.get_running_loop()
-        except RuntimeError:
-            self.__loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.__loop)
+        Args:
+            *args: Positional arguments passed to the constructor
+            **kwargs: Keyword arguments passed to the constructor
+
+        Returns:
+            Economy: Ready to use economy instance
 
-        self.pool = SQLiteConnectionPool(self.__connection_factory)
+        Example:
+            >> economy = await Economy.create("economy.db")
+        """
+        economy = cls(*args, **kwargs)
+        await economy.__prepare()
+        return economy
 
-        self.__loop.run_until_complete(self.__is_table_exists())
-        self.__loop.run_until_complete(check_for_updates())
+    async def __aenter__(self) -> "Economy":
+        await self.__prepare()
+        return self
 
-    async def __connection_factory(self) -> aiosqlite.Connection:
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def __prepare(self) -> None:
         """
-        Create and configure a new database connection.
+        Open the writer connection, which creates the schema on first use.
+        """
+        async with self.__writer_connection():
+            pass
+
+    @contextlib.asynccontextmanager
+    async def __writer_connection(self) -> typing.AsyncIterator[aiosqlite.Connection]:
+        """
+        Check out the dedicated writer connection, waiting for earlier writers in FIFO order.
+
+        Yields:
+            aiosqlite.Connection: Writer connection, rolled back on exit if a
+                                  transaction was left open
+        """
+        if self.__writer_lock is None:
+            self.__writer_lock = asyncio.Lock()
+
+        started = time.perf_counter()
+
+        async with self.__writer_lock:
+            self.__writer_checkouts += 1
+            self.__writer_wait_time += time.perf_counter() - started
+
+            if self.__writer is None:
+                self.__writer = await self.__open_writer()
+
+            try:
+                yield self.__writer
+            except sqlite3.OperationalError as e:
+                if "locked" in str(e) or "busy" in str(e):
+                    self.__lock_errors += 1
+                raise
+            finally:
+                if self.__writer.in_transaction:
+                    await self.__writer.rollback()
+
+    @contextlib.asynccontextmanager
+    async def __reader_connection(self) -> typing.AsyncIterator[aiosqlite.Connection]:
+        """
+        Check out a pooled query_only connection, recording wait time and lock errors.
+
+        Yields:
+            aiosqlite.Connection: Connection returned to the pool on exit
+        """
+        started = time.perf_counter()
+        acquired = False
+
+        try:
+            async with self.pool.connection() as conn:
+                acquired = True
+                waited = time.perf_counter() - started
+                self.__checkouts += 1
+                self.__wait_time += waited
+                self.__wait_counts[bisect.bisect_left(_WAIT_BUCKETS_MS, waited * 1000)] += 1
+                self.__active += 1
+
+                try:
+                    yield conn
+                except sqlite3.OperationalError as e:
+                    if "locked" in str(e) or "busy" in str(e):
+                        self.__lock_errors += 1
+                    raise
+                finally:
+                    self.__active -= 1
+        except PoolConnectionAcquireTimeoutError:
+            if not acquired:
+                self.__acquire_timeouts += 1
+            raise
+
+    def pool_stats(self) -> PoolStats:
+        """
+        Return counters of the connection pool.
+
+        Returns:
+            PoolStats: Reader pool size, connection counts, checkouts and wait times,
+                       writer checkouts and wait time, and lock errors
+                       (busy_timeout exhausted) since creation. Open and idle
+                       counts are None if the pool doesn't expose them
+
+        Example:
+            >> stats = economy.pool_stats()
+            >> print(stats.active, stats.idle, stats.wait_histogram)
+        """
+        # Idle connections are only known to the pool, which closes them on its own.
+        # Its internals are not public API, so the counts are left out if they change
+        idle = getattr(getattr(self.pool, "_pool", None), "size", None)
+        if not isinstance(idle, int):
+            idle = None
+
+        return PoolStats(
+            size=self.__pool_size,
+            open=None if idle is None else idle + self.__active,
+            active=self.__active,
+            idle=idle,
+            checkouts=self.__checkouts,
+            acquire_timeouts=self.__acquire_timeouts,
+            lock_errors=self.__lock_errors,
+            wait_time_total=self.__wait_time,
+            wait_histogram=dict(zip(_WAIT_BUCKETS_MS, self.__wait_counts)),
+            writer_checkouts=self.__writer_checkouts,
+            writer_wait_time_total=self.__writer_wait_time,
+        )
+
+    async def __connect(self) -> aiosqlite.Connection:
+        """
+        Open a database connection with the settings shared by readers and the writer.
 
         Returns:
             aiosqlite.Connection: Configured database connection with optimized settings
 
         Note:
-            Applies performance optimizations including WAL journal mode,
-            normalized synchronization, and increased cache size.
+            Applies performance optimizations including normalized synchronization,
+            in-memory temporary storage and the configured cache and mmap sizes.
         """
-        conn = await aiosqlite.connect(self.__database_name)
+        conn = await aiosqlite.connect(
+            self.__database_name, cached_statements=_CACHED_STATEMENTS
+        )
 
         # Performance optimization settings
-        await conn.execute("PRAGMA journal_mode = WAL")
         await conn.execute("PRAGMA synchronous = NORMAL")
-        await conn.execute("PRAGMA cache_size = 10000")
         await conn.execute("PRAGMA temp_store = MEMORY")
         await conn.execute("PRAGMA foreign_keys = ON")
-        await conn.execute("PRAGMA mmap_size = 268435456")
+
+        for pragma, value in self.__pragmas.items():
+            await conn.execute(f"PRAGMA {pragma} = {value}")
 
         return conn
 
-    async def __is_table_exists(self) -> None:
+    async def __open_writer(self) -> aiosqlite.Connection:
         """
-        Ensure required database tables exist, creating them if necessary.
+        Open the writer connection, enabling WAL mode and creating the schema.
 
-        Creates:
-        - users table with id (primary key), bank, and wallet columns
-        - items table with id, itemName, ownerID columns and foreign key constraint
-        - Index on ownerID for faster item queries
+        Returns:
+            aiosqlite.Connection: Connection used for every write
         """
-        async with self.pool.connection() as conn:
-            await conn.execute(
-                """CREATE TABLE IF NOT EXISTS users
-                   (
-                       id     INTEGER PRIMARY KEY,
-                       bank   NUMERIC,
-                       wallet NUMERIC
-                   )"""
-            )
-            await conn.execute(
-                """CREATE TABLE IF NOT EXISTS items
-                   (
-                       id       INTEGER PRIMARY KEY AUTOINCREMENT,
-                       itemName TEXT,
-                       ownerID  INTEGER,
-                       FOREIGN KEY (ownerID) REFERENCES users (id) ON DELETE CASCADE
-                   )"""
-            )
-            await conn.execute(
-                "CREATE INDEX IF NOT EXISTS ownerID_idx ON items(ownerID)"
-            )
-            await conn.commit()
+        conn = await self.__connect()
+        await conn.execute("PRAGMA journal_mode = WAL")
+
+        if not self.__schema_ready:
+            await self.__create_schema(conn, self.currencies, self.__track_supply)
+            self.__schema_ready = True
+
+            if self.__check_updates:
+                self.__update_task = asyncio.ensure_future(check_for_updates())
+
+        return conn
 
-    async def ensure_registered(self, user_id: typing.Union[str, int]) -> None:
+    async def __connection_factory(self) -> aiosqlite.Connection:
         """
-        Check if a user exists in the database, registering them if not found.
+        Create a reader connection for the pool.
 
-        Args:
-            user_id: Discord user ID or unique identifier
+        Returns:
+            aiosqlite.Connection: Connection rejecting any write
 
-        Example:
-            >> await economy.ensure_registered(1234567890)
+        Note:
+            The writer is opened first if needed, so the schema and WAL mode
+            exist before the first read.
         """
-        async with self.pool.connection() as conn:
-            query = await conn.execute("SELECT id FROM users WHERE id = ?", (user_id,))
-            result = await query.fetchone()
+        if not self.__schema_ready:
+            async with self.__writer_connection():
+                pass
 
-            if not result:
-                await conn.execute("INSERT INTO users VALUES(?, 0, 0)", (user_id,))
-                await conn.commit()
+        conn = await self.__connect()
+        await conn.execute("PRAGMA query_only = ON")
+
+        return conn
 
-    async def get_user(self, user_id: typing.Union[str, int]) -> User:
+    def __validate_money(
+        self,
+        operation: str,
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+    ) -> None:
         """
-        Retrieve a user's complete economic profile including items.
+        Validate a balance mutation before it is sent to the database.
 
         Args:
-            user_id: Discord user ID or unique identifier
-
-        Returns:
-            User: User object containing balance information and items
+            operation: Kind of mutation ('add', 'remove' or 'set')
+            field: Balance field to modify
+            amount: Amount used by the mutation
 
         Raises:
-            NoItemFound: If the specified user doesn't exist
-
-        Example:
-            >> user = await economy.get_user(1234567890)
-            >> print(user.bank, user.wallet, user.items)
+            NegativeAmountException: If adding or removing a negative amount
+            EnsurePositiveBalanceException: If setting a negative balance when
+                                            ensure_positive_balance is True
+            ValueError: If invalid field specified
         """
-        async with self.pool.connection() as conn:
-            # Get user base information
-            user_query = await conn.execute(
-                "SELECT * FROM users WHERE id = ?", (user_id,)
+        if operation == "set":
+            if self.__ensure_positive_balance and amount < 0:
+                raise EnsurePositiveBalanceException(
+                    "Ensure positive balance is turned on."
+                    " User's balance cannot be set to less than 0."
+                )
+        elif amount < 0:
+            raise NegativeAmountException(
+                "Invalid amount. Amount cannot be less than 0"
             )
-            user_data = await user_query.fetchone()
-
-            if not user_data:
-                raise NotFoundException(f"User {user_id} not found")
 
-            # Get user's items
-            items_query = await conn.execute(
-                "SELECT * FROM items WHERE ownerID = ?", (user_id,)
+        if (operation, field) not in self.__statements:
+            raise ValueError(
+                f"Invalid field: {field}. Must be one of: {', '.join(self.currencies)}"
             )
-            items_data = await items_query.fetchall()
-            items = [Item(*item) for item in items_data]
 
-        return User(user_data[0], user_data[1], user_data[2], items)
-
-    async def delete_user_account(self, user_id: typing.Union[str, int]) -> None:
+    def __compile_statements(
+        self, fields: typing.Iterable[str]
+    ) -> typing.Dict[typing.Tuple[str, str], str]:
         """
-        Permanently delete a user account and all associated items.
+        Build every balance statement once, keyed by (operation, field).
 
         Args:
-            user_id: Discord user ID or unique identifier
+            fields: Balance columns statements are built for
+
+        Returns:
+            dict: SQL of the 'add', 'remove' and 'set' upserts and of the guarded
+                  'debit' update of every field
 
         Note:
-            This action is irreversible and will remove all user data including items
-            due to ON DELETE CASCADE foreign key constraint.
+            Reusing the same strings lets sqlite3 serve them from its statement
+            cache, and a registered key doubles as field validation.
         """
-        async with self.pool.connection() as conn:
-            await conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            await conn.commit()
+        statements = {}
 
-    async def get_all_users(self) -> typing.AsyncGenerator[User, None]:
-        """
-        Retrieve all users from the database as an asynchronous generator.
+        for field in fields:
+            for operation in ("add", "remove", "set"):
+                statements[operation, field] = self.__build_money_statement(
+                    operation, field
+                )
 
-        Yields:
-            User: Complete user objects with balances and items
+            statements["debit", field] = (
+                f'UPDATE users SET "{field}" = "{field}" - ?'
+                f' WHERE guild_id = ? AND id = ? AND "{field}" >= ?'
+            )
 
-        Example:
-            >> async for user in economy.get_all_users():
-            ...     print(f"User {user.id}: {user.bank} coins")
-        """
-        async with self.pool.connection() as conn:
-            user_query = await conn.execute("SELECT * FROM users")
-            users_data = await user_query.fetchall()
+        return statements
 
-            for user in users_data:
-                items_query = await conn.execute(
-                    "SELECT * FROM items WHERE ownerID = ?", (user[0],)
-                )
-                items_data = await items_query.fetchall()
-                items = [Item(*item) for item in items_data]
+    def __build_money_statement(self, operation: str, field: str) -> str:
+        """
+        Build the upsert statement applying a balance mutation.
 
-                yield User(user[0], user[1], user[2], items)
+        Args:
+            operation: Kind of mutation ('add', 'remove' or 'set')
+            field: Balance field to modify
 
-    async def add_money(
+        Returns:
+            str: SQL statement taking the parameters built by __money_params
+        """
+        if operation == "add":
+            new_value = f'"{field}" + ?'
+        elif operation == "remove" and self.__ensure_positive_balance:
+            new_value = f'MAX(0, "{field}" - ?)'
+        elif operation == "remove":
+            new_value = f'"{field}" - ?'
+        else:
+            new_value = f'excluded."{field}"'
+
+        # bank and wallet have no column default, other currencies default to 0
+        columns = [name for name in ("bank", "wallet") if name != field] + [field]
+        values = ["0" if name != field else "?" for name in columns]
+
+        return f"""INSERT INTO users (guild_id, id, {', '.join(f'"{name}"' for name in columns)})
+                   VALUES (?, ?, {', '.join(values)})
+                   ON CONFLICT(guild_id, id) DO UPDATE SET "{field}" = {new_value}"""
+
+    def __money_params(
         self,
+        operation: str,
         user_id: typing.Union[str, int],
         field: VALID_FIELDS_LITERAL,
         amount: typing.Union[float, int],
-    ) -> None:
+        guild_id: int,
+    ) -> tuple:
         """
-        Add money to a user's specified balance field.
+        Build the parameters of the precompiled upsert of a balance mutation.
 
         Args:
+            operation: Kind of mutation ('add', 'remove' or 'set')
             user_id: Discord user ID or unique identifier
-            field: Balance field to modify ('bank' or 'wallet')
-            amount: Positive amount to add
-
-        Raises:
-            ValueError: If invalid field specified
-            NoItemFound: If user doesn't exist
+            field: Balance field to modify
+            amount: Amount used by the mutation
+            guild_id: Guild the user belongs to
 
-        Example:
-            >> await economy.add_money(1234567890, "wallet", 100)
+        Returns:
+            tuple: Statement parameters
         """
-        if amount < 0:
-            raise NegativeAmountException(
-                "Invalid amount. Amount cannot be less than 0"
-            )
+        if operation == "set":
+            return guild_id, user_id, amount
 
-        if field not in VALID_FIELDS:
-            raise ValueError(
-                f"Invalid field: {field}. Must be one of: {', '.join(VALID_FIELDS)}"
-            )
+        if operation == "remove":
+            initial = 0 if self.__ensure_positive_balance else -amount
+        else:
+            initial = amount
 
-        await self.ensure_registered(user_id)
+        return guild_id, user_id, initial, amount
 
-        async with self.pool.connection() as conn:
-            await conn.execute(
-                f"UPDATE users SET {field} = {field} + ? WHERE id = ?",
-                (amount, user_id),
-            )
-            await conn.commit()
+    def __invalidate(self, guild_id: int, *user_ids: typing.Union[str, int]) -> None:
+        """
+        Drop cached users after their data changed.
 
-    async def remove_money(
+        Args:
+            guild_id: Guild the users belong to
+            user_ids: Discord user IDs or unique identifiers
+        """
+        if self.__cache is not None:
+            for user_id in user_ids:
+                self.__cache.invalidate((guild_id, _stored_id(user_id)))
+
+    def __update_ranks(
         self,
+        operation: str,
         user_id: typing.Union[str, int],
         field: VALID_FIELDS_LITERAL,
         amount: typing.Union[float, int],
+        guild_id: int,
     ) -> None:
         """
-        Remove money from a user's specified balance field.
+        Apply a committed balance mutation to the rank index.
 
         Args:
+            operation: Kind of mutation ('add', 'remove', 'debit' or 'set')
             user_id: Discord user ID or unique identifier
-            field: Balance field to modify ('bank' or 'wallet')
-            amount: Positive amount to remove
+            field: Balance field modified
+            amount: Amount used by the mutation
+            guild_id: Guild the user belongs to
 
-        Raises:
-            ValueError: If invalid field specified
-            NoItemFound: If user doesn't exist
+        Note:
+            Must run while the writer connection is still held, so the index
+            sees mutations in commit order and never while it is being loaded.
+        """
+        if self.__ranks is None:
+            return
 
-        Example:
-            >> await economy.remove_money(1234567890, "bank", 50)
+        user_id = _stored_id(user_id)
+
+        if operation == "set":
+            self.__ranks.set(guild_id, user_id, field, amount)
+        elif operation == "add":
+            self.__ranks.add(guild_id, user_id, field, amount)
+        elif operation == "remove" and self.__ensure_positive_balance:
+            self.__ranks.add(guild_id, user_id, field, -amount, 0)
+        else:
+            self.__ranks.add(guild_id, user_id, field, -amount)
+
+    def scope(self, guild_id: int) -> GuildScope:
         """
-        if amount < 0:
-            raise NegativeAmountException(
-                "Invalid amount. Amount cannot be less than 0"
-            )
+        Return a view of this economy restricted to one guild.
 
-        if field not in VALID_FIELDS:
-            raise ValueError(
-                f"Invalid field: {field}. Must be one of: {', '.join(VALID_FIELDS)}"
-            )
+        Args:
+            guild_id: Discord guild ID
 
-        await self.ensure_registered(user_id)
+        Returns:
+            GuildScope: View exposing every method with guild_id bound, sharing
+                        this economy's connections and cache
 
-        async with self.pool.connection() as conn:
-            if self.__ensure_positive_balance:
-                balance_query = await conn.execute(
-                    f"SELECT {field} FROM users WHERE id = ?", (user_id,)
-                )
-                balance = (await balance_query.fetchone())[0]
+        Example:
+            >> guild = economy.scope(ctx.guild.id)
+            >> await guild.add_money(ctx.author.id, "wallet", 100)
+        """
+        return GuildScope(self, guild_id)
 
-                if balance - amount < 0:
-                    await self.set_money(user_id, field, 0)
-                    return
+    def cache_stats(self) -> typing.Optional[CacheStats]:
+        """
+        Return counters of the user cache.
 
-            await conn.execute(
-                f"UPDATE users SET {field} = {field} - ? WHERE id = ?",
-                (amount, user_id),
-            )
-            await conn.commit()
+        Returns:
+            CacheStats: Hits, misses, evictions and size, or None if caching is disabled
 
-    async def set_money(
+        Example:
+            >> stats = economy.cache_stats()
+            >> print(stats.hits / max(stats.hits + stats.misses, 1))
+        """
+        return self.__cache.stats() if self.__cache is not None else None
+
+    async def __write(
         self,
-        user_id: typing.Union[str, int],
-        field: VALID_FIELDS_LITERAL,
-        amount: typing.Union[float, int],
+        statement: str,
+        params: tuple,
+        on_commit: typing.Optional[typing.Callable[[], typing.Any]] = None,
     ) -> None:
         """
-        Set a user's balance field to a specific amount.
+        Execute and commit a single write statement.
 
         Args:
-            user_id: Discord user ID or unique identifier
-            field: Balance field to modify ('bank' or 'wallet')
-            amount: New absolute value for the balance
+            statement: SQL statement to execute
+            params: Statement parameters
+            on_commit: Called after the commit while the writer connection is
+                       still held, e.g. to update the rank index. Defaults to None
 
-        Raises:
-            ValueError: If invalid field specified
-            NoItemFound: If user doesn't exist
+        Note:
+            In group commit mode the statement is queued and this coroutine
+            returns only after the batch containing it has been committed.
+        """
+        if self.__commit_interval is None:
+            async with self.__writer_connection() as conn:
+                await conn.execute(statement, params)
+                await conn.commit()
+                if on_commit is not None:
+                    on_commit()
+            return
 
-        Example:
-            >> await economy.set_money(1234567890, "wallet", 200)
+        if self.__commit_task is None:
+            self.__write_queue = asyncio.Queue()
+            self.__commit_task = asyncio.ensure_future(self.__commit_worker())
+
+        future = asyncio.get_running_loop().create_future()
+        self.__write_queue.put_nowait((statement, params, on_commit, future))
+        await future
+
+    async def __commit_worker(self) -> None:
         """
-        if self.__ensure_positive_balance and amount < 0:
-            raise EnsurePositiveBalanceException(
-                "Ensure positive balance is turned on."
-                " User's balance cannot be set to less than 0."
-            )
+        Drain queued writes and commit them in batches until a stop sentinel is received.
+        """
+        running = True
 
-        if field not in VALID_FIELDS:
-            raise ValueError(
-                f"Invalid field: {field}. Must be one of: {', '.join(VALID_FIELDS)}"
-            )
+        while running:
+            batch = []
+            write = await self.__write_queue.get()
 
-        await self.ensure_registered(user_id)
+            if write is not None:
+                batch.append(write)
 
-        async with self.pool.connection() as conn:
-            await conn.execute(
-                f"UPDATE users SET {field} = ? WHERE id = ?", (amount, user_id)
-            )
-            await conn.commit()
+                # Only wait for more writes when the batch is not already full
+                if self.__write_queue.qsize() < self.__max_batch - 1:
+                    await asyncio.sleep(self.__commit_interval)
 
-    async def add_item(self, user_id: typing.Union[str, int], item_name: str) -> None:
+                while len(batch) < self.__max_batch and not self.__write_queue.empty():
+                    write = self.__write_queue.get_nowait()
+                    if write is None:
+                        break
+                    batch.append(write)
+
+            running = write is not None
+            if batch:
+                await self.__commit_batch(batch)
+
+    async def __commit_batch(self, batch: typing.List[tuple]) -> None:
         """
-        Add an item to a user's inventory.
+        Apply queued writes in one transaction and resolve their futures.
 
         Args:
-            user_id: Discord user ID or unique identifier
-            item_name: Name of the item to add
+            batch: Queued (statement, params, on_commit, future) entries
 
-        Raises:
-            ItemAlreadyExists: If user already possesses this item
-            NoItemFound: If user doesn't exist
+        Note:
+            A failing statement only fails its own future, the rest of the
+            batch is still committed.
+        """
+        errors = {}
+
+        try:
+            async with self.__writer_connection() as conn:
+                for statement, params, _, future in batch:
+                    try:
+                        await conn.execute(statement, params)
+                    except Exception as e:
+                        errors[future] = e
+
+                await conn.commit()
+
+                for _, _, on_commit, future in batch:
+                    if on_commit is not None and future not in errors:
+                        on_commit()
+        except Exception as e:
+            errors = {future: e for _, _, _, future in batch}
+
+        for _, _, _, future in batch:
+            if future.done():
+                continue
+
+            if future in errors:
+                future.set_exception(errors[future])
+            else:
+                future.set_result(None)
+
+    async def close(self) -> None:
+        """
+        Commit pending writes and close the writer and all pooled connections.
 
         Example:
-            >> await economy.add_item(1234567890, "magic_sword")
+            >> await economy.close()
         """
-        async with self.pool.connection() as conn:
-            await conn.execute(
-                "INSERT INTO items VALUES(NULL, ?, ?)", (item_name, user_id)
-            )
-            await conn.commit()
+        if self.__commit_task is not None:
+            self.__write_queue.put_nowait(None)
+            await self.__commit_task
+            self.__commit_task = None
 
-    async def remove_item(
-        self, user_id: typing.Union[str, int], item_name: str
+        await self.pool.close()
+
+        if self.__writer is not None:
+            async with self.__writer_lock:
+                await self.__writer.close()
+                self.__writer = None
+
+    @staticmethod
+    async def __table_columns(conn: aiosqlite.Connection, table: str) -> typing.List[str]:
+        """
+        List the columns of a table.
+
+        Args:
+            conn: Connection used to run the query
+            table: Table name
+
+        Returns:
+            List[str]: Column names, empty if the table doesn't exist
+        """
+        query = await conn.execute(f"PRAGMA table_info({table})")
+        return [column[1] for column in await query.fetchall()]
+
+    @staticmethod
+    async def __create_schema(
+        conn: aiosqlite.Connection, currencies: typing.Iterable[str], track_supply: bool = False
     ) -> None:
         """
-        Remove an item from a user's inventory.
+        Ensure required database tables exist, creating them if necessary.
 
         Args:
-            user_id: Discord user ID or unique identifier
-            item_name: Name of the item to remove
+            conn: Connection used to run the statements
+            currencies: Balance columns the users table must have
+            track_supply: Whether to build the supply summary table and its triggers
 
-        Raises:
-            NoItemFound: If either user doesn't exist or item not found
+        Creates:
+        - users table clustered on a (guild_id, id) primary key, with bank and
+          wallet columns
+        - A column defaulting to 0 for every other currency
+        - items table with id, guild_id, itemName, ownerID, qty columns, a unique
+          (guild_id, ownerID, itemName) key and foreign key constraint
+        - An index per currency and on bank + wallet, led by guild_id, for leaderboards
+        - With track_supply, a supply table holding the user count and currency
+          totals of each guild, kept current by triggers on users. It is only
+          rebuilt when missing or lacking a currency, and kept when track_supply is off
 
-        Example:
-            >> await economy.remove_item(1234567890, "old_sword")
+        Note:
+            Older layouts are migrated in one transaction. Users without a guild
+            move to guild 0 and items stored one row per unit are merged into stacks.
         """
-        async with self.pool.connection() as conn:
-            # Verify item exists
-            check_query = await conn.execute(
-                "SELECT id FROM items WHERE ownerID = ? AND itemName = ?",
-                (user_id, item_name),
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            user_columns = await Economy.__table_columns(conn, "users")
+            item_columns = await Economy.__table_columns(conn, "items")
+            legacy_users = bool(user_columns) and "guild_id" not in user_columns
+            legacy_items = bool(item_columns) and not {"guild_id", "qty"} <= set(item_columns)
+
+            if legacy_users:
+                await conn.execute("ALTER TABLE users RENAME TO users_legacy")
+            if legacy_items:
+                await conn.execute("ALTER TABLE items RENAME TO items_legacy")
+
+            # Index names are global, old ones must go before they are recreated
+            query = await conn.execute(
+                """SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL
+                   AND tbl_name IN ('users_legacy', 'items_legacy')"""
             )
-            if not await check_query.fetchone():
-                raise NotFoundException(
-                    f"Item {item_name} not found for user {user_id}"
-                )
+            for (index,) in await query.fetchall():
+                await conn.execute(f'DROP INDEX "{index}"')
 
             await conn.execute(
-                "DELETE FROM items WHERE itemName = ? AND ownerID = ?",
-                (item_name, user_id),
+                """CREATE TABLE IF NOT EXISTS users
+                   (
+                       guild_id INTEGER NOT NULL DEFAULT 0,
+                       id       INTEGER NOT NULL,
+                       bank     NUMERIC,
+                       wallet   NUMERIC,
+                       PRIMARY KEY (guild_id, id)
+                   ) WITHOUT ROWID"""
             )
-            await conn.commit()
+            await conn.execute(
+                """CREATE TABLE IF NOT EXISTS items
+                   (
+                       id       INTEGER PRIMARY KEY AUTOINCREMENT,
+                       guild_id INTEGER NOT NULL DEFAULT 0,
+                       itemName TEXT,
+                       ownerID  INTEGER,
+                       qty      INTEGER NOT NULL DEFAULT 1,
+                       UNIQUE (guild_id, ownerID, itemName),
+                       FOREIGN KEY (guild_id, ownerID) REFERENCES users (guild_id, id)
+                           ON DELETE CASCADE
+                   )"""
+            )
+
+            columns = await Economy.__table_columns(conn, "users")
+            copied = [column for column in user_columns if column != "id"] if legacy_users else []
+
+            for currency in (*currencies, *copied):
+                if currency not in columns:
+                    await conn.execute(
+                        f'ALTER TABLE users ADD COLUMN "{currency}" NUMERIC NOT NULL DEFAULT 0'
+                    )
+                    columns.append(currency)
+
+            if legacy_users:
+                names = ", ".join(f'"{column}"' for column in ("id", *copied))
+                await conn.execute(
+                    f"INSERT INTO users (guild_id, {names}) SELECT 0, {names} FROM users_legacy"
+                )
+
+            if legacy_items:
+                guild = "guild_id" if "guild_id" in item_columns else "0"
+                qty = "qty" if "qty" in item_columns else "1"
+                await conn.execute(
+                    f"""INSERT INTO items (id, guild_id, itemName, ownerID, qty)
+                        SELECT MIN(id), {guild}, itemName, ownerID, SUM({qty}) FROM items_legacy
+                        GROUP BY {"guild_id, " if guild == "guild_id" else ""}ownerID, itemName"""
+                )
+                await conn.execute("DROP TABLE items_legacy")
+
+            if legacy_users:
+                await conn.execute("DROP TABLE users_legacy")
+
+            for currency in currencies:
+                await conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{currency}_idx" ON users(guild_id, "{currency}")'
+                )
+            await conn.execute(
+                "CREATE INDEX IF NOT EXISTS total_idx ON users(guild_id, bank + wallet)"
+            )
+
+            # Other instances may rely on the summary, it is only rebuilt when it is
+            # missing or lacks a currency, and never dropped by an instance opting out
+            supply_columns = await Economy.__table_columns(conn, "supply")
+            query = await conn.execute(
+                """SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'
+                   AND name IN ('supply_insert', 'supply_update', 'supply_delete')"""
+            )
+            (triggers,) = await query.fetchone()
+            rebuild = triggers < 3 or not set(currencies) <= set(supply_columns)
+
+            if track_supply and rebuild:
+                # Currencies tracked for other instances are kept
+                currencies = [
+                    *currencies,
+                    *(column for column in supply_columns[2:] if column not in currencies),
+                ]
+                for trigger in ("supply_insert", "supply_update", "supply_delete"):
+                    await conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                await conn.execute("DROP TABLE IF EXISTS supply")
+
+                names = ", ".join(f'"{currency}"' for currency in currencies)
+                await conn.execute(
+                    f"""CREATE TABLE supply
+                        (
+                            guild_id INTEGER PRIMARY KEY,
+                            users    INTEGER NOT NULL,
+                            {", ".join(f'"{c}" NUMERIC NOT NULL' for c in currencies)}
+                        )"""
+                )
+                await conn.execute(
+                    f"""INSERT INTO supply (guild_id, users, {names})
+                        SELECT guild_id, COUNT(*),
+                               {", ".join(f'TOTAL("{c}")' for c in currencies)}
+                        FROM users GROUP BY guild_id"""
+                )
+                await conn.execute(
+                    f"""CREATE TRIGGER supply_insert AFTER INSERT ON users BEGIN
+                            INSERT INTO supply (guild_id, users, {names})
+                            VALUES (NEW.guild_id, 1, {", ".join(f'ifnull(NEW."{c}", 0)' for c in currencies)})
+                            ON CONFLICT (guild_id) DO UPDATE SET users = users + 1,
+                            {", ".join(f'"{c}" = "{c}" + excluded."{c}"' for c in currencies)};
+                        END"""
+                )
+                await conn.execute(
+                    f"""CREATE TRIGGER supply_update AFTER UPDATE OF {names} ON users BEGIN
+                            UPDATE supply SET
+                            {", ".join(f'"{c}" = "{c}" + ifnull(NEW."{c}", 0) - ifnull(OLD."{c}", 0)' for c in currencies)}
+                            WHERE guild_id = NEW.guild_id;
+                        END"""
+                )
+                await conn.execute(
+                    f"""CREATE TRIGGER supply_delete AFTER DELETE ON users BEGIN
+                            UPDATE supply SET users = users - 1,
+                            {", ".join(f'"{c}" = "{c}" - ifnull(OLD."{c}", 0)' for c in currencies)}
+                            WHERE guild_id = OLD.guild_id;
+                        END"""
+                )
+
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
+    async def ensure_registered(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> None:
+        """
+        Check if a user exists in the database, registering them if not found.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Example:
+            >> await economy.ensure_registered(1234567890)
+        """
+        async with self.__reader_connection() as conn:
+            query = await conn.execute(
+                "SELECT id FROM users WHERE guild_id = ? AND id = ?", (guild_id, user_id)
+            )
+            result = await query.fetchone()
+
+        if not result:
+            # Adding nothing registers the user in the rank index with zero balances
+            await self.__write(
+                "INSERT OR IGNORE INTO users (guild_id, id, bank, wallet) VALUES (?, ?, 0, 0)",
+                (guild_id, user_id),
+                functools.partial(self.__update_ranks, "add", user_id, "bank", 0, guild_id),
+            )
+
+    async def get_user(
+        self,
+        user_id: typing.Union[str, int],
+        include_items: bool = True,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> User:
+        """
+        Retrieve a user's complete economic profile including items.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            include_items: If False, only the users table is queried and
+                           items is set to None. Defaults to True
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            User: User object containing balance information and items
+
+        Raises:
+            NoItemFound: If the specified user doesn't exist
+
+        Example:
+            >> user = await economy.get_user(1234567890)
+            >> print(user.bank, user.wallet, user.items)
+
+        Note:
+            With the cache enabled the returned object may be shared between
+            callers and must be treated as read-only.
+        """
+        if not include_items:
+            balance = await self.get_balance(user_id, guild_id=guild_id)
+            return User(balance.id, balance.bank, balance.wallet, None, balance.balances)
+
+        if self.__cache is not None:
+            return await self.__cache.get_or_load(
+                (guild_id, _stored_id(user_id)), self.__load_user
+            )
+
+        return await self.__fetch_user(user_id, guild_id)
+
+    async def __load_user(self, key: typing.Tuple[int, typing.Union[str, int]]) -> User:
+        """
+        Cache loader of get_user.
+
+        Args:
+            key: (guild_id, user_id) cache key
+
+        Returns:
+            User: User object containing balance information and items
+        """
+        guild_id, user_id = key
+        return await self.__fetch_user(user_id, guild_id)
+
+    async def __fetch_user(
+        self, user_id: typing.Union[str, int], guild_id: int
+    ) -> User:
+        """
+        Load a user and their items from the database, bypassing the cache.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to
+
+        Returns:
+            User: User object containing balance information and items
+
+        Raises:
+            NotFoundException: If the specified user doesn't exist
+        """
+        async with self.__reader_connection() as conn:
+            # Get user base information
+            user_query = await conn.execute(
+                f"SELECT id, {self.__columns} FROM users WHERE guild_id = ? AND id = ?",
+                (guild_id, user_id),
+            )
+            user_data = await user_query.fetchone()
+
+            if not user_data:
+                raise NotFoundException(f"User {user_id} not found")
+
+            items = await self.__fetch_items(conn, user_id, guild_id)
+
+        return self.__to_user(user_data, items)
+
+    def __to_balance(self, row: tuple) -> Balance:
+        """
+        Convert a (id, *currencies) row into a Balance.
+
+        Args:
+            row: Row selected with the id followed by every currency column
+
+        Returns:
+            Balance: Balance holding every currency
+        """
+        balances = dict(zip(self.currencies, row[1:]))
+        return Balance(row[0], balances["bank"], balances["wallet"], balances)
+
+    def __to_user(
+        self, row: tuple, items: typing.Optional[typing.List[Item]]
+    ) -> User:
+        """
+        Convert a (id, *currencies) row and the user's items into a User.
+
+        Args:
+            row: Row selected with the id followed by every currency column
+            items: Item stacks of the user, None if not loaded
+
+        Returns:
+            User: User holding every currency
+        """
+        balances = dict(zip(self.currencies, row[1:]))
+        return User(row[0], balances["bank"], balances["wallet"], items, balances)
+
+    @staticmethod
+    async def __fetch_items(
+        conn: aiosqlite.Connection, user_id: typing.Union[str, int], guild_id: int
+    ) -> typing.List[Item]:
+        """
+        Load the item stacks of a user using an already acquired connection.
+
+        Args:
+            conn: Connection used to run the query
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to
+
+        Returns:
+            List[Item]: Owned item stacks
+        """
+        items_query = await conn.execute(
+            """SELECT id, itemName, ownerID, qty FROM items
+               WHERE guild_id = ? AND ownerID = ?""",
+            (guild_id, user_id),
+        )
+        return [Item(*item) for item in await items_query.fetchall()]
+
+    async def get_balance(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> Balance:
+        """
+        Retrieve a user's balances without loading their items.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            Balance: Bank and wallet of the user
+
+        Raises:
+            NotFoundException: If the specified user doesn't exist
+
+        Example:
+            >> balance = await economy.get_balance(1234567890)
+            >> print(balance.bank, balance.wallet)
+
+        Note:
+            With the cache enabled an already cached user is served from memory,
+            a miss is read from the database without being cached.
+        """
+        if self.__cache is not None:
+            user = self.__cache.get((guild_id, _stored_id(user_id)))
+            if user is not None:
+                return Balance(user.id, user.bank, user.wallet, user.balances)
+
+        async with self.__reader_connection() as conn:
+            query = await conn.execute(
+                f"SELECT id, {self.__columns} FROM users WHERE guild_id = ? AND id = ?",
+                (guild_id, user_id),
+            )
+            row = await query.fetchone()
+
+        if not row:
+            raise NotFoundException(f"User {user_id} not found")
+
+        return self.__to_balance(row)
+
+    async def get_items(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> typing.List[Item]:
+        """
+        Retrieve a user's item stacks without loading their balances.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            List[Item]: Owned item stacks, empty if the user has none or doesn't exist
+
+        Example:
+            >> items = await economy.get_items(1234567890)
+            >> print([(item.name, item.quantity) for item in items])
+        """
+        if self.__cache is not None:
+            user = self.__cache.get((guild_id, _stored_id(user_id)))
+            if user is not None:
+                return list(user.items)
+
+        async with self.__reader_connection() as conn:
+            return await self.__fetch_items(conn, user_id, guild_id)
+
+    async def delete_user_account(
+        self, user_id: typing.Union[str, int], guild_id: int = GLOBAL_GUILD_ID
+    ) -> None:
+        """
+        Permanently delete a user account and all associated items.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Note:
+            This action is irreversible and will remove all user data including items
+            due to ON DELETE CASCADE foreign key constraint.
+        """
+        on_commit = None
+        if self.__ranks is not None:
+            on_commit = functools.partial(self.__ranks.discard, guild_id, _stored_id(user_id))
+
+        await self.__write(
+            "DELETE FROM users WHERE guild_id = ? AND id = ?", (guild_id, user_id), on_commit
+        )
+        self.__invalidate(guild_id, user_id)
+
+    async def wipe_guild(self, guild_id: int) -> int:
+        """
+        Permanently delete every user of a guild and all their items.
+
+        Args:
+            guild_id: Discord guild ID, 0 wipes the unscoped economy
+
+        Returns:
+            int: Number of deleted users
+
+        Note:
+            Users are clustered by guild, so this deletes one contiguous key range.
+
+        Example:
+            >> await economy.wipe_guild(guild.id)
+        """
+        async with self.__writer_connection() as conn:
+            try:
+                cursor = await conn.execute(
+                    "DELETE FROM users WHERE guild_id = ?", (guild_id,)
+                )
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+            finally:
+                if self.__cache is not None:
+                    self.__cache.clear()
+                if self.__ranks is not None:
+                    self.__ranks.clear(guild_id)
+
+        return cursor.rowcount
+
+    async def get_all_users(
+        self,
+        chunk_size: int = 1000,
+        raw: bool = False,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.AsyncGenerator[typing.Union[User, UserRow], None]:
+        """
+        Retrieve all users of a guild from the database as an asynchronous generator.
+
+        Args:
+            chunk_size: Number of users fetched per query. Defaults to 1000
+            raw: If True, yield immutable UserRow tuples built directly from
+                 the cursor rows instead of User objects. Defaults to False
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Yields:
+            User: Complete user objects with balances and items, or UserRow
+                  tuples with raw enabled
+
+        Note:
+            Users are paginated by id, and items of each chunk are loaded with
+            a single range query, so memory stays bounded by the chunk size.
+            Raw rows skip the per-user balances dict and Item objects, which
+            makes full scans cheaper in memory and garbage collection.
+
+        Example:
+            >> async for user in economy.get_all_users():
+            ...     print(f"User {user.id}: {user.bank} coins")
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than 0")
+
+        last_id = None
+
+        while True:
+            async with self.__reader_connection() as conn:
+                if last_id is None:
+                    user_query = await conn.execute(
+                        f"""SELECT id, {self.__columns} FROM users
+                            WHERE guild_id = ? ORDER BY id LIMIT ?""",
+                        (guild_id, chunk_size),
+                    )
+                else:
+                    user_query = await conn.execute(
+                        f"""SELECT id, {self.__columns} FROM users
+                            WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?""",
+                        (guild_id, last_id, chunk_size),
+                    )
+                users_data = await user_query.fetchall()
+
+                if not users_data:
+                    return
+
+                # Chunk ids are contiguous, so one range scan covers all their items
+                items_query = await conn.execute(
+                    """SELECT id, itemName, ownerID, qty FROM items
+                       WHERE guild_id = ? AND ownerID BETWEEN ? AND ?""",
+                    (guild_id, users_data[0][0], users_data[-1][0]),
+                )
+                items_data = await items_query.fetchall()
+
+            items_by_owner = {}
+
+            if raw:
+                for item in items_data:
+                    items_by_owner.setdefault(item[2], []).append(ItemRow._make(item))
+
+                for user in users_data:
+                    yield UserRow(
+                        user[0], user[1], user[2], tuple(items_by_owner.get(user[0], ())), user[3:]
+                    )
+            else:
+                for item in items_data:
+                    items_by_owner.setdefault(item[2], []).append(Item(*item))
+
+                for user in users_data:
+                    yield self.__to_user(user, items_by_owner.get(user[0], []))
+
+            if len(users_data) < chunk_size:
+                return
+
+            last_id = users_data[-1][0]
+
+    async def export_balances(
+        self,
+        format: str = "numpy",
+        chunk_size: int = 10000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.Any:
+        """
+        Export the balances of a guild into typed columns for analytics.
+
+        Args:
+            format: 'numpy' for a dict of arrays or 'arrow' for a pyarrow.Table.
+                    Defaults to 'numpy'
+            chunk_size: Number of rows copied into the columns at a time. Defaults to 10000
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            dict | pyarrow.Table: int64 'id' column and a float64 column per currency,
+                                  in ascending id order
+
+        Raises:
+            ValueError: If format is not supported or chunk_size is less than 1
+            ImportError: If numpy (or pyarrow for 'arrow') is not installed
+
+        Note:
+            The count and the scan run in one read transaction, so the columns
+            are allocated once and hold a consistent snapshot. Items are not read.
+
+        Example:
+            >> columns = await economy.export_balances()
+            >> print(columns["bank"].sum(), np.percentile(columns["wallet"], 99))
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than 0")
+
+        builder = ColumnarBuilder(format, self.currencies)
+
+        async with self.__reader_connection() as conn:
+            await conn.execute("BEGIN")
+            try:
+                count_query = await conn.execute(
+                    "SELECT COUNT(*) FROM users WHERE guild_id = ?", (guild_id,)
+                )
+                builder.reserve((await count_query.fetchone())[0])
+
+                cursor = await conn.execute(
+                    f"SELECT id, {self.__columns} FROM users WHERE guild_id = ? ORDER BY id",
+                    (guild_id,),
+                )
+                while rows := await cursor.fetchmany(chunk_size):
+                    builder.append(rows)
+            finally:
+                await conn.rollback()
+
+        return builder.build()
+
+    async def export_to(
+        self,
+        target: typing.Union[str, os.PathLike, typing.TextIO],
+        chunk_size: int = 1000,
+        progress: Progress = None,
+        guild_id: typing.Optional[int] = None,
+    ) -> int:
+        """
+        Stream users with their balances and items to line-delimited JSON.
+
+        Args:
+            target: File path or writable text stream
+            chunk_size: Number of users read and written at a time. Defaults to 1000
+            progress: Called with the number of exported users after every chunk.
+                      Defaults to None
+            guild_id: Guild to export, None exports every guild. Defaults to None
+
+        Returns:
+            int: Number of exported users
+
+        Note:
+            Every line is one {"guild_id", "id", "balances", "items"} object, the
+            format read by import_from of every backend. Memory stays bounded by
+            the chunk size. Writes made during the export may or may not be included.
+
+        Example:
+            >> await economy.export_to("backup.ndjson", progress=print)
+        """
+        if guild_id is None:
+            async with self.__reader_connection() as conn:
+                query = await conn.execute("SELECT DISTINCT guild_id FROM users ORDER BY guild_id")
+                guild_ids = [row[0] for row in await query.fetchall()]
+        else:
+            guild_ids = [guild_id]
+
+        async def rows() -> typing.AsyncGenerator[typing.Tuple[int, UserRow], None]:
+            for guild in guild_ids:
+                async for row in self.get_all_users(chunk_size, raw=True, guild_id=guild):
+                    yield guild, row
+
+        with open_target(target) as stream:
+            return await write_records(stream, rows(), self.currencies, chunk_size, progress)
+
+    async def import_from(
+        self,
+        source: typing.Union[str, os.PathLike, typing.Iterable],
+        chunk_size: int = 10000,
+        progress: Progress = None,
+        guild_id: typing.Optional[int] = None,
+    ) -> int:
+        """
+        Load users from line-delimited JSON written by export_to.
+
+        Args:
+            source: File path, text stream or iterable of lines or decoded records
+            chunk_size: Number of users written per transaction. Defaults to 10000
+            progress: Called with the number of imported users after every chunk.
+                      Defaults to None
+            guild_id: Guild every user is imported into, None keeps the guild
+                      stored in each record. Defaults to None
+
+        Returns:
+            int: Number of imported users
+
+        Raises:
+            ValueError: If a record is malformed, has an id that is not an int or
+                        str or holds a currency this economy doesn't have
+            EnsurePositiveBalanceException: If a record holds a negative balance
+                                            when ensure_positive_balance is True
+
+        Note:
+            Imported users replace existing users with the same id, including
+            their items. Each chunk is committed on its own, so an import that
+            fails partway can simply be run again.
+
+        Example:
+            >> await economy.import_from("backup.ndjson", progress=print)
+        """
+        names = ", ".join(f'"{field}"' for field in self.currencies)
+        upsert = (
+            f"""INSERT INTO users (guild_id, id, {names})
+                VALUES (?, ?, {", ".join("?" * len(self.currencies))})
+                ON CONFLICT (guild_id, id) DO UPDATE SET
+                {", ".join(f'"{c}" = excluded."{c}"' for c in self.currencies)}"""
+        )
+        imported = 0
+
+        with open_source(source) as lines:
+            for chunk in iterate_records(
+                lines, self.currencies, chunk_size, guild_id, self.__ensure_positive_balance
+            ):
+                async with self.__writer_connection() as conn:
+                    try:
+                        await conn.executemany(
+                            upsert, [(guild, user, *values) for guild, user, values, _ in chunk]
+                        )
+                        await conn.executemany(
+                            "DELETE FROM items WHERE guild_id = ? AND ownerID = ?",
+                            [(guild, user) for guild, user, _, _ in chunk],
+                        )
+                        await conn.executemany(
+                            "INSERT INTO items (guild_id, itemName, ownerID, qty) VALUES (?, ?, ?, ?)",
+                            [
+                                (guild, name, user, quantity)
+                                for guild, user, _, items in chunk
+                                for name, quantity in items.items()
+                            ],
+                        )
+                        await conn.commit()
+                    except BaseException:
+                        await conn.rollback()
+                        raise
+                    finally:
+                        if self.__cache is not None:
+                            self.__cache.clear()
+                        if self.__ranks is not None:
+                            for guild in {record[0] for record in chunk}:
+                                self.__ranks.clear(guild)
+
+                imported += len(chunk)
+                if progress is not None:
+                    progress(imported)
+
+        return imported
+
+    def __order_expression(self, field: LEADERBOARD_FIELDS_LITERAL) -> str:
+        """
+        Resolve a leaderboard field to the SQL expression its index is built on.
+
+        Args:
+            field: 'bank+wallet' or a registered currency
+
+        Returns:
+            str: Quoted column name or the bank + wallet expression
+
+        Raises:
+            ValueError: If the field is not a currency or 'bank+wallet'
+        """
+        if field == "bank+wallet":
+            return _TOTAL_ORDER
+
+        if field in self.currencies:
+            return f'"{field}"'
+
+        raise ValueError(
+            f"Invalid field: {field}. Must be one of: "
+            f"{', '.join((*self.currencies, 'bank+wallet'))}"
+        )
+
+    async def stats(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        percentiles: typing.Iterable[float] = (),
+        buckets: typing.Union[int, typing.Iterable[float], None] = None,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> EconomyStats:
+        """
+        Summarize a balance field over the users of a guild without loading them.
+
+        Args:
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency.
+                   Defaults to "bank"
+            percentiles: Percentiles between 0 and 100 to look up, such as (50, 99).
+                         Defaults to none
+            buckets: Number of equal-width histogram buckets between min and max,
+                     or ascending upper bounds of the buckets. Defaults to none
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            EconomyStats: Count, sum, min, max, mean, nearest-rank percentiles and histogram
+
+        Raises:
+            ValueError: If invalid field, percentile or buckets specified
+
+        Note:
+            Min, max and every percentile are read from the field's index, a
+            percentile walks the index up to its offset. The count and sum are
+            read from the supply table with track_supply, otherwise aggregated
+            over the index. The histogram groups one pass over the index by a
+            CASE of the bucket bounds. All values come from one snapshot.
+
+        Example:
+            >> stats = await economy.stats("bank+wallet", percentiles=[99], buckets=10)
+            >> print(f"{stats.sum} coins in circulation, top 1% above {stats.percentiles[99]}")
+        """
+        order = self.__order_expression(field)
+        percentiles = resolve_percentiles(percentiles)
+        buckets = resolve_buckets(buckets)
+
+        async with self.__reader_connection() as conn:
+            await conn.execute("BEGIN")
+            try:
+                if self.__track_supply:
+                    query = await conn.execute(
+                        f"SELECT users, {order} FROM supply WHERE guild_id = ?", (guild_id,)
+                    )
+                else:
+                    query = await conn.execute(
+                        f"SELECT COUNT(*), SUM({order}) FROM users WHERE guild_id = ?",
+                        (guild_id,),
+                    )
+                count, total = await query.fetchone() or (0, 0)
+
+                # Separate subqueries, so each one is answered from one end of the index
+                query = await conn.execute(
+                    f"""SELECT (SELECT MIN({order}) FROM users WHERE guild_id = ?),
+                               (SELECT MAX({order}) FROM users WHERE guild_id = ?)""",
+                    (guild_id, guild_id),
+                )
+                low, high = await query.fetchone()
+
+                values = {}
+                for percentile in percentiles:
+                    if not count:
+                        values[percentile] = None
+                        continue
+
+                    query = await conn.execute(
+                        f"""SELECT {order} FROM users WHERE guild_id = ?
+                            ORDER BY {order} LIMIT 1 OFFSET ?""",
+                        (guild_id, percentile_rank(percentile, count)),
+                    )
+                    values[percentile] = (await query.fetchone())[0]
+
+                bounds = bucket_bounds(buckets, low, high)
+                histogram = dict.fromkeys(bounds, 0)
+                if bounds:
+                    cases = " ".join(f"WHEN value <= ? THEN {index}" for index in range(len(bounds)))
+                    query = await conn.execute(
+                        f"""SELECT CASE {cases} END AS bucket, COUNT(*)
+                            FROM (SELECT {order} AS value FROM users
+                                  WHERE guild_id = ? AND {order} <= ?)
+                            GROUP BY bucket""",
+                        (*bounds, guild_id, bounds[-1]),
+                    )
+                    for bucket, users in await query.fetchall():
+                        histogram[bounds[bucket]] = users
+            finally:
+                await conn.rollback()
+
+        return EconomyStats(
+            field,
+            count,
+            total or 0,
+            low,
+            high,
+            total / count if count else None,
+            values,
+            histogram,
+        )
+
+    async def get_rank(
+        self,
+        user_id: typing.Union[str, int],
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> Rank:
+        """
+        Find a user's position on a leaderboard without sorting it.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency.
+                   Defaults to "bank"
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            Rank: 1-based rank, number of users and the user's balance
+
+        Raises:
+            NotFoundException: If the user doesn't exist
+            ValueError: If invalid field specified
+
+        Note:
+            The rank counts the users above the balance on the field's index,
+            the total is read from the supply table with track_supply. With
+            rank_index both are binary searches in memory.
+
+        Example:
+            >> rank = await economy.get_rank(ctx.author.id, "bank+wallet")
+            >> print(f"You are #{rank.rank:,} of {rank.total:,}")
+        """
+        order = self.__order_expression(field)
+
+        if self.__ranks is not None:
+            await self.__load_ranks(guild_id)
+            # The index holds IDs as stored, numeric text is stored as an integer
+            value = self.__ranks.value(guild_id, field, _stored_id(user_id))
+
+            if value is None:
+                raise NotFoundException(f"User {user_id} not found")
+
+            return Rank(
+                user_id,
+                field,
+                self.__ranks.count_above(guild_id, field, value) + 1,
+                self.__ranks.count(guild_id),
+                value,
+            )
+
+        async with self.__reader_connection() as conn:
+            await conn.execute("BEGIN")
+            try:
+                query = await conn.execute(
+                    f"SELECT {order} FROM users WHERE guild_id = ? AND id = ?",
+                    (guild_id, user_id),
+                )
+                row = await query.fetchone()
+
+                if not row:
+                    raise NotFoundException(f"User {user_id} not found")
+
+                query = await conn.execute(
+                    f"SELECT COUNT(*) FROM users WHERE guild_id = ? AND {order} > ?",
+                    (guild_id, row[0]),
+                )
+                above = (await query.fetchone())[0]
+
+                if self.__track_supply:
+                    query = await conn.execute(
+                        "SELECT users FROM supply WHERE guild_id = ?", (guild_id,)
+                    )
+                else:
+                    query = await conn.execute(
+                        "SELECT COUNT(*) FROM users WHERE guild_id = ?", (guild_id,)
+                    )
+                total = (await query.fetchone())[0]
+            finally:
+                await conn.rollback()
+
+        return Rank(user_id, field, above + 1, total, row[0])
+
+    async def count_above(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL,
+        value: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> int:
+        """
+        Count the users whose balance is strictly greater than value.
+
+        Args:
+            field: 'bank', 'wallet', 'bank+wallet' or a registered currency
+            value: Balance to compare against
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            int: Number of users above value
+
+        Raises:
+            ValueError: If invalid field specified
+
+        Example:
+            >> richer = await economy.count_above("bank", 1_000_000)
+        """
+        order = self.__order_expression(field)
+
+        if self.__ranks is not None:
+            await self.__load_ranks(guild_id)
+            return self.__ranks.count_above(guild_id, field, value)
+
+        async with self.__reader_connection() as conn:
+            query = await conn.execute(
+                f"SELECT COUNT(*) FROM users WHERE guild_id = ? AND {order} > ?",
+                (guild_id, value),
+            )
+            return (await query.fetchone())[0]
+
+    async def __load_ranks(self, guild_id: int) -> None:
+        """
+        Load the balances of a guild into the rank index on first use.
+
+        Args:
+            guild_id: Guild the users belong to
+
+        Note:
+            The rows are read on the writer connection, so no write commits
+            between the read and the index applying later writes as deltas.
+        """
+        if self.__ranks.loaded(guild_id):
+            return
+
+        async with self.__writer_connection() as conn:
+
+            async def load_all() -> typing.List[tuple]:
+                query = await conn.execute(
+                    f"SELECT id, {self.__columns} FROM users WHERE guild_id = ?", (guild_id,)
+                )
+                return await query.fetchall()
+
+            await self.__ranks.load(guild_id, load_all)
+
+    async def get_leaderboard(
+        self,
+        field: LEADERBOARD_FIELDS_LITERAL = "bank",
+        limit: int = 10,
+        offset: int = 0,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.List[Balance]:
+        """
+        Retrieve the richest users ordered by the given balance field.
+
+        Args:
+            field: Balance to rank by ('bank', 'wallet', 'bank+wallet' or a
+                   registered currency). Defaults to "bank"
+            limit: Maximum number of users returned. Defaults to 10
+            offset: Number of top users to skip. Defaults to 0
+            guild_id: Guild the users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            List[Balance]: Balances in descending order, without items
+
+        Raises:
+            ValueError: If invalid field, limit or offset specified
+
+        Example:
+            >> top = await economy.get_leaderboard("bank+wallet", limit=10)
+            >> print([(entry.id, entry.bank + entry.wallet) for entry in top])
+        """
+        order = self.__order_expression(field)
+
+        if limit < 1 or offset < 0:
+            raise ValueError("Limit must be greater than 0 and offset cannot be negative")
+
+        async with self.__reader_connection() as conn:
+            query = await conn.execute(
+                f"""SELECT id, {self.__columns} FROM users WHERE guild_id = ?
+                    ORDER BY {order} DESC, id DESC
+                    LIMIT ? OFFSET ?""",
+                (guild_id, limit, offset),
+            )
+            rows = await query.fetchall()
+
+        return [self.__to_balance(row) for row in rows]
+
+    async def add_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Add money to a user's specified balance field.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to add
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Note:
+            Unregistered users are created by the same upsert statement.
+
+        Example:
+            >> await economy.add_money(1234567890, "wallet", 100)
+        """
+        self.__validate_money("add", field, amount)
+
+        await self.__write(
+            self.__statements["add", field],
+            self.__money_params("add", user_id, field, amount, guild_id),
+            functools.partial(self.__update_ranks, "add", user_id, field, amount, guild_id),
+        )
+        self.__invalidate(guild_id, user_id)
+
+    async def remove_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove money from a user's specified balance field.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to remove
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Note:
+            Unregistered users are created by the same upsert statement.
+
+        Example:
+            >> await economy.remove_money(1234567890, "bank", 50)
+        """
+        self.__validate_money("remove", field, amount)
+
+        await self.__write(
+            self.__statements["remove", field],
+            self.__money_params("remove", user_id, field, amount, guild_id),
+            functools.partial(self.__update_ranks, "remove", user_id, field, amount, guild_id),
+        )
+        self.__invalidate(guild_id, user_id)
+
+    async def set_money(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Set a user's balance field to a specific amount.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: New absolute value for the balance
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+
+        Note:
+            Unregistered users are created by the same upsert statement.
+
+        Example:
+            >> await economy.set_money(1234567890, "wallet", 200)
+        """
+        self.__validate_money("set", field, amount)
+
+        await self.__write(
+            self.__statements["set", field],
+            self.__money_params("set", user_id, field, amount, guild_id),
+            functools.partial(self.__update_ranks, "set", user_id, field, amount, guild_id),
+        )
+        self.__invalidate(guild_id, user_id)
+
+    async def withdraw(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove money from a balance only if it covers the whole amount.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field to modify ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to remove
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+            InsufficientFundsException: If the balance is lower than amount
+                                        or the user doesn't exist
+
+        Note:
+            Unlike remove_money the balance is never clamped and unregistered
+            users are not created.
+
+        Example:
+            >> await economy.withdraw(1234567890, "wallet", 25)
+        """
+        self.__validate_money("remove", field, amount)
+
+        async with self.__writer_connection() as conn:
+            cursor = await conn.execute(
+                self.__statements["debit", field], (amount, guild_id, user_id, amount)
+            )
+            await conn.commit()
+
+            if cursor.rowcount:
+                self.__update_ranks("debit", user_id, field, amount, guild_id)
+
+        if cursor.rowcount == 0:
+            raise InsufficientFundsException(
+                f"User {user_id} doesn't have {amount} in {field}"
+            )
+
+        self.__invalidate(guild_id, user_id)
+
+    async def __bulk_money(
+        self,
+        operation: str,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int,
+        guild_id: int,
+    ) -> BulkResult:
+        """
+        Apply many balance mutations of one kind inside a single transaction.
+
+        Args:
+            operation: Kind of mutation ('add', 'remove' or 'set')
+            operations: (user_id, field, amount) tuples to apply
+            chunk_size: Number of tuples passed to each executemany call
+            guild_id: Guild all users belong to
+
+        Returns:
+            BulkResult: Number of processed tuples and changed rows
+
+        Note:
+            Nothing is committed if any tuple fails validation. An async iterable
+            is collected before the writer connection is taken, so a slow producer
+            doesn't hold up other writes.
+        """
+        result = BulkResult(0, 0)
+        applied = []
+
+        if hasattr(operations, "__aiter__"):
+            operations = [item async for item in operations]
+
+        async with self.__writer_connection() as conn:
+            try:
+                async for chunk in iterate_chunks(operations, chunk_size):
+                    params_by_field = {}
+                    for user_id, field, amount in chunk:
+                        self.__validate_money(operation, field, amount)
+                        params_by_field.setdefault(field, []).append(
+                            self.__money_params(operation, user_id, field, amount, guild_id)
+                        )
+
+                    for field, params in params_by_field.items():
+                        cursor = await conn.executemany(
+                            self.__statements[operation, field], params
+                        )
+                        result.changed += cursor.rowcount
+
+                    result.operations += len(chunk)
+                    if self.__ranks is not None:
+                        applied.extend(chunk)
+
+                await conn.commit()
+
+                for user_id, field, amount in applied:
+                    self.__update_ranks(operation, user_id, field, amount, guild_id)
+            except BaseException:
+                await conn.rollback()
+                raise
+            finally:
+                if self.__cache is not None:
+                    self.__cache.clear()
+
+        return result
+
+    async def bulk_add_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Add money to many users inside a single transaction.
+
+        Args:
+            operations: Iterable or async iterable of (user_id, field, amount) tuples,
+                        an async iterable is collected before writing
+            chunk_size: Number of tuples sent per executemany call. Defaults to 1000
+            guild_id: Guild all users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            BulkResult: Number of processed tuples and changed rows
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Example:
+            >> await economy.bulk_add_money((member.id, "wallet", 100) for member in guild.members)
+        """
+        return await self.__bulk_money("add", operations, chunk_size, guild_id)
+
+    async def bulk_remove_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Remove money from many users inside a single transaction.
+
+        Args:
+            operations: Iterable or async iterable of (user_id, field, amount) tuples,
+                        an async iterable is collected before writing
+            chunk_size: Number of tuples sent per executemany call. Defaults to 1000
+            guild_id: Guild all users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            BulkResult: Number of processed tuples and changed rows
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+
+        Example:
+            >> await economy.bulk_remove_money([(1234567890, "bank", 50), (987654321, "wallet", 10)])
+        """
+        return await self.__bulk_money("remove", operations, chunk_size, guild_id)
+
+    async def bulk_set_money(
+        self,
+        operations: typing.Union[
+            typing.Iterable[MoneyOperation], typing.AsyncIterable[MoneyOperation]
+        ],
+        chunk_size: int = 1000,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> BulkResult:
+        """
+        Set balances of many users inside a single transaction.
+
+        Args:
+            operations: Iterable or async iterable of (user_id, field, amount) tuples,
+                        an async iterable is collected before writing
+            chunk_size: Number of tuples sent per executemany call. Defaults to 1000
+            guild_id: Guild all users belong to. Defaults to 0 (unscoped)
+
+        Returns:
+            BulkResult: Number of processed tuples and changed rows
+
+        Raises:
+            ValueError: If invalid field specified
+            EnsurePositiveBalanceException: If trying to set negative balance when ensure_positive_balance is True
+
+        Example:
+            >> await economy.bulk_set_money((user.id, "bank", 0) for user in season_players)
+        """
+        return await self.__bulk_money("set", operations, chunk_size, guild_id)
+
+    async def transfer(
+        self,
+        src_user_id: typing.Union[str, int],
+        src_field: VALID_FIELDS_LITERAL,
+        dst_user_id: typing.Union[str, int],
+        dst_field: VALID_FIELDS_LITERAL,
+        amount: typing.Union[float, int],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Atomically move money between two balance fields, possibly of different users.
+
+        Args:
+            src_user_id: User the money is taken from
+            src_field: Balance field debited ('bank', 'wallet' or a registered currency)
+            dst_user_id: User the money is given to
+            dst_field: Balance field credited ('bank', 'wallet' or a registered currency)
+            amount: Positive amount to move
+            guild_id: Guild both users belong to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If invalid field specified
+            NegativeAmountException: If negative amount provided
+            InsufficientFundsException: If source balance is lower than amount
+
+        Note:
+            Runs in a single BEGIN IMMEDIATE transaction, so money is never
+            minted or lost. The destination user is registered if needed.
+
+        Example:
+            >> await economy.transfer(1234567890, "bank", 1234567890, "wallet", 100)
+        """
+        self.__validate_money("remove", src_field, amount)
+        self.__validate_money("add", dst_field, amount)
+
+        async with self.__writer_connection() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = await conn.execute(
+                    self.__statements["debit", src_field],
+                    (amount, guild_id, src_user_id, amount),
+                )
+
+                if cursor.rowcount == 0:
+                    raise InsufficientFundsException(
+                        f"User {src_user_id} doesn't have {amount} in {src_field}"
+                    )
+
+                await conn.execute(
+                    self.__statements["add", dst_field],
+                    self.__money_params("add", dst_user_id, dst_field, amount, guild_id),
+                )
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+            self.__update_ranks("debit", src_user_id, src_field, amount, guild_id)
+            self.__update_ranks("add", dst_user_id, dst_field, amount, guild_id)
+
+        self.__invalidate(guild_id, src_user_id, dst_user_id)
+
+    async def purchase(
+        self,
+        user_id: typing.Union[str, int],
+        field: VALID_FIELDS_LITERAL,
+        price: typing.Union[float, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> PurchaseResult:
+        """
+        Atomically debit a balance and grant items if the user can afford them.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            field: Balance field paying the price ('bank', 'wallet' or a registered currency)
+            price: Total price of the purchase
+            item_name: Name of the item granted
+            qty: Number of units granted. Defaults to 1
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            PurchaseResult: Success flag and the balance after the purchase,
+                            or the unchanged balance if funds were insufficient
+
+        Raises:
+            ValueError: If invalid field or quantity specified
+            NegativeAmountException: If negative price provided
+            NotFoundException: If the specified user doesn't exist
+
+        Note:
+            Runs in a single BEGIN IMMEDIATE transaction, so a purchase is
+            never charged without the items or granted without the charge.
+
+        Example:
+            >> result = await economy.purchase(1234567890, "bank", 250, "pickaxe")
+            >> if not result.success:
+            ...     print(f"Missing {250 - result.balance.bank} coins")
+        """
+        self.__validate_money("remove", field, price)
+
+        if qty < 1:
+            raise ValueError("Quantity must be greater than 0")
+
+        async with self.__writer_connection() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = await conn.execute(
+                    self.__statements["debit", field], (price, guild_id, user_id, price)
+                )
+                success = cursor.rowcount > 0
+
+                if success:
+                    await conn.execute(
+                        _ADD_ITEM_STATEMENT, (guild_id, item_name, user_id, qty)
+                    )
+
+                query = await conn.execute(
+                    f"SELECT id, {self.__columns} FROM users WHERE guild_id = ? AND id = ?",
+                    (guild_id, user_id),
+                )
+                row = await query.fetchone()
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+            if success:
+                self.__update_ranks("debit", user_id, field, price, guild_id)
+
+        if not row:
+            raise NotFoundException(f"User {user_id} not found")
+
+        if success:
+            self.__invalidate(guild_id, user_id)
+
+        return PurchaseResult(success, self.__to_balance(row))
+
+    async def add_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Add items to a user's inventory, stacking them with units already owned.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item to add
+            qty: Number of units to add. Defaults to 1
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If quantity is lower than 1
+            sqlite3.IntegrityError: If user doesn't exist
+
+        Example:
+            >> await economy.add_item(1234567890, "iron_ore", 16)
+        """
+        if qty < 1:
+            raise ValueError("Quantity must be greater than 0")
+
+        await self.__write(_ADD_ITEM_STATEMENT, (guild_id, item_name, user_id, qty))
+        self.__invalidate(guild_id, user_id)
+
+    async def remove_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        qty: int = 1,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> None:
+        """
+        Remove units of an item from a user's inventory.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item to remove
+            qty: Number of units to remove. Defaults to 1
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Raises:
+            ValueError: If quantity is lower than 1
+            NotFoundException: If either user doesn't exist or item not found
+            NotEnoughItemsException: If user owns fewer units than requested
+
+        Note:
+            The stack is deleted once its last unit is removed.
+
+        Example:
+            >> await economy.remove_item(1234567890, "old_sword")
+        """
+        if qty < 1:
+            raise ValueError("Quantity must be greater than 0")
+
+        async with self.__writer_connection() as conn:
+            try:
+                cursor = await conn.execute(
+                    """UPDATE items SET qty = qty - ?
+                       WHERE guild_id = ? AND ownerID = ? AND itemName = ? AND qty >= ?""",
+                    (qty, guild_id, user_id, item_name, qty),
+                )
+
+                if cursor.rowcount == 0:
+                    count = await self.__item_count(conn, user_id, item_name, guild_id)
+                    if not count:
+                        raise NotFoundException(
+                            f"Item {item_name} not found for user {user_id}"
+                        )
+                    raise NotEnoughItemsException(
+                        f"User {user_id} has only {count} of {item_name}"
+                    )
+
+                await conn.execute(
+                    """DELETE FROM items
+                       WHERE guild_id = ? AND ownerID = ? AND itemName = ? AND qty <= 0""",
+                    (guild_id, user_id, item_name),
+                )
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+        self.__invalidate(guild_id, user_id)
+
+    async def get_item_count(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> int:
+        """
+        Return how many units of an item a user owns.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            int: Number of units, 0 if the user doesn't own the item
+
+        Example:
+            >> await economy.get_item_count(1234567890, "iron_ore")
+        """
+        async with self.__reader_connection() as conn:
+            return await self.__item_count(conn, user_id, item_name, guild_id)
+
+    async def has_item(
+        self,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> bool:
+        """
+        Check whether a user owns at least one unit of an item.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            bool: True if the user owns the item
+
+        Example:
+            >> if await economy.has_item(1234567890, "fishing_rod"):
+            ...     print("Ready to fish")
+        """
+        async with self.__reader_connection() as conn:
+            return await self.__item_count(conn, user_id, item_name, guild_id) > 0
+
+    async def has_items(
+        self,
+        user_id: typing.Union[str, int],
+        item_names: typing.Iterable[str],
+        guild_id: int = GLOBAL_GUILD_ID,
+    ) -> typing.Dict[str, bool]:
+        """
+        Check which of the given items a user owns.
+
+        Args:
+            user_id: Discord user ID or unique identifier
+            item_names: Names of the items
+            guild_id: Guild the user belongs to. Defaults to 0 (unscoped)
+
+        Returns:
+            Dict[str, bool]: Ownership of every requested item
+
+        Example:
+            >> owned = await economy.has_items(1234567890, ["pickaxe", "lamp"])
+            >> print(all(owned.values()))
+        """
+        owned = dict.fromkeys(item_names, False)
+
+        async with self.__reader_connection() as conn:
+            async for names in iterate_chunks(list(owned), 500):
+                query = await conn.execute(
+                    f"""SELECT itemName FROM items
+                        WHERE guild_id = ? AND ownerID = ? AND qty > 0
+                        AND itemName IN ({', '.join('?' * len(names))})""",
+                    (guild_id, user_id, *names),
+                )
+                for (item_name,) in await query.fetchall():
+                    owned[item_name] = True
+
+        return owned
+
+    @staticmethod
+    async def __item_count(
+        conn: aiosqlite.Connection,
+        user_id: typing.Union[str, int],
+        item_name: str,
+        guild_id: int,
+    ) -> int:
+        """
+        Read the stack size of an item using an already acquired connection.
+
+        Args:
+            conn: Connection used to run the query
+            user_id: Discord user ID or unique identifier
+            item_name: Name of the item
+            guild_id: Guild the user belongs to
+
+        Returns:
+            int: Number of units, 0 if the user doesn't own the item
+        """
+        query = await conn.execute(
+            "SELECT qty FROM items WHERE guild_id = ? AND ownerID = ? AND itemName = ?",
+            (guild_id, user_id, item_name),
+        )
+        row = await query.fetchone()
+        return row[0] if row else 0
@@ -0,0 +1,244 @@
+import contextlib
+import json
+import os
+import typing
+
+from .constants import GLOBAL_GUILD_ID
+from .exceptions import EnsurePositiveBalanceException
+from .objects import UserRow
+
+__all__ = [
+    "open_target",
+    "open_source",
+    "parse_line",
+    "iterate_records",
+    "write_records",
+]
+
+Progress = typing.Optional[typing.Callable[[int], typing.Any]]
+
+# (guild_id, user_id, balances in currency order, {item name: quantity})
+ImportRecord = typing.Tuple[
+    int, typing.Union[str, int], typing.List[typing.Union[float, int]], typing.Dict[str, int]
+]
+
+
+@contextlib.contextmanager
+def open_target(target: typing.Union[str, os.PathLike, typing.TextIO]) -> typing.Iterator[typing.TextIO]:
+    """
+    Open an export target, a path is created or truncated and closed afterwards.
+
+    Args:
+        target: File path or writable text stream
+
+    Yields:
+        TextIO: Stream the lines are written to
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w", encoding="utf-8", newline="\n") as stream:
+            yield stream
+    else:
+        yield target
+
+
+@contextlib.contextmanager
+def open_source(source: typing.Union[str, os.PathLike, typing.Iterable]) -> typing.Iterator[typing.Iterable]:
+    """
+    Open an import source, a path is read as UTF-8 and closed afterwards.
+
+    Args:
+        source: File path, text stream or any iterable of lines or records
+
+    Yields:
+        Iterable: Lines or already decoded records
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as stream:
+            yield stream
+    else:
+        yield source
+
+
+def to_record(guild_id: int, row: UserRow, currencies: typing.Sequence[str]) -> dict:
+    """
+    Convert a raw user row into an export record.
+
+    Args:
+        guild_id: Guild the user belongs to
+        row: Raw user row as yielded by get_all_users(raw=True)
+        currencies: Currencies of the economy, bank and wallet first
+
+    Returns:
+        dict: JSON-serializable record
+    """
+    return {
+        "guild_id": guild_id,
+        "id": row.id,
+        "balances": dict(zip(currencies, (row.bank, row.wallet, *row.extra))),
+        "items": {item.name: item.quantity for item in row.items},
+    }
+
+
+async def write_records(
+    stream: typing.TextIO,
+    rows: typing.AsyncIterable[typing.Tuple[int, UserRow]],
+    currencies: typing.Sequence[str],
+    chunk_size: int,
+    progress: Progress = None,
+) -> int:
+    """
+    Write users as line-delimited JSON, one record per line.
+
+    Args:
+        stream: Writable text stream
+        rows: (guild_id, raw user row) pairs
+        currencies: Currencies of the economy, bank and wallet first
+        chunk_size: Number of lines buffered between writes and progress calls
+        progress: Called with the number of users written so far
+
+    Returns:
+        int: Number of written users
+    """
+    written = 0
+    lines = []
+
+    async for guild_id, row in rows:
+        lines.append(json.dumps(to_record(guild_id, row, currencies), separators=(",", ":")))
+
+        if len(lines) >= chunk_size:
+            stream.write("\n".join(lines) + "\n")
+            written += len(lines)
+            lines = []
+            if progress is not None:
+                progress(written)
+
+    if lines:
+        stream.write("\n".join(lines) + "\n")
+        written += len(lines)
+        if progress is not None:
+            progress(written)
+
+    return written
+
+
+def parse_line(line: typing.Union[str, bytes, dict], line_number: int) -> typing.Optional[dict]:
+    """
+    Decode one import line.
+
+    Args:
+        line: JSON line or an already decoded record
+        line_number: 1-based position used in error messages
+
+    Returns:
+        dict | None: Record, None for a blank line
+
+    Raises:
+        ValueError: If the line is not a JSON object with an id
+    """
+    if isinstance(line, dict):
+        record = line
+    else:
+        if not line.strip():
+            return None
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid record on line {line_number}: {e}") from e
+
+    if not isinstance(record, dict) or "id" not in record:
+        raise ValueError(f"Invalid record on line {line_number}: expected an object with an id")
+
+    return record
+
+
+def iterate_records(
+    lines: typing.Iterable,
+    currencies: typing.Sequence[str],
+    chunk_size: int,
+    guild_id: typing.Optional[int] = None,
+    ensure_positive_balance: bool = True,
+) -> typing.Iterator[typing.List[ImportRecord]]:
+    """
+    Decode and validate import lines in chunks.
+
+    Args:
+        lines: JSON lines or decoded records
+        currencies: Currencies of the importing economy
+        chunk_size: Maximum number of records per chunk
+        guild_id: Guild every record is imported into, None keeps each record's guild
+        ensure_positive_balance: Whether negative balances are rejected
+
+    Yields:
+        list: Up to chunk_size (guild_id, user_id, balances, items) tuples
+
+    Raises:
+        ValueError: If a record is malformed, has an id or guild_id that is
+                    not an int or str, holds an unknown currency, a balance
+                    that is not a number or a quantity that is not a positive
+                    integer
+        EnsurePositiveBalanceException: If a record holds a negative balance
+                                        when ensure_positive_balance is True
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be greater than 0")
+
+    chunk = []
+
+    for line_number, line in enumerate(lines, 1):
+        record = parse_line(line, line_number)
+        if record is None:
+            continue
+
+        record_guild_id = record.get("guild_id", GLOBAL_GUILD_ID)
+        for key, value in (("id", record["id"]), ("guild_id", record_guild_id)):
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise ValueError(
+                    f"Invalid record on line {line_number}: {key} must be an int or str"
+                )
+
+        balances = record.get("balances") or {}
+        items = record.get("items") or {}
+        if not isinstance(balances, dict) or not isinstance(items, dict):
+            raise ValueError(
+                f"Invalid record on line {line_number}: balances and items must be objects"
+            )
+
+        unknown = set(balances) - set(currencies)
+        if unknown:
+            raise ValueError(
+                f"Invalid record on line {line_number}: unknown currencies "
+                f"{', '.join(sorted(unknown))}"
+            )
+
+        for currency, amount in balances.items():
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+                raise ValueError(
+                    f"Invalid record on line {line_number}: balance of {currency} must be a number"
+                )
+            if ensure_positive_balance and amount < 0:
+                raise EnsurePositiveBalanceException(
+                    f"Invalid record on line {line_number}: balance of {currency} is negative"
+                )
+
+        for quantity in items.values():
+            if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+                raise ValueError(
+                    f"Invalid record on line {line_number}: item quantities must be positive integers"
+                )
+
+        chunk.append(
+            (
+                record_guild_id if guild_id is None else guild_id,
+                record["id"],
+                [balances.get(currency, 0) for currency in currencies],
+                items,
+            )
+        )
+
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
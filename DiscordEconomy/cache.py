@@ -0,0 +1,166 @@
+import asyncio
+import time
+import typing
+from collections import OrderedDict
+
+from .objects import CacheStats
+
+__all__ = ["UserCache"]
+
+K = typing.TypeVar("K")
+V = typing.TypeVar("V")
+
+
+class UserCache(typing.Generic[K, V]):
+    """
+    Bounded in-process cache with LRU eviction, optional TTL and single-flight loading.
+
+    Attributes:
+        max_size (int): Maximum number of cached entries
+        ttl (float): Seconds after which an entry expires, None to never expire
+    """
+
+    def __init__(self, max_size: int, ttl: typing.Optional[float] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size: Maximum number of cached entries
+            ttl: Seconds after which an entry expires. Defaults to None (never)
+        """
+        if max_size < 1:
+            raise ValueError("Cache size must be greater than 0")
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.__entries: "OrderedDict[K, typing.Tuple[typing.Optional[float], V]]" = OrderedDict()
+        self.__loading: typing.Dict[K, asyncio.Task] = {}
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: K) -> typing.Optional[V]:
+        """
+        Return a cached value without loading it.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.__entries[key]
+            self.__evictions += 1
+            return None
+
+        self.__entries.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Store a value, evicting the least recently used entries above max_size.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self.__entries[key] = (expires_at, value)
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        """
+        Drop a cached value and detach any load in flight, so its result is not stored.
+
+        Args:
+            key: Cache key
+        """
+        self.__entries.pop(key, None)
+        self.__loading.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Drop every cached value and detach all loads in flight.
+        """
+        self.__entries.clear()
+        self.__loading.clear()
+
+    async def get_or_load(
+        self, key: K, loader: typing.Callable[[K], typing.Awaitable[V]]
+    ) -> V:
+        """
+        Return a cached value, loading it once for all concurrent callers on a miss.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function fetching the value from the database
+
+        Returns:
+            The cached or freshly loaded value
+
+        Note:
+            Exceptions raised by the loader are propagated and never cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.__hits += 1
+            return value
+
+        task = self.__loading.get(key)
+        if task is None:
+            self.__misses += 1
+            task = asyncio.ensure_future(self.__load(key, loader))
+            self.__loading[key] = task
+        else:
+            self.__hits += 1
+
+        # Shielded so a cancelled caller doesn't cancel the load for the others
+        return await asyncio.shield(task)
+
+    async def __load(
+        self, key: K, loader: typing.Callable[[K], typing.Awaitable[V]]
+    ) -> V:
+        """
+        Run the loader and store its result unless the key was invalidated meanwhile.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function fetching the value from the database
+
+        Returns:
+            The loaded value
+        """
+        try:
+            value = await loader(key)
+        finally:
+            is_current = self.__loading.get(key) is asyncio.current_task()
+            if is_current:
+                del self.__loading[key]
+
+        if is_current:
+            self.put(key, value)
+
+        return value
+
+    def stats(self) -> CacheStats:
+        """
+        Return the cache counters.
+
+        Returns:
+            CacheStats: Hits, misses, evictions and current size
+        """
+        return CacheStats(self.__hits, self.__misses, self.__evictions, len(self.__entries))
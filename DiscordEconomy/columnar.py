@@ -0,0 +1,153 @@
+import importlib
+import operator
+import typing
+
+__all__ = ["EXPORT_FORMATS", "ColumnarBuilder", "concat_columnar"]
+
+EXPORT_FORMATS = ("numpy", "arrow")
+
+# Extras that provide the modules each export format needs
+_FORMAT_MODULES = {
+    "numpy": ("numpy",),
+    "arrow": ("numpy", "pyarrow"),
+}
+
+
+def _require(format: str) -> typing.Dict[str, typing.Any]:
+    """
+    Import the optional dependencies of an export format.
+
+    Args:
+        format: Export format, 'numpy' or 'arrow'
+
+    Returns:
+        dict: Module name to imported module
+
+    Raises:
+        ValueError: If the format is not supported
+        ImportError: If a dependency is not installed
+    """
+    if format not in _FORMAT_MODULES:
+        raise ValueError(
+            f"Invalid format: {format}. Must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    modules = {}
+
+    for module in _FORMAT_MODULES[format]:
+        try:
+            modules[module] = importlib.import_module(module)
+        except ImportError as e:
+            raise ImportError(
+                f"format={format!r} requires {module}, install it with "
+                f"'pip install DiscordEconomy[{format}]'"
+            ) from e
+
+    return modules
+
+
+class ColumnarBuilder:
+    """
+    Collect balance rows into preallocated typed columns.
+
+    Rows are (id, *fields) tuples as returned by a cursor. Ids are stored as
+    int64 and balances as float64, so ids must be integers.
+
+    Args:
+        format: Result format, 'numpy' or 'arrow'
+        fields: Balance fields following the id in every row
+        size_hint: Expected number of rows, see reserve
+
+    Raises:
+        ValueError: If the format is not supported
+        ImportError: If the format's optional dependency is not installed
+    """
+
+    def __init__(self, format: str, fields: typing.Sequence[str], size_hint: int = 0):
+        self.__modules = _require(format)
+        self.__np = self.__modules["numpy"]
+        self.format = format
+        self.names = ("id", *fields)
+        self.size = 0
+        self.__columns = [self.__np.empty(size_hint, dtype=self.__np.int64)] + [
+            self.__np.empty(size_hint, dtype=self.__np.float64) for _ in fields
+        ]
+
+    def reserve(self, capacity: int) -> None:
+        """
+        Preallocate room for at least capacity rows in total.
+
+        Args:
+            capacity: Expected number of rows. Columns still grow if more arrive
+        """
+        if capacity <= len(self.__columns[0]):
+            return
+
+        grown = []
+        for column in self.__columns:
+            array = self.__np.empty(capacity, dtype=column.dtype)
+            array[:self.size] = column[:self.size]
+            grown.append(array)
+        self.__columns = grown
+
+    def append(self, rows: typing.Sequence[typing.Sequence]) -> None:
+        """
+        Copy a chunk of rows into the columns.
+
+        Args:
+            rows: (id, *fields) tuples
+        """
+        if not rows:
+            return
+
+        end = self.size + len(rows)
+
+        if end > len(self.__columns[0]):
+            self.reserve(max(end, 2 * len(self.__columns[0])))
+
+        self.__columns[0][self.size:end] = self.__np.fromiter(
+            map(operator.itemgetter(0), rows), self.__np.int64, len(rows)
+        )
+        # One conversion for the whole chunk, the lossy float copy of the ids is discarded
+        balances = self.__np.array(rows, dtype=self.__np.float64)
+        for index, column in enumerate(self.__columns[1:], 1):
+            column[self.size:end] = balances[:, index]
+
+        self.size = end
+
+    def build(self) -> typing.Any:
+        """
+        Finish the export.
+
+        Returns:
+            dict | pyarrow.Table: Column name to numpy array for 'numpy',
+                                  a table with the same columns for 'arrow'
+        """
+        columns = {
+            name: column if len(column) == self.size else column[:self.size].copy()
+            for name, column in zip(self.names, self.__columns)
+        }
+
+        if self.format == "arrow":
+            return self.__modules["pyarrow"].table(columns)
+
+        return columns
+
+
+def concat_columnar(format: str, parts: typing.Sequence[typing.Any]) -> typing.Any:
+    """
+    Concatenate exports of the same format and columns.
+
+    Args:
+        format: Format of the parts, 'numpy' or 'arrow'
+        parts: Results of ColumnarBuilder.build
+
+    Returns:
+        dict | pyarrow.Table: Combined export in the same format
+    """
+    modules = _require(format)
+
+    if format == "arrow":
+        return modules["pyarrow"].concat_tables(parts)
+
+    return {name: modules["numpy"].concatenate([part[name] for part in parts]) for name in parts[0]}
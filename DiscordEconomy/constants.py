@@ -2,3 +2,17 @@ import typing
 
 VALID_FIELDS = {"bank", "wallet"}
 VALID_FIELDS_LITERAL = typing.Literal["bank", "wallet"]
+
+# Currencies every economy has, extra ones are registered through the constructor
+DEFAULT_CURRENCIES = ("bank", "wallet")
+CURRENCY_NAME_PATTERN = r"[A-Za-z_][A-Za-z0-9_]*"
+# "users" is the user counter column of the SQLite supply summary
+RESERVED_FIELDS = {"id", "_id", "items", "total", "guild_id", "user_id", "users"}
+
+# Guild of users accessed without a scope, guild scoped data never mixes with it
+GLOBAL_GUILD_ID = 0
+
+LEADERBOARD_FIELDS = {"bank", "wallet", "bank+wallet"}
+LEADERBOARD_FIELDS_LITERAL = typing.Literal["bank", "wallet", "bank+wallet"]
+
+MoneyOperation = typing.Tuple[typing.Union[str, int], VALID_FIELDS_LITERAL, typing.Union[float, int]]
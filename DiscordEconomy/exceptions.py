@@ -16,3 +16,11 @@ class NotFoundException(DiscordEconomyException):
 
 class ItemAlreadyExists(DiscordEconomyException):
     """Raised when trying to add item that user already has"""
+
+
+class InsufficientFundsException(DiscordEconomyException):
+    """Raised when user's balance is too low to cover the requested amount"""
+
+
+class NotEnoughItemsException(NotFoundException):
+    """Raised when trying to remove more units of an item than user has"""
@@ -1,20 +1,151 @@
-from typing import List
-from dataclasses import dataclass
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from dataclasses import dataclass, field
 
+# Objects built once per row drop their __dict__ where dataclasses support it
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class Item:
     id: int
     name: str
     owner_id: int
+    quantity: int = 1
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class User:
     """
     User object, returned from a database.
+
+    items is None when the user was fetched without their inventory.
+    balances maps every registered currency, bank and wallet included, to its amount.
+    """
+    id: int
+    bank: float
+    wallet: float
+    items: Optional[List[Item]]
+    balances: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(**_SLOTS)
+class Balance:
+    """
+    Balance-only view of a user, returned without loading items.
+
+    balances maps every registered currency, bank and wallet included, to its amount.
+    """
+    id: int
+    bank: float
+    wallet: float
+    balances: Dict[str, float] = field(default_factory=dict)
+
+
+class ItemRow(NamedTuple):
+    """
+    Immutable item stack of a raw user row.
+    """
+    id: int
+    name: str
+    owner_id: int
+    quantity: int
+
+
+class UserRow(NamedTuple):
+    """
+    Immutable user row yielded by get_all_users(raw=True).
+
+    extra holds the balances of currencies other than bank and wallet,
+    in the order of the economy's currencies attribute.
     """
     id: int
     bank: float
     wallet: float
-    items: List[Item]
+    items: Tuple[ItemRow, ...]
+    extra: Tuple[float, ...] = ()
+
+
+@dataclass
+class BulkResult:
+    """
+    Summary of a bulk balance mutation.
+    """
+    operations: int
+    changed: int
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters of the optional user cache.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+@dataclass
+class PurchaseResult:
+    """
+    Outcome of a purchase, with the balance after it or the unchanged balance if it failed.
+    """
+    success: bool
+    balance: Balance
+
+
+@dataclass
+class PoolStats:
+    """
+    Counters of the SQLite reader pool and writer connection.
+
+    wait_histogram maps the upper bound of each bucket in milliseconds to the number
+    of reader checkouts that waited at most that long. open and idle are None when
+    the pool implementation doesn't expose its idle connections.
+    """
+    size: int
+    open: Optional[int]
+    active: int
+    idle: Optional[int]
+    checkouts: int
+    acquire_timeouts: int
+    lock_errors: int
+    wait_time_total: float
+    wait_histogram: Dict[float, int]
+    writer_checkouts: int
+    writer_wait_time_total: float
+
+
+@dataclass
+class EconomyStats:
+    """
+    Summary of one balance field over the users of a guild.
+
+    min, max and mean are None when the guild has no users. percentiles maps every
+    requested percentile to its nearest-rank value, or None when there are no users.
+    histogram maps the upper bound of each requested bucket to the number of users
+    with a balance above the previous bound and at most this one.
+    """
+    field: str
+    count: int
+    sum: float
+    min: Optional[float]
+    max: Optional[float]
+    mean: Optional[float]
+    percentiles: Dict[float, Optional[float]] = field(default_factory=dict)
+    histogram: Dict[float, int] = field(default_factory=dict)
+
+
+@dataclass
+class Rank:
+    """
+    Leaderboard position of a user, users with equal balances share a rank.
+
+    rank is 1-based and total is the number of users of the guild.
+    """
+    id: Union[str, int]
+    field: str
+    rank: int
+    total: int
+    value: float
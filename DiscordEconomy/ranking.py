@@ -0,0 +1,248 @@
+import asyncio
+import typing
+
+from sortedcontainers import SortedList
+
+__all__ = ["RankIndex"]
+
+UserId = typing.Union[str, int]
+Number = typing.Union[float, int]
+Row = typing.Sequence[typing.Any]
+
+# Leaderboard field ranking the sum of bank and wallet
+_TOTAL_FIELD = "bank+wallet"
+
+
+class RankIndex:
+    """
+    In-memory order statistics over the balances of a guild's leaderboard fields.
+
+    The balances of a guild are loaded on first use, and every ranked field keeps
+    its values in a SortedList, so counting the users above a balance is a binary
+    search and moving a user is O(log n). The economy applies its own writes as
+    they commit, with the known delta or the new balances, so lookups never read
+    from the database again.
+
+    Args:
+        currencies: Balance fields of the economy, bank and wallet first
+
+    Note:
+        Only writes reported through add, set, put, discard and clear are seen,
+        the index is not updated by other processes writing to the same database.
+    """
+
+    def __init__(self, currencies: typing.Sequence[str]):
+        self.__columns = {currency: index for index, currency in enumerate(currencies)}
+        self.__balances: typing.Dict[int, typing.Dict[UserId, list]] = {}
+        self.__values: typing.Dict[int, typing.Dict[str, SortedList]] = {}
+        self.__pending: typing.Dict[int, list] = {}
+        self.__locks: typing.Dict[int, asyncio.Lock] = {}
+
+    def loaded(self, guild_id: int) -> bool:
+        """
+        Check whether the balances of a guild are loaded.
+
+        Returns:
+            bool: True if lookups of the guild are served from memory
+        """
+        return guild_id in self.__balances
+
+    async def load(
+        self,
+        guild_id: int,
+        load_all: typing.Callable[[], typing.Awaitable[typing.Iterable[Row]]],
+    ) -> None:
+        """
+        Load the balances of a guild unless they are loaded already.
+
+        Args:
+            guild_id: Guild to load
+            load_all: Returns (user_id, *balances in currency order) rows of
+                      every user of the guild
+
+        Note:
+            put and discard calls made while the rows are read are replayed on
+            top of them. add and set are deltas of the loaded balances and are
+            ignored until the load finishes, so writes using them must not
+            commit while load_all runs.
+        """
+        lock = self.__locks.setdefault(guild_id, asyncio.Lock())
+
+        async with lock:
+            while guild_id not in self.__balances:
+                pending = self.__pending[guild_id] = []
+                rows = await load_all()
+
+                # A clear() while loading dropped the pending list, the rows may be outdated
+                if self.__pending.get(guild_id) is not pending:
+                    continue
+
+                del self.__pending[guild_id]
+                self.__balances[guild_id] = {
+                    row[0]: [value or 0 for value in row[1:]] for row in rows
+                }
+                self.__values[guild_id] = {}
+
+                for update, args in pending:
+                    update(guild_id, *args)
+
+    def add(
+        self,
+        guild_id: int,
+        user_id: UserId,
+        field: str,
+        amount: Number,
+        minimum: typing.Optional[Number] = None,
+    ) -> None:
+        """
+        Apply a committed change of a balance by a known delta.
+
+        Args:
+            guild_id: Guild the user belongs to
+            user_id: User ID as stored by the economy
+            field: Currency that changed
+            amount: Delta added to the balance, negative for removals
+            minimum: Lower bound the new balance is clamped to, None for no bound
+
+        Note:
+            A user missing from a loaded guild is added with zero balances
+            first, like the upserts of the economy create them.
+        """
+        balances = self.__balances.get(guild_id)
+        if balances is None:
+            return
+
+        values = list(balances.get(user_id) or self.__zeros())
+        column = self.__columns[field]
+        values[column] += amount
+        if minimum is not None:
+            values[column] = max(minimum, values[column])
+
+        self.__move(guild_id, user_id, values)
+
+    def set(self, guild_id: int, user_id: UserId, field: str, value: Number) -> None:
+        """
+        Apply a committed balance set to an absolute value.
+
+        Args:
+            guild_id: Guild the user belongs to
+            user_id: User ID as stored by the economy
+            field: Currency that changed
+            value: New balance
+        """
+        balances = self.__balances.get(guild_id)
+        if balances is None:
+            return
+
+        values = list(balances.get(user_id) or self.__zeros())
+        values[self.__columns[field]] = value
+        self.__move(guild_id, user_id, values)
+
+    def put(self, guild_id: int, user_id: UserId, values: typing.Sequence[Number]) -> None:
+        """
+        Replace every balance of a user with the values read after a write.
+
+        Args:
+            guild_id: Guild the user belongs to
+            user_id: User ID as stored by the economy
+            values: Balances in currency order
+        """
+        if guild_id in self.__pending:
+            self.__pending[guild_id].append((self.put, (user_id, values)))
+        elif guild_id in self.__balances:
+            self.__move(guild_id, user_id, [value or 0 for value in values])
+
+    def discard(self, guild_id: int, user_id: UserId) -> None:
+        """
+        Remove a deleted user.
+
+        Args:
+            guild_id: Guild the user belonged to
+            user_id: User ID as stored by the economy
+        """
+        if guild_id in self.__pending:
+            self.__pending[guild_id].append((self.discard, (user_id,)))
+        elif guild_id in self.__balances:
+            self.__move(guild_id, user_id, None)
+
+    def clear(self, guild_id: int) -> None:
+        """
+        Drop the balances of a guild, they are reloaded on next use.
+
+        Args:
+            guild_id: Guild to drop
+        """
+        self.__balances.pop(guild_id, None)
+        self.__values.pop(guild_id, None)
+        self.__pending.pop(guild_id, None)
+
+    def value(self, guild_id: int, field: str, user_id: UserId) -> typing.Optional[Number]:
+        """
+        Look up the indexed balance of a user in a loaded guild.
+
+        Returns:
+            float | int | None: Balance, None if the user doesn't exist
+        """
+        values = self.__balances[guild_id].get(user_id)
+        return None if values is None else self.__field_value(values, field)
+
+    def count_above(self, guild_id: int, field: str, value: Number) -> int:
+        """
+        Count the users of a loaded guild whose balance is strictly greater than value.
+
+        Returns:
+            int: Number of users above value
+        """
+        values = self.__sorted(guild_id, field)
+        return len(values) - values.bisect_right(value)
+
+    def count(self, guild_id: int) -> int:
+        """
+        Count the users of a loaded guild.
+
+        Returns:
+            int: Number of users
+        """
+        return len(self.__balances[guild_id])
+
+    def __zeros(self) -> typing.List[int]:
+        return [0] * len(self.__columns)
+
+    def __field_value(self, values: typing.Sequence[Number], field: str) -> Number:
+        if field == _TOTAL_FIELD:
+            return values[0] + values[1]
+        return values[self.__columns[field]]
+
+    def __sorted(self, guild_id: int, field: str) -> SortedList:
+        """
+        Return the sorted values of a field, built from the balances on first use.
+        """
+        fields = self.__values[guild_id]
+
+        if field not in fields:
+            fields[field] = SortedList(
+                self.__field_value(values, field)
+                for values in self.__balances[guild_id].values()
+            )
+
+        return fields[field]
+
+    def __move(self, guild_id: int, user_id: UserId, values: typing.Optional[list]) -> None:
+        """
+        Replace the balances of a user, None removes them, and re-sort the built fields.
+        """
+        balances = self.__balances[guild_id]
+        old = balances.pop(user_id, None)
+        if values is not None:
+            balances[user_id] = values
+
+        for field, sorted_values in self.__values[guild_id].items():
+            old_value = None if old is None else self.__field_value(old, field)
+            new_value = None if values is None else self.__field_value(values, field)
+
+            if old is not None and values is not None and old_value == new_value:
+                continue
+            if old is not None:
+                sorted_values.remove(old_value)
+            if values is not None:
+                sorted_values.add(new_value)
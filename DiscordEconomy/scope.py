@@ -0,0 +1,71 @@
+import functools
+import typing
+
+__all__ = ["GuildScope"]
+
+# Economy methods taking a guild_id keyword argument
+SCOPED_METHODS = frozenset({
+    "ensure_registered",
+    "get_user",
+    "get_balance",
+    "get_items",
+    "delete_user_account",
+    "get_all_users",
+    "export_balances",
+    "stats",
+    "get_rank",
+    "count_above",
+    "export_to",
+    "import_from",
+    "get_leaderboard",
+    "add_money",
+    "remove_money",
+    "set_money",
+    "withdraw",
+    "bulk_add_money",
+    "bulk_remove_money",
+    "bulk_set_money",
+    "transfer",
+    "purchase",
+    "add_item",
+    "remove_item",
+    "get_item_count",
+    "has_item",
+    "has_items",
+    "wipe_guild",
+})
+
+
+class GuildScope:
+    """
+    View of an economy restricted to the users of one guild.
+
+    Every economy method is available with the same arguments, guild_id is
+    filled in automatically. The view holds no connections or cache of its own,
+    so creating one per command is cheap.
+
+    Attributes:
+        economy: Economy the calls are forwarded to
+        guild_id (int): Guild every call is scoped to
+
+    Example:
+        >> guild = economy.scope(ctx.guild.id)
+        >> await guild.add_money(ctx.author.id, "wallet", 100)
+        >> top = await guild.get_leaderboard("bank")
+    """
+
+    def __init__(self, economy: typing.Any, guild_id: int):
+        self.economy = economy
+        self.guild_id = guild_id
+
+    def __getattr__(self, name: str) -> typing.Callable:
+        if name not in SCOPED_METHODS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+        method = functools.partial(getattr(self.economy, name), guild_id=self.guild_id)
+        # Later lookups find the bound method directly and skip __getattr__
+        setattr(self, name, method)
+        return method
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(economy={self.economy!r}, guild_id={self.guild_id!r})"
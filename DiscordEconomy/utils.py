@@ -0,0 +1,182 @@
+import math
+import re
+import typing
+
+from .constants import CURRENCY_NAME_PATTERN, DEFAULT_CURRENCIES, RESERVED_FIELDS
+
+T = typing.TypeVar("T")
+
+
+def resolve_currencies(
+    currencies: typing.Optional[typing.Iterable[str]],
+) -> typing.Tuple[str, ...]:
+    """
+    Build the ordered list of balance fields of an economy.
+
+    Args:
+        currencies: Requested currencies, bank and wallet are always included
+
+    Returns:
+        tuple: bank, wallet and the remaining currencies in the given order
+
+    Raises:
+        ValueError: If a currency name is not an identifier, is reserved or only
+                    differs in case from another currency
+    """
+    fields = list(DEFAULT_CURRENCIES)
+
+    for currency in currencies or ():
+        if not isinstance(currency, str) or not re.fullmatch(CURRENCY_NAME_PATTERN, currency):
+            raise ValueError(
+                f"Invalid currency: {currency!r}. Names must be identifiers"
+            )
+
+        if currency.lower() in RESERVED_FIELDS:
+            raise ValueError(f"Invalid currency: {currency}. The name is reserved")
+
+        if currency in fields:
+            continue
+
+        # Column names are case-insensitive in SQLite
+        if currency.lower() in (field.lower() for field in fields):
+            raise ValueError(
+                f"Invalid currency: {currency}. The name clashes with another currency"
+            )
+
+        fields.append(currency)
+
+    return tuple(fields)
+
+
+def resolve_percentiles(percentiles: typing.Iterable[float]) -> typing.Tuple[float, ...]:
+    """
+    Validate requested percentiles.
+
+    Args:
+        percentiles: Percentiles between 0 and 100
+
+    Returns:
+        tuple: The percentiles in the given order
+
+    Raises:
+        ValueError: If a percentile is outside 0-100
+    """
+    percentiles = tuple(percentiles)
+
+    for percentile in percentiles:
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"Invalid percentile: {percentile}. Must be between 0 and 100")
+
+    return percentiles
+
+
+def resolve_buckets(
+    buckets: typing.Union[int, typing.Iterable[float], None],
+) -> typing.Union[int, typing.Tuple[float, ...]]:
+    """
+    Validate a requested histogram.
+
+    Args:
+        buckets: Number of equal-width buckets, or ascending upper bounds of the buckets
+
+    Returns:
+        int | tuple: The number of buckets, or the upper bounds, empty if None
+
+    Raises:
+        ValueError: If the number is lower than 1 or the bounds are not ascending
+    """
+    if buckets is None:
+        return ()
+
+    if isinstance(buckets, bool):
+        raise ValueError(f"Invalid buckets: {buckets!r}")
+
+    if isinstance(buckets, int):
+        if buckets < 1:
+            raise ValueError(f"Invalid buckets: {buckets}. Must be greater than 0")
+        return buckets
+
+    bounds = tuple(buckets)
+
+    if any(low >= high for low, high in zip(bounds, bounds[1:])):
+        raise ValueError(f"Invalid buckets: {bounds}. Bounds must be ascending")
+
+    return bounds
+
+
+def bucket_bounds(
+    buckets: typing.Union[int, typing.Tuple[float, ...]],
+    low: typing.Optional[float],
+    high: typing.Optional[float],
+) -> typing.Tuple[float, ...]:
+    """
+    Find the upper bounds of the histogram buckets of a field.
+
+    Args:
+        buckets: Result of resolve_buckets
+        low: Smallest balance of the field, None if there are no users
+        high: Largest balance of the field, None if there are no users
+
+    Returns:
+        tuple: Ascending upper bounds, a number of buckets spans low to high in
+               equal widths and collapses to one bucket when they are equal
+    """
+    if not isinstance(buckets, int):
+        return buckets
+
+    if low is None:
+        return ()
+
+    width = (high - low) / buckets
+    bounds = (low + width * index for index in range(1, buckets))
+    return (*dict.fromkeys(bound for bound in bounds if bound < high), high)
+
+
+def percentile_rank(percentile: float, count: int) -> int:
+    """
+    Find the position of a nearest-rank percentile among sorted values.
+
+    Args:
+        percentile: Percentile between 0 and 100
+        count: Number of values
+
+    Returns:
+        int: Zero-based index of the percentile's value in ascending order
+    """
+    return max(math.ceil(percentile / 100 * count) - 1, 0)
+
+
+async def iterate_chunks(
+    iterable: typing.Union[typing.Iterable[T], typing.AsyncIterable[T]],
+    chunk_size: int,
+) -> typing.AsyncGenerator[typing.List[T], None]:
+    """
+    Split a synchronous or asynchronous iterable into lists of at most chunk_size elements.
+
+    Args:
+        iterable: Iterable or async iterable to consume lazily
+        chunk_size: Maximum number of elements per chunk
+
+    Yields:
+        list: Consecutive chunks, only the last one may be shorter
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be greater than 0")
+
+    chunk = []
+
+    if hasattr(iterable, "__aiter__"):
+        async for element in iterable:
+            chunk.append(element)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    else:
+        for element in iterable:
+            chunk.append(element)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+    if chunk:
+        yield chunk
@@ -0,0 +1,330 @@
+"""
+Benchmark runner for the DiscordEconomy backends.
+
+Seeds a database with a reproducible population, replays a generated command
+trace with a number of concurrent workers and prints a JSON report with
+throughput and latency percentiles per method.
+
+Usage:
+    python -m benchmarks.run --backend sqlite --workload read-heavy
+    python -m benchmarks.run --backend mongodb --mongo-url mongodb://localhost:27017
+    python -m benchmarks.run --backend mongomock  # requires mongomock-motor
+"""
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import typing
+from unittest import mock
+
+from DiscordEconomy.exceptions import DiscordEconomyException
+
+from .workload import WORKLOADS, WorkloadGenerator
+
+
+def percentile(sorted_values: typing.List[float], fraction: float) -> float:
+    """
+    Return the nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile between 0 and 1
+
+    Returns:
+        float: Selected value, 0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(
+    latencies: typing.List[float],
+    errors: int,
+    duration: float,
+    failures: typing.Optional[typing.Dict[str, int]] = None,
+) -> dict:
+    """
+    Build the report entry of one method.
+
+    Args:
+        latencies: Call durations in seconds
+        errors: Number of calls rejected with a DiscordEconomyException
+        duration: Wall time of the whole phase in seconds
+        failures: Number of calls that raised any other exception, by exception name
+
+    Returns:
+        dict: Counts, throughput and latency percentiles in milliseconds
+    """
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    return {
+        "count": count,
+        "errors": errors,
+        "failures": dict(sorted((failures or {}).items())),
+        "ops_per_sec": round(count / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 4) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if count else 0.0,
+    }
+
+
+@contextlib.asynccontextmanager
+async def open_economy(args: argparse.Namespace) -> typing.AsyncIterator[typing.Any]:
+    """
+    Create the economy under test and remove its data afterwards.
+
+    Args:
+        args: Parsed command line arguments
+
+    Yields:
+        Economy: SQLite or MongoDB economy instance
+    """
+    options = {}
+    if args.cache_size:
+        options["cache_size"] = args.cache_size
+
+    if args.backend == "sqlite":
+        from DiscordEconomy.Sqlite import Economy
+
+        if args.shards:
+            from DiscordEconomy.ShardedSqlite import Economy
+
+            options["shards"] = args.shards
+        if args.commit_interval_ms:
+            options["commit_interval_ms"] = args.commit_interval_ms
+        if args.pool_size:
+            options["pool_size"] = args.pool_size
+
+        directory = tempfile.mkdtemp(prefix="discord_economy_bench_")
+        try:
+            async with Economy(os.path.join(directory, "economy.db"), **options) as economy:
+                yield economy
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        return
+
+    from DiscordEconomy.MongoDB import Economy
+
+    database_name = f"discord_economy_bench_{args.seed}"
+    patcher = contextlib.nullcontext()
+
+    if args.backend == "mongomock":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("The mongomock backend requires: pip install mongomock-motor")
+
+        patcher = mock.patch(
+            "DiscordEconomy.MongoDB.motor_asyncio.AsyncIOMotorClient", AsyncMongoMockClient
+        )
+
+    with patcher:
+        economy = Economy(args.mongo_url, database_name=database_name, **options)
+
+    try:
+        async with economy:
+            yield economy
+    finally:
+        client = economy._Economy__client
+        with contextlib.suppress(Exception):
+            await client.drop_database(database_name)
+        client.close()
+
+
+async def seed(economy: typing.Any, generator: WorkloadGenerator, concurrency: int) -> float:
+    """
+    Insert the generated population.
+
+    Args:
+        economy: Economy under test
+        generator: Workload generator
+        concurrency: Number of concurrent add_item calls
+
+    Returns:
+        float: Seeding duration in seconds
+    """
+    started = time.perf_counter()
+    users = list(generator.seed_users())
+
+    await economy.bulk_set_money((user.id, "bank", user.bank) for user in users)
+    await economy.bulk_set_money((user.id, "wallet", user.wallet) for user in users)
+
+    items = [(user.id, name) for user in users for name in user.items]
+    for start in range(0, len(items), concurrency):
+        await asyncio.gather(
+            *(economy.add_item(*item) for item in items[start:start + concurrency])
+        )
+
+    return time.perf_counter() - started
+
+
+async def replay(
+    economy: typing.Any, operations: typing.Iterator, concurrency: int
+) -> typing.Tuple[dict, float]:
+    """
+    Replay a command trace with concurrent workers.
+
+    Args:
+        economy: Economy under test
+        operations: Trace produced by WorkloadGenerator.trace
+        concurrency: Number of concurrent workers
+
+    Returns:
+        tuple: Per method (latencies, errors, failures by exception name) and the
+               wall time in seconds
+    """
+    results = {}
+
+    async def worker() -> None:
+        for operation in operations:
+            latencies, errors, failures = results.setdefault(operation.method, ([], [0], {}))
+            method = getattr(economy, operation.method)
+
+            started = time.perf_counter()
+            try:
+                await method(*operation.args)
+            except DiscordEconomyException:
+                errors[0] += 1
+            except Exception as e:
+                # Driver errors, such as a transfer on a MongoDB server without
+                # transactions, are reported instead of ending the run
+                name = type(e).__name__
+                failures[name] = failures.get(name, 0) + 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return results, time.perf_counter() - started
+
+
+async def scan(economy: typing.Any) -> typing.Tuple[int, float]:
+    """
+    Time a full get_all_users pass.
+
+    Args:
+        economy: Economy under test
+
+    Returns:
+        tuple: Number of users read and duration in seconds
+    """
+    started = time.perf_counter()
+    count = 0
+
+    async for _ in economy.get_all_users():
+        count += 1
+
+    return count, time.perf_counter() - started
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    """
+    Run a complete benchmark and build its report.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        dict: JSON serializable report
+    """
+    generator = WorkloadGenerator(args.seed, args.users, args.distribution, args.zipf_s)
+
+    async with open_economy(args) as economy:
+        seed_duration = await seed(economy, generator, args.concurrency)
+        results, duration = await replay(
+            economy, generator.trace(args.workload, args.operations), args.concurrency
+        )
+
+        methods = {
+            name: summarize(latencies, errors[0], duration, failures)
+            for name, (latencies, errors, failures) in sorted(results.items())
+        }
+
+        if args.scan:
+            scanned, scan_duration = await scan(economy)
+            methods["get_all_users"] = summarize([scan_duration], 0, scan_duration)
+            methods["get_all_users"]["rows"] = scanned
+
+        pool = None
+        if hasattr(economy, "pool_stats"):
+            pool = dataclasses.asdict(economy.pool_stats())
+            pool["wait_histogram"] = {
+                str(bound): count for bound, count in pool["wait_histogram"].items()
+            }
+
+    return {
+        "backend": args.backend,
+        "workload": args.workload,
+        "distribution": args.distribution,
+        "seed": args.seed,
+        "users": args.users,
+        "operations": args.operations,
+        "concurrency": args.concurrency,
+        "options": {
+            "cache_size": args.cache_size,
+            "commit_interval_ms": args.commit_interval_ms,
+            "pool_size": args.pool_size,
+            "shards": args.shards,
+        },
+        "seed_duration_s": round(seed_duration, 4),
+        "duration_s": round(duration, 4),
+        "ops_per_sec": round(args.operations / duration, 2) if duration else 0.0,
+        "methods": methods,
+        "pool": pool,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def parse_args(argv: typing.Optional[typing.List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark DiscordEconomy backends")
+    parser.add_argument("--backend", choices=["sqlite", "mongodb", "mongomock"], default="sqlite")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--distribution", choices=["uniform", "zipf"], default="uniform")
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--operations", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--cache-size", type=int, default=None)
+    parser.add_argument("--commit-interval-ms", type=int, default=None)
+    parser.add_argument("--pool-size", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument("--no-scan", dest="scan", action="store_false")
+    parser.add_argument(
+        "--mongo-url",
+        default=os.getenv("MONGODB_TEST_URL", "mongodb://localhost:27017"),
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(benchmark(args))
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import bisect
+import itertools
+import random
+import typing
+from dataclasses import dataclass
+
+__all__ = ["SeedUser", "Operation", "WORKLOADS", "WorkloadGenerator"]
+
+# Relative weights of each economy call per workload
+WORKLOADS = {
+    "read-heavy": {
+        "get_user": 80,
+        "get_leaderboard": 5,
+        "add_money": 10,
+        "remove_money": 5,
+    },
+    "write-heavy": {
+        "get_user": 10,
+        "add_money": 50,
+        "remove_money": 20,
+        "set_money": 5,
+        "add_item": 5,
+        "transfer": 10,
+    },
+    "mixed": {
+        "get_user": 45,
+        "get_leaderboard": 5,
+        "add_money": 25,
+        "remove_money": 10,
+        "add_item": 5,
+        "transfer": 10,
+    },
+}
+
+ITEM_NAMES = ["crystal", "fishing rod", "pickaxe", "sword", "dorayaki", "pancake", "ore", "fish"]
+FIELDS = ["bank", "wallet"]
+
+
+@dataclass
+class SeedUser:
+    """
+    User inserted before a benchmark run.
+    """
+    id: int
+    bank: int
+    wallet: int
+    items: typing.List[str]
+
+
+@dataclass
+class Operation:
+    """
+    Single economy call of a command trace.
+    """
+    method: str
+    args: tuple
+
+
+class WorkloadGenerator:
+    """
+    Reproducible generator of seed data and command traces.
+
+    Attributes:
+        seed (int): Seed of the random generator, equal seeds produce equal output
+        users (int): Number of users in the population
+        distribution (str): 'uniform' or 'zipf' selection of the user of each call
+        zipf_s (float): Exponent of the Zipf distribution, higher means hotter users
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        users: int = 10_000,
+        distribution: str = "uniform",
+        zipf_s: float = 1.1,
+    ):
+        if distribution not in ("uniform", "zipf"):
+            raise ValueError("Distribution must be 'uniform' or 'zipf'")
+
+        self.seed = seed
+        self.users = users
+        self.distribution = distribution
+        self.zipf_s = zipf_s
+
+        # Discord-like snowflakes, shuffled so hot users are spread over the id space
+        id_random = random.Random(seed)
+        self.user_ids = [10 ** 17 + i * 7919 for i in range(users)]
+        id_random.shuffle(self.user_ids)
+
+        self.__zipf_cumulative = None
+        if distribution == "zipf":
+            weights = (1 / (rank ** zipf_s) for rank in range(1, users + 1))
+            self.__zipf_cumulative = list(itertools.accumulate(weights))
+
+    def seed_users(self, max_items: int = 3) -> typing.Iterator[SeedUser]:
+        """
+        Generate the initial population.
+
+        Args:
+            max_items: Maximum number of items per user
+
+        Yields:
+            SeedUser: Users with random balances and items
+        """
+        rng = random.Random(self.seed + 1)
+
+        for user_id in self.user_ids:
+            yield SeedUser(
+                user_id,
+                rng.randint(0, 100_000),
+                rng.randint(0, 10_000),
+                rng.sample(ITEM_NAMES, rng.randint(0, max_items)),
+            )
+
+    def trace(self, workload: str, operations: int) -> typing.Iterator[Operation]:
+        """
+        Generate a command trace.
+
+        Args:
+            workload: Name of a mix defined in WORKLOADS
+            operations: Number of calls to generate
+
+        Yields:
+            Operation: Economy method name and its arguments
+        """
+        if workload not in WORKLOADS:
+            raise ValueError(
+                f"Invalid workload: {workload}. Must be one of: {', '.join(WORKLOADS)}"
+            )
+
+        rng = random.Random(self.seed + 2)
+        methods = list(WORKLOADS[workload])
+        cumulative = list(itertools.accumulate(WORKLOADS[workload].values()))
+
+        for _ in range(operations):
+            method = methods[bisect.bisect_left(cumulative, rng.random() * cumulative[-1])]
+            yield Operation(method, self.__arguments(method, rng))
+
+    def pick_user(self, rng: random.Random) -> int:
+        """
+        Select the user of a call according to the configured distribution.
+
+        Args:
+            rng: Random generator of the trace
+
+        Returns:
+            int: User id
+        """
+        if self.__zipf_cumulative is None:
+            return self.user_ids[rng.randrange(self.users)]
+
+        position = rng.random() * self.__zipf_cumulative[-1]
+        return self.user_ids[bisect.bisect_left(self.__zipf_cumulative, position)]
+
+    def __arguments(self, method: str, rng: random.Random) -> tuple:
+        if method == "get_user":
+            return (self.pick_user(rng),)
+
+        if method == "get_leaderboard":
+            return (rng.choice(["bank", "wallet", "bank+wallet"]), 10)
+
+        if method in ("add_money", "remove_money", "set_money"):
+            return self.pick_user(rng), rng.choice(FIELDS), rng.randint(1, 500)
+
+        if method == "add_item":
+            return self.pick_user(rng), rng.choice(ITEM_NAMES)
+
+        if method == "transfer":
+            return (
+                self.pick_user(rng),
+                rng.choice(FIELDS),
+                self.pick_user(rng),
+                rng.choice(FIELDS),
+                rng.randint(1, 200),
+            )
+
+        raise ValueError(f"Unknown method: {method}")
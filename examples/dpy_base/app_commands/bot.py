@@ -6,6 +6,7 @@ import discord
 from discord import app_commands
 
 from DiscordEconomy.Sqlite import Economy
+from DiscordEconomy.exceptions import InsufficientFundsException
 
 # or if you want to use mongodb
 # from DiscordEconomy.MongoDB import Economy
@@ -130,9 +131,7 @@ class Shop(app_commands.Group):
             if item[0] == _item:
                 _cache.append(item[0])
 
-                r = await economy.get_user(interaction.user.id)
-
-                if item[0] in [item.name for item in r.items]:
+                if await economy.has_item(interaction.user.id, item[0]):
                     embed.add_field(name="Error", value=f"You already have that item!")
                     embed.set_footer(text=f"Invoked by {interaction.user.name}",
                                      icon_url=interaction.user.avatar.url)
@@ -140,9 +139,9 @@ class Shop(app_commands.Group):
 
                     return
 
-                if r.bank >= item[1]["price"]:
-                    await economy.add_item(interaction.user.id, item[0])
-                    await economy.remove_money(interaction.user.id, "bank", item[1]["price"])
+                result = await economy.purchase(interaction.user.id, "bank", item[1]["price"], item[0])
+
+                if result.success:
 
                     embed.add_field(name="Success", value=f"Successfully bought **{item[0]}**!")
                     embed.set_footer(text=f"Invoked by {interaction.user.name}",
@@ -164,15 +163,13 @@ class Shop(app_commands.Group):
     @app_commands.command(description="Sell an item from your inventory!")
     @is_registered()
     async def sell(self, interaction: discord.Interaction, *, item: str):
-        r = await economy.get_user(interaction.user.id)
-
         _item = item.lower()
 
         embed = discord.Embed(
             colour=discord.Color.from_rgb(244, 182, 89)
         )
 
-        if _item in [item.name for item in r.items]:
+        if await economy.has_item(interaction.user.id, _item):
             for item in items_list["Items"].items():
                 if item[0] == _item:
                     item_prc = item[1]["price"] / 2
@@ -258,7 +255,7 @@ async def coinflip(interaction: discord.Interaction, money: int, side: str):
     side = side.lower()
     random_arg = random.choice(["tails", "heads"])
 
-    r = await economy.get_user(interaction.user.id)
+    r = await economy.get_balance(interaction.user.id)
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
@@ -299,7 +296,7 @@ async def slots(interaction: discord.Interaction, money: int):
         if i == len(random_slots_data):
             break
 
-    r = await economy.get_user(interaction.user.id)
+    r = await economy.get_balance(interaction.user.id)
 
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
@@ -333,22 +330,19 @@ async def slots(interaction: discord.Interaction, money: int):
 @tree.command(guild=TEST_GUILD, description="Withdraw money from your account.")
 @is_registered()
 async def withdraw(interaction: discord.Interaction, money: int):
-    r = await economy.get_user(interaction.user.id)
-
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
 
-    if r.bank >= money:
-        await economy.add_money(interaction.user.id, "wallet", money)
-        await economy.remove_money(interaction.user.id, "bank", money)
+    try:
+        await economy.transfer(interaction.user.id, "bank", interaction.user.id, "wallet", money)
 
         embed.add_field(name="Withdraw", value=f"Successfully withdrawn {money} money!")
         embed.set_footer(text=f"Invoked by {interaction.user.name}",
                          icon_url=interaction.user.avatar.url)
         await interaction.response.send_message(embed=embed)
 
-    else:
+    except InsufficientFundsException:
 
         embed.add_field(name="Withdraw", value=f"You don't have enough money to withdraw!")
         embed.set_footer(text=f"Invoked by {interaction.user.name}",
@@ -359,21 +353,18 @@ async def withdraw(interaction: discord.Interaction, money: int):
 @tree.command(guild=TEST_GUILD, description="Deposit to your account.")
 @is_registered()
 async def deposit(interaction: discord.Interaction, money: int):
-    r = await economy.get_user(interaction.user.id)
-
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
 
-    if not r.wallet >= money:
+    try:
+        await economy.transfer(interaction.user.id, "wallet", interaction.user.id, "bank", money)
+    except InsufficientFundsException:
         embed.add_field(name="Deposit", value=f"You don't have enough money to deposit!")
         embed.set_footer(text=f"Invoked by {interaction.user.name}",
                          icon_url=interaction.user.avatar.url)
         return await interaction.response.send_message(embed=embed)
 
-    await economy.add_money(interaction.user.id, "bank", money)
-    await economy.remove_money(interaction.user.id, "wallet", money)
-
     embed.add_field(name="Deposit", value=f"Successfully deposited {money} money!")
     embed.set_footer(text=f"Invoked by {interaction.user.name}",
                      icon_url=interaction.user.avatar.url)
@@ -383,7 +374,7 @@ async def deposit(interaction: discord.Interaction, money: int):
 @tree.command(guild=TEST_GUILD, description="Play some horse racing.")
 @is_registered()
 async def horse_racing(interaction: discord.Interaction, money: int):
-    user = await economy.get_user(interaction.user.id)
+    user = await economy.get_balance(interaction.user.id)
 
     if not user.bank >= money:
         return await interaction.response.send_message(content="You don't have enough money to play.")
@@ -10,6 +10,7 @@ import discord
 from discord.ext import commands
 
 from DiscordEconomy.Sqlite import Economy
+from DiscordEconomy.exceptions import InsufficientFundsException
 # or if you want to use mongodb
 # from DiscordEconomy.MongoDB import Economy
 
@@ -127,7 +128,7 @@ async def coinflip(ctx: commands.Context, money: int, arg: str):
     arg = arg.lower()
     random_arg = random.choice(["tails", "heads"])
     multi_money = money * 2
-    r = await economy.get_user(ctx.message.author.id)
+    r = await economy.get_balance(ctx.message.author.id)
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
@@ -164,7 +165,7 @@ async def slots(ctx: commands.Context, money: int):
         i += 1
         if i == len(random_slots_data):
             break
-    r = await economy.get_user(ctx.message.author.id)
+    r = await economy.get_balance(ctx.message.author.id)
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
@@ -193,20 +194,18 @@ async def slots(ctx: commands.Context, money: int):
 @client.command()
 @is_registered
 async def withdraw(ctx: commands.Context, money: int):
-    r = await economy.get_user(ctx.message.author.id)
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
 
-    if r.bank >= money:
-        await economy.add_money(ctx.message.author.id, "wallet", money)
-        await economy.remove_money(ctx.message.author.id, "bank", money)
+    try:
+        await economy.transfer(ctx.message.author.id, "bank", ctx.message.author.id, "wallet", money)
 
         embed.add_field(name="Withdraw", value=f"Successfully withdrawn {money} money!")
         embed.set_footer(text=f"Invoked by {ctx.message.author.name}", icon_url=ctx.message.author.avatar.url)
         await ctx.send(embed=embed)
 
-    else:
+    except InsufficientFundsException:
 
         embed.add_field(name="Withdraw", value=f"You don't have enough money to withdraw!")
         embed.set_footer(text=f"Invoked by {ctx.message.author.name}", icon_url=ctx.message.author.avatar.url)
@@ -216,20 +215,18 @@ async def withdraw(ctx: commands.Context, money: int):
 @client.command()
 @is_registered
 async def deposit(ctx: commands.Context, money: int):
-    r = await economy.get_user(ctx.message.author.id)
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
 
-    if r.wallet >= money:
-        await economy.add_money(ctx.message.author.id, "bank", money)
-        await economy.remove_money(ctx.message.author.id, "wallet", money)
+    try:
+        await economy.transfer(ctx.message.author.id, "wallet", ctx.message.author.id, "bank", money)
 
         embed.add_field(name="Deposit", value=f"Successfully deposited {money} money!")
         embed.set_footer(text=f"Invoked by {ctx.message.author.name}", icon_url=ctx.message.author.avatar.url)
         await ctx.send(embed=embed)
 
-    else:
+    except InsufficientFundsException:
 
         embed.add_field(name="Deposit", value=f"You don't have enough money to deposit!")
         embed.set_footer(text=f"Invoked by {ctx.message.author.name}", icon_url=ctx.message.author.avatar.url)
@@ -283,18 +280,16 @@ async def buy(ctx: commands.Context, *, _item: str):
         if item[0] == _item:
             _cache.append(item[0])
 
-            r = await economy.get_user(ctx.message.author.id)
-
-            if item[0] in [item.name for item in r.items]:
+            if await economy.has_item(ctx.message.author.id, item[0]):
                 embed.add_field(name="Error", value=f"You already have that item!")
                 embed.set_footer(text=f"Invoked by {ctx.message.author.name}", icon_url=ctx.message.author.avatar.url)
                 await ctx.send(embed=embed)
 
                 return
 
-            if r.bank >= item[1]["price"]:
-                await economy.add_item(ctx.message.author.id, item[0])
-                await economy.remove_money(ctx.message.author.id, "bank", item[1]["price"])
+            result = await economy.purchase(ctx.message.author.id, "bank", item[1]["price"], item[0])
+
+            if result.success:
 
                 embed.add_field(name="Success", value=f"Successfully bought **{item[0]}**!")
                 embed.set_footer(text=f"Invoked by {ctx.message.author.name}",
@@ -317,15 +312,13 @@ async def buy(ctx: commands.Context, *, _item: str):
 @shop.command()
 @is_registered
 async def sell(ctx: commands.Context, *, _item: str):
-    r = await economy.get_user(ctx.message.author.id)
-
     _item = _item.lower()
 
     embed = discord.Embed(
         colour=discord.Color.from_rgb(244, 182, 89)
     )
 
-    if _item in [item.name for item in r.items]:
+    if await economy.has_item(ctx.message.author.id, _item):
         for item in items_list["Items"].items():
             if item[0] == _item:
                 item_prc = item[1]["price"] / 2
@@ -345,7 +338,7 @@ async def sell(ctx: commands.Context, *, _item: str):
 @client.command()
 @is_registered
 async def horse_racing(ctx: commands.Context, money: int):
-    user = await economy.get_user(ctx.author.id)
+    user = await economy.get_balance(ctx.author.id)
 
     if not user.bank >= money:
         return await ctx.send(content="You don't have enough money to play.")
@@ -24,6 +24,8 @@ setup(
         "Programming Language :: Python :: 3",
     ],
     keywords="discord, discord extension, discord.py, economy, economy bot, discord economy, DiscordEconomy",
-    packages=find_packages(),
-    install_requires=["aiosqlite", "aiohttp", "motor", "dnspython", "nest-asyncio", "aiosqlitepool"],
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
+    install_requires=["aiosqlite", "aiohttp", "motor", "dnspython", "nest-asyncio", "aiosqlitepool",
+                      "sortedcontainers"],
+    extras_require={"numpy": ["numpy"], "arrow": ["numpy", "pyarrow"]},
 )
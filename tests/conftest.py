@@ -1,4 +1,4 @@
-import asyncio
+import functools
 import pytest
 import os
 
@@ -6,21 +6,62 @@ from DiscordEconomy.Sqlite import Economy
 
 
 @pytest.fixture()
-def economy(monkeypatch, tmp_path):
+async def economy(tmp_path):
     db_file = tmp_path / "test_economy.db"
 
-    async def _noop():
-        return None
+    e = Economy(database_name=str(db_file), ensure_positive_balance=True)
+    await e.ensure_registered(0)
 
-    monkeypatch.setattr(
-        "DiscordEconomy.__version__.check_for_updates", _noop, raising=False
-    )
-    monkeypatch.setattr("DiscordEconomy.Sqlite.check_for_updates", _noop, raising=False)
+    yield e
 
-    e = Economy(database_name=str(db_file), ensure_positive_balance=True)
+    await e.close()
+
+
+@pytest.fixture()
+async def group_commit_economy(tmp_path):
+    db_file = tmp_path / "test_group_commit.db"
+
+    async with Economy(
+        database_name=str(db_file),
+        ensure_positive_balance=True,
+        commit_interval_ms=5,
+        max_batch=50,
+    ) as e:
+        yield e
+
+
+@pytest.fixture()
+async def cached_economy(tmp_path):
+    db_file = tmp_path / "test_cached.db"
+
+    e = await Economy.create(database_name=str(db_file), cache_size=100)
 
-    asyncio.get_event_loop().run_until_complete(e.ensure_registered(0))
-    return e
+    yield e
+
+    await e.close()
+
+
+@pytest.fixture()
+async def sharded_economy(tmp_path):
+    from DiscordEconomy.ShardedSqlite import Economy as ShardedEconomy
+
+    async with ShardedEconomy(database_name=str(tmp_path / "sharded.db"), shards=3) as e:
+        yield e
+
+
+@functools.lru_cache(maxsize=None)
+def _mongodb_available(mongo_url):
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    client = MongoClient(mongo_url, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
 
 
 @pytest.fixture()
@@ -44,6 +85,9 @@ async def mongodb_economy(monkeypatch):
     )
 
     mongo_url = os.getenv("MONGODB_TEST_URL", "mongodb://localhost:27017")
+    if not _mongodb_available(mongo_url):
+        pytest.skip(f"MongoDB is not reachable at {mongo_url}")
+
     test_db_name = "test_discord_economy"
     test_collection = "test_economy"
 
@@ -0,0 +1,50 @@
+from benchmarks.run import percentile, replay, summarize
+from benchmarks.workload import Operation, WorkloadGenerator
+from DiscordEconomy.exceptions import NotFoundException
+
+
+def test_workload_is_reproducible():
+    first = WorkloadGenerator(seed=7, users=100, distribution="zipf")
+    second = WorkloadGenerator(seed=7, users=100, distribution="zipf")
+
+    assert list(first.seed_users()) == list(second.seed_users())
+    assert list(first.trace("mixed", 500)) == list(second.trace("mixed", 500))
+
+
+def test_zipf_skews_towards_hot_users():
+    generator = WorkloadGenerator(seed=1, users=1000, distribution="zipf", zipf_s=1.2)
+    calls = [op.args[0] for op in generator.trace("read-heavy", 5000) if op.method == "get_user"]
+
+    hottest = generator.user_ids[0]
+    assert calls.count(hottest) > len(calls) / 20
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.99) == 0.0
+
+
+async def test_replay_counts_driver_errors():
+    class FakeEconomy:
+        async def get_user(self, user_id):
+            if user_id == 1:
+                raise NotFoundException("User not found")
+
+        async def transfer(self, *args):
+            raise RuntimeError("Transaction numbers are only allowed on a replica set")
+
+    operations = iter(
+        [Operation("get_user", (1,)), Operation("get_user", (2,))]
+        + [Operation("transfer", (1, "bank", 2, "bank", 5))] * 3
+    )
+    results, duration = await replay(FakeEconomy(), operations, concurrency=2)
+
+    latencies, errors, failures = results["get_user"]
+    assert (len(latencies), errors[0], failures) == (2, 1, {})
+
+    latencies, errors, failures = results["transfer"]
+    report = summarize(latencies, errors[0], duration, failures)
+    assert (report["count"], report["errors"], report["failures"]) == (3, 0, {"RuntimeError": 3})
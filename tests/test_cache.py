@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+
+from DiscordEconomy.cache import UserCache
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_lru_eviction_and_stats():
+    cache = UserCache(max_size=2)
+
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"  # 1 becomes most recently used
+
+    cache.put(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.stats().evictions == 1
+    assert cache.stats().size == 2
+
+
+async def test_ttl_expiry():
+    cache = UserCache(max_size=10, ttl=0.01)
+
+    cache.put(1, "a")
+    await asyncio.sleep(0.02)
+
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+async def test_single_flight_loading():
+    cache = UserCache(max_size=10)
+    calls = []
+
+    async def loader(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"user-{key}"
+
+    results = await asyncio.gather(*(cache.get_or_load(7, loader) for _ in range(5)))
+
+    assert results == ["user-7"] * 5
+    assert calls == [7]
+    assert cache.stats().misses == 1
+    assert cache.stats().hits == 4
+
+
+async def test_invalidate_during_load_is_not_cached():
+    cache = UserCache(max_size=10)
+
+    async def loader(key):
+        await asyncio.sleep(0.01)
+        return "stale"
+
+    load = asyncio.ensure_future(cache.get_or_load(1, loader))
+    await asyncio.sleep(0)
+    cache.invalidate(1)
+
+    assert await load == "stale"
+    assert cache.get(1) is None
+
+
+async def test_loader_errors_are_not_cached():
+    cache = UserCache(max_size=10)
+
+    async def loader(key):
+        raise KeyError(key)
+
+    with pytest.raises(KeyError):
+        await cache.get_or_load(1, loader)
+
+    assert len(cache) == 0
@@ -6,7 +6,7 @@ from DiscordEconomy.exceptions import (
     EnsurePositiveBalanceException,
     NegativeAmountException,
     NotFoundException,
-    ItemAlreadyExists,
+    NotEnoughItemsException,
 )
 
 
@@ -95,11 +95,14 @@ async def test_items_crud(mongodb_economy, user_id):
     names = [i.name for i in user.items]
     assert set(names) == {"sword", "potion"}
 
-    # Test adding duplicate item should raise ItemAlreadyExists
-    with pytest.raises(ItemAlreadyExists):
-        await mongodb_economy.add_item(user_id, "sword")
+    # Adding an owned item stacks it
+    await mongodb_economy.add_item(user_id, "sword", 2)
+    assert await mongodb_economy.get_item_count(user_id, "sword") == 3
 
-    await mongodb_economy.remove_item(user_id, "sword")
+    with pytest.raises(NotEnoughItemsException):
+        await mongodb_economy.remove_item(user_id, "sword", 4)
+
+    await mongodb_economy.remove_item(user_id, "sword", 3)
 
     user = await mongodb_economy.get_user(user_id)
     names = [i.name for i in user.items]
@@ -231,3 +234,22 @@ async def test_string_user_id(mongodb_economy):
     assert user.bank == 500
     assert len(user.items) == 1
     assert user.items[0].name == "shield"
+
+
+async def test_guild_scopes(mongodb_economy):
+    guild_a = mongodb_economy.scope(111)
+    guild_b = mongodb_economy.scope(222)
+
+    await guild_a.add_money(1, "bank", 100)
+    await guild_b.add_money(1, "bank", 5)
+    await guild_b.add_item(2, "sword")
+    await mongodb_economy.ensure_registered(1)
+
+    assert (await guild_a.get_user(1)).bank == 100
+    assert (await mongodb_economy.get_user(1)).bank == 0
+    assert [b.id for b in await guild_b.get_leaderboard("bank")] == [1, 2]
+    assert await guild_b.has_item(2, "sword")
+
+    assert await guild_b.wipe_guild() == 2
+    assert [u.id async for u in guild_b.get_all_users()] == []
+    assert (await guild_a.get_balance(1)).bank == 100
@@ -1,10 +1,15 @@
+import io
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
 from DiscordEconomy.MongoDB import Economy
+from DiscordEconomy.objects import ItemRow, UserRow
 from DiscordEconomy.exceptions import (
     NotFoundException,
-    ItemAlreadyExists,
+    NotEnoughItemsException,
     NegativeAmountException,
+    InsufficientFundsException,
 )
 
 
@@ -25,8 +30,12 @@ class TestMongoDBEconomyMocked:
 
             mock_db = MagicMock()
             mock_collection = AsyncMock()
+            mock_schema = AsyncMock()
+            mock_schema.find_one.return_value = None
             mock_instance.__getitem__.return_value = mock_db
-            mock_db.__getitem__.return_value = mock_collection
+            mock_db.__getitem__.side_effect = lambda name: (
+                mock_schema if name.endswith(".schema") else mock_collection
+            )
 
             yield mock_client, mock_instance, mock_collection
 
@@ -54,6 +63,27 @@ class TestMongoDBEconomyMocked:
 
         return economy, mock_collection
 
+    @pytest.fixture
+    def mock_cached_economy(self, mock_motor_client, monkeypatch):
+        """Create Economy instance with mocked MongoDB and the user cache enabled"""
+
+        async def _noop():
+            return None
+
+        monkeypatch.setattr(
+            "DiscordEconomy.MongoDB.check_for_updates", _noop, raising=False
+        )
+
+        mock_client, mock_instance, mock_collection = mock_motor_client
+
+        economy = Economy(
+            mongo_url="mongodb://mock:27017",
+            database_name="test_db",
+            cache_size=10,
+        )
+
+        return economy, mock_collection
+
     @pytest.mark.asyncio
     async def test_ensure_registered_new_user(self, mock_economy):
         """Test registering a new user"""
@@ -66,7 +96,7 @@ class TestMongoDBEconomyMocked:
 
         mock_collection.find_one.assert_called_once_with({"_id": 123})
         mock_collection.insert_one.assert_called_once_with(
-            {"_id": 123, "bank": 0, "wallet": 0, "items": []}
+            {"_id": 123, "guild_id": 0, "bank": 0, "wallet": 0, "total": 0, "items": {}}
         )
 
     @pytest.mark.asyncio
@@ -78,7 +108,7 @@ class TestMongoDBEconomyMocked:
             "_id": 123,
             "bank": 100,
             "wallet": 50,
-            "items": ["sword"],
+            "items": {"sword": 1},
         }
         mock_collection.insert_one = AsyncMock()
 
@@ -96,7 +126,7 @@ class TestMongoDBEconomyMocked:
             "_id": 123,
             "bank": 500,
             "wallet": 200,
-            "items": ["sword", "potion"],
+            "items": {"sword": 1, "potion": 1},
         }
         mock_collection.find_one.return_value = mock_user_data
 
@@ -124,24 +154,232 @@ class TestMongoDBEconomyMocked:
         """Test adding money with valid parameters"""
         economy, mock_collection = mock_economy
 
-        mock_collection.find_one.side_effect = [
-            None,
+        mock_collection.update_one = AsyncMock()
+
+        await economy.add_money(123, "wallet", 150)
+
+        mock_collection.find_one.assert_not_called()
+        mock_collection.update_one.assert_called_once_with(
+            {"_id": 123},
             {
-                "_id": 123,
-                "bank": 100,
-                "wallet": 50,
-                "items": [],
+                "$inc": {"wallet": 150, "total": 150},
+                "$setOnInsert": {"guild_id": 0, "bank": 0, "items": {}},
             },
-        ]
-        mock_collection.insert_one = AsyncMock()
+            upsert=True,
+        )
+
+    @pytest.mark.asyncio
+    async def test_remove_money_clamps_server_side(self, mock_economy):
+        """Test removing money uses a single pipeline update clamped at zero"""
+        economy, mock_collection = mock_economy
+
         mock_collection.update_one = AsyncMock()
 
-        await economy.add_money(123, "wallet", 150)
+        await economy.remove_money(123, "bank", 40)
+
+        mock_collection.find_one.assert_not_called()
+        mock_collection.update_one.assert_called_once_with(
+            {"_id": 123},
+            [
+                {
+                    "$set": {
+                        "bank": {
+                            "$max": [
+                                0,
+                                {"$subtract": [{"$ifNull": ["$bank", 0]}, 40]},
+                            ]
+                        },
+                        "guild_id": {"$ifNull": ["$guild_id", 0]},
+                        "wallet": {"$ifNull": ["$wallet", 0]},
+                        "items": {"$ifNull": ["$items", {}]},
+                    }
+                },
+                {"$set": {"total": {"$add": ["$bank", "$wallet"]}}},
+            ],
+            upsert=True,
+        )
+
+    @pytest.mark.asyncio
+    async def test_set_money_upserts(self, mock_economy):
+        """Test setting money is a single upsert"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.update_one = AsyncMock()
+
+        await economy.set_money(123, "bank", 75)
+
+        mock_collection.update_one.assert_called_once_with(
+            {"_id": 123},
+            [
+                {
+                    "$set": {
+                        "bank": 75,
+                        "guild_id": {"$ifNull": ["$guild_id", 0]},
+                        "wallet": {"$ifNull": ["$wallet", 0]},
+                        "items": {"$ifNull": ["$items", {}]},
+                    }
+                },
+                {"$set": {"total": {"$add": ["$bank", "$wallet"]}}},
+            ],
+            upsert=True,
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_leaderboard_uses_total_index(self, mock_economy):
+        """Test leaderboard sorts on the indexed total field with a projection"""
+        economy, mock_collection = mock_economy
+
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.skip.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(
+            return_value=[
+                {"_id": 1, "bank": 300, "wallet": 50},
+                {"_id": 2, "bank": 100, "wallet": 20},
+            ]
+        )
+        mock_collection.find = MagicMock(return_value=cursor)
+
+        top = await economy.get_leaderboard("bank+wallet", limit=2, offset=5)
+
+        mock_collection.find.assert_called_once_with({"guild_id": 0}, {"bank": 1, "wallet": 1})
+        cursor.sort.assert_called_once_with([("total", -1), ("_id", -1)])
+        cursor.skip.assert_called_once_with(5)
+        cursor.limit.assert_called_once_with(2)
+        assert [(b.id, b.bank, b.wallet) for b in top] == [(1, 300, 50), (2, 100, 20)]
+
+        with pytest.raises(ValueError):
+            await economy.get_leaderboard("items")
+
+    @pytest.mark.asyncio
+    async def test_bulk_add_money_unordered_upserts(self, mock_economy):
+        """Test bulk mutations are sent as unordered upserting bulk writes"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.bulk_write = AsyncMock(
+            return_value=MagicMock(modified_count=2, upserted_count=1)
+        )
+
+        result = await economy.bulk_add_money(
+            [(1, "wallet", 10), (2, "wallet", 20), (3, "bank", 30)]
+        )
+
+        mock_collection.bulk_write.assert_called_once()
+        requests = mock_collection.bulk_write.call_args.args[0]
+        assert mock_collection.bulk_write.call_args.kwargs == {"ordered": False}
+        assert requests[0] == UpdateOne(
+            {"_id": 1},
+            {
+                "$inc": {"wallet": 10, "total": 10},
+                "$setOnInsert": {"guild_id": 0, "bank": 0, "items": {}},
+            },
+            upsert=True,
+        )
+        assert result.operations == 3
+        assert result.changed == 3
+
+    @pytest.mark.asyncio
+    async def test_transfer_same_user_single_update(self, mock_economy):
+        """Test moving money between own fields is one guarded update"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.update_one = AsyncMock(
+            return_value=MagicMock(matched_count=1)
+        )
+
+        await economy.transfer(123, "bank", 123, "wallet", 50)
 
         mock_collection.update_one.assert_called_once_with(
-            {"_id": 123}, {"$set": {"wallet": 200}}
+            {"_id": 123, "bank": {"$gte": 50}},
+            {"$inc": {"bank": -50, "wallet": 50}},
         )
 
+        mock_collection.update_one.return_value = MagicMock(matched_count=0)
+
+        with pytest.raises(InsufficientFundsException):
+            await economy.transfer(123, "bank", 123, "wallet", 50)
+
+    @pytest.mark.asyncio
+    async def test_cached_get_user_invalidated_by_write(self, mock_cached_economy):
+        """Test cached users are served without queries until a write"""
+        economy, mock_collection = mock_cached_economy
+
+        mock_collection.find_one = AsyncMock(
+            return_value={"_id": 123, "bank": 5, "wallet": 0, "items": {}}
+        )
+        mock_collection.update_one = AsyncMock()
+
+        await economy.get_user(123)
+        await economy.get_user(123)
+        assert mock_collection.find_one.call_count == 1
+
+        await economy.add_money(123, "bank", 1)
+        await economy.get_user(123)
+        assert mock_collection.find_one.call_count == 2
+        assert economy.cache_stats().hits == 1
+
+    @pytest.mark.asyncio
+    async def test_indexes_created_once_on_first_use(self, mock_economy):
+        """Test construction does no I/O and indexes are built on first call"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.create_index.assert_not_called()
+        mock_collection.update_one = AsyncMock()
+
+        await economy.add_money(123, "wallet", 1)
+        await economy.add_money(123, "wallet", 1)
+
+        # total backfill, guild backfill and item list migration
+        assert mock_collection.update_many.call_count == 3
+        assert mock_collection.update_many.call_args_list[0].args == (
+            {"total": {"$exists": False}},
+            [{"$set": {"total": {"$add": ["$bank", "$wallet"]}}}],
+        )
+        assert mock_collection.update_many.call_args_list[1].args == (
+            {"guild_id": {"$exists": False}},
+            {"$set": {"guild_id": 0}},
+        )
+        assert mock_collection.update_many.call_args_list[2].args[0] == {
+            "items": {"$type": "array"}
+        }
+        assert mock_collection.create_index.call_count == 3
+        assert mock_collection.create_index.call_args_list[0].args == (
+            [("guild_id", 1), ("bank", -1), ("_id", -1)],
+        )
+
+        economy._Economy__schema.update_one.assert_called_once_with(
+            {"_id": "schema"},
+            {"$max": {"version": 1}, "$addToSet": {"currencies": {"$each": []}}},
+            upsert=True,
+        )
+
+    @pytest.mark.asyncio
+    async def test_migrated_collection_skips_backfills(self, mock_motor_client):
+        """Test a stored schema marker skips the backfills except for new currencies"""
+        mock_client, mock_instance, mock_collection = mock_motor_client
+
+        economy = Economy(
+            mongo_url="mongodb://mock:27017",
+            database_name="test_db",
+            currencies=["gems", "tokens"],
+        )
+        schema = economy._Economy__schema
+        schema.find_one.return_value = {"_id": "schema", "version": 1, "currencies": ["gems"]}
+        mock_collection.update_one = AsyncMock()
+
+        await economy.add_money(123, "wallet", 1)
+
+        assert [call.args for call in mock_collection.update_many.call_args_list] == [
+            ({"tokens": {"$exists": False}}, {"$set": {"tokens": 0}})
+        ]
+        schema.update_one.assert_called_once_with(
+            {"_id": "schema"},
+            {"$max": {"version": 1}, "$addToSet": {"currencies": {"$each": ["tokens"]}}},
+            upsert=True,
+        )
+        assert mock_collection.create_index.call_count == 5
+
     @pytest.mark.asyncio
     async def test_add_money_negative_amount(self, mock_economy):
         """Test adding negative amount raises exception"""
@@ -160,64 +398,58 @@ class TestMongoDBEconomyMocked:
 
     @pytest.mark.asyncio
     async def test_add_item_new(self, mock_economy):
-        """Test adding a new item"""
+        """Test adding an item increments its stack with an upsert"""
         economy, mock_collection = mock_economy
 
-        mock_collection.find_one.side_effect = [
-            {"_id": 123, "bank": 0, "wallet": 0, "items": []},
-            {"_id": 123, "bank": 0, "wallet": 0, "items": []},
-        ]
         mock_collection.update_one = AsyncMock()
 
         await economy.add_item(123, "sword")
 
         mock_collection.update_one.assert_called_once_with(
-            {"_id": 123}, {"$set": {"items": ["sword"]}}
+            {"_id": 123},
+            {
+                "$inc": {"items.sword": 1},
+                "$setOnInsert": {"guild_id": 0, "bank": 0, "wallet": 0, "total": 0},
+            },
+            upsert=True,
         )
 
     @pytest.mark.asyncio
-    async def test_add_item_duplicate(self, mock_economy):
-        """Test adding duplicate item raises exception"""
+    async def test_add_item_escapes_name(self, mock_economy):
+        """Test item names containing dots and dollars are escaped"""
         economy, mock_collection = mock_economy
 
-        mock_collection.find_one.side_effect = [
-            {
-                "_id": 123,
-                "bank": 0,
-                "wallet": 0,
-                "items": ["sword"],
-            },
-            {"_id": 123, "bank": 0, "wallet": 0, "items": ["sword"]},
-        ]
+        mock_collection.update_one = AsyncMock()
 
-        with pytest.raises(ItemAlreadyExists):
-            await economy.add_item(123, "sword")
+        await economy.add_item(123, "$mega.potion 50%", 3)
+
+        update = mock_collection.update_one.call_args.args[1]
+        assert update["$inc"] == {"items.%24mega%2Epotion 50%25": 3}
+
+    @pytest.mark.asyncio
+    async def test_add_item_invalid_quantity(self, mock_economy):
+        """Test adding less than one unit raises exception"""
+        economy, mock_collection = mock_economy
+
+        with pytest.raises(ValueError):
+            await economy.add_item(123, "sword", 0)
 
     @pytest.mark.asyncio
     async def test_remove_item_exists(self, mock_economy):
-        """Test removing an existing item"""
+        """Test removing an owned item decrements and prunes its stack"""
         economy, mock_collection = mock_economy
 
-        mock_collection.find_one.side_effect = [
-            {
-                "_id": 123,
-                "bank": 0,
-                "wallet": 0,
-                "items": ["sword", "potion"],
-            },
-            {
-                "_id": 123,
-                "bank": 0,
-                "wallet": 0,
-                "items": ["sword", "potion"],
-            },
-        ]
-        mock_collection.update_one = AsyncMock()
+        mock_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
 
-        await economy.remove_item(123, "sword")
+        await economy.remove_item(123, "sword", 2)
 
-        mock_collection.update_one.assert_called_once_with(
-            {"_id": 123}, {"$set": {"items": ["potion"]}}
+        assert mock_collection.update_one.call_args_list[0].args == (
+            {"_id": 123, "items.sword": {"$gte": 2}},
+            {"$inc": {"items.sword": -2}},
+        )
+        assert mock_collection.update_one.call_args_list[1].args == (
+            {"_id": 123, "items.sword": {"$lte": 0}},
+            {"$unset": {"items.sword": ""}},
         )
 
     @pytest.mark.asyncio
@@ -225,14 +457,186 @@ class TestMongoDBEconomyMocked:
         """Test removing non-existent item raises exception"""
         economy, mock_collection = mock_economy
 
-        mock_collection.find_one.side_effect = [
-            {"_id": 123, "bank": 0, "wallet": 0, "items": []},
-            {"_id": 123, "bank": 0, "wallet": 0, "items": []},
-        ]
+        mock_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=0))
+        mock_collection.find_one.return_value = {"_id": 123, "items": {}}
 
         with pytest.raises(NotFoundException):
             await economy.remove_item(123, "sword")
 
+    @pytest.mark.asyncio
+    async def test_remove_item_not_enough(self, mock_economy):
+        """Test removing more units than owned raises exception"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=0))
+        mock_collection.find_one.return_value = {"_id": 123, "items": {"sword": 1}}
+
+        with pytest.raises(NotEnoughItemsException):
+            await economy.remove_item(123, "sword", 2)
+
+    @pytest.mark.asyncio
+    async def test_get_balance_uses_projection(self, mock_economy):
+        """Test balance-only reads don't transfer the items map"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.find_one.return_value = {"_id": 123, "bank": 5, "wallet": 7}
+
+        balance = await economy.get_balance(123)
+        user = await economy.get_user(123, include_items=False)
+
+        assert (balance.bank, balance.wallet) == (5, 7)
+        assert (user.bank, user.wallet, user.items) == (5, 7, None)
+        for call in mock_collection.find_one.call_args_list:
+            assert call.args == ({"_id": 123}, {"bank": 1, "wallet": 1})
+
+    @pytest.mark.asyncio
+    async def test_get_items_uses_projection(self, mock_economy):
+        """Test items-only reads project the items map"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.find_one.return_value = {"items": {"sword": 2}}
+
+        items = await economy.get_items(123)
+
+        mock_collection.find_one.assert_called_once_with(
+            {"_id": 123}, {"items": 1, "_id": 0}
+        )
+        assert [(item.name, item.quantity, item.owner_id) for item in items] == [
+            ("sword", 2, 123)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_has_item_counts_single_document(self, mock_economy):
+        """Test has_item counts the user document instead of loading items"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.count_documents = AsyncMock(return_value=1)
+
+        assert await economy.has_item(123, "sword")
+        mock_collection.count_documents.assert_called_once_with(
+            {"_id": 123, "items.sword": {"$gt": 0}}, limit=1
+        )
+
+    @pytest.mark.asyncio
+    async def test_has_items_projects_requested_items(self, mock_economy):
+        """Test has_items only projects the requested stacks"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.find_one.return_value = {"items": {"sword": 2}}
+
+        owned = await economy.has_items(123, ["sword", "potion"])
+
+        assert owned == {"sword": True, "potion": False}
+        mock_collection.find_one.assert_called_once_with(
+            {"_id": 123}, {"_id": 0, "items.sword": 1, "items.potion": 1}
+        )
+
+    @pytest.mark.asyncio
+    async def test_purchase_guarded_single_update(self, mock_economy):
+        """Test purchase debits and grants in one guarded find_one_and_update"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.find_one_and_update = AsyncMock(
+            return_value={"_id": 123, "bank": 40, "wallet": 0}
+        )
+
+        result = await economy.purchase(123, "bank", 60, "lamp", 2)
+
+        assert result.success
+        assert result.balance.bank == 40
+        call = mock_collection.find_one_and_update.call_args
+        assert call.args == (
+            {"_id": 123, "bank": {"$gte": 60}},
+            {"$inc": {"bank": -60, "total": -60, "items.lamp": 2}},
+        )
+        assert call.kwargs["return_document"] == ReturnDocument.AFTER
+
+    @pytest.mark.asyncio
+    async def test_purchase_insufficient_funds(self, mock_economy):
+        """Test a failed purchase reports the unchanged balance"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
+        mock_collection.find_one.return_value = {"_id": 123, "bank": 10, "wallet": 0}
+
+        result = await economy.purchase(123, "bank", 60, "lamp")
+
+        assert not result.success
+        assert result.balance.bank == 10
+
+    @pytest.mark.asyncio
+    async def test_extra_currency(self, mock_motor_client):
+        """Test extra currencies are indexed, backfilled and kept out of total"""
+        mock_client, mock_instance, mock_collection = mock_motor_client
+
+        economy = Economy(
+            mongo_url="mongodb://mock:27017",
+            database_name="test_db",
+            currencies=["gems"],
+        )
+        economy._Economy__collection = mock_collection
+        mock_collection.update_one = AsyncMock()
+
+        await economy.add_money(123, "gems", 5)
+
+        mock_collection.update_one.assert_called_once_with(
+            {"_id": 123},
+            {
+                "$inc": {"gems": 5},
+                "$setOnInsert": {
+                    "guild_id": 0, "bank": 0, "wallet": 0, "total": 0, "items": {}
+                },
+            },
+            upsert=True,
+        )
+        assert (
+            ({"gems": {"$exists": False}}, {"$set": {"gems": 0}})
+            in [call.args for call in mock_collection.update_many.call_args_list]
+        )
+        assert [call.args[0][1][0] for call in mock_collection.create_index.call_args_list] == [
+            "bank",
+            "wallet",
+            "gems",
+            "total",
+        ]
+
+        mock_collection.find_one.return_value = {"_id": 123, "bank": 1, "wallet": 2}
+        balance = await economy.get_balance(123)
+
+        assert balance.balances == {"bank": 1, "wallet": 2, "gems": 0}
+        mock_collection.find_one.assert_called_once_with(
+            {"_id": 123}, {"bank": 1, "wallet": 1, "gems": 1}
+        )
+
+    def test_invalid_currency_name(self, mock_motor_client):
+        """Test reserved or non-identifier currency names are rejected"""
+        for currency in ("items", "total", "gem.s", "$gems"):
+            with pytest.raises(ValueError):
+                Economy(
+                    mongo_url="mongodb://mock:27017",
+                    database_name="test_db",
+                    currencies=[currency],
+                )
+
+    @pytest.mark.asyncio
+    async def test_get_user_items_stacks(self, mock_economy):
+        """Test items map is converted to Item objects with quantities"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.find_one.return_value = {
+            "_id": 123,
+            "bank": 0,
+            "wallet": 0,
+            "items": {"sword": 2, "a%2Eb": 1, "gone": 0},
+        }
+
+        user = await economy.get_user(123)
+
+        assert [(item.name, item.quantity) for item in user.items] == [
+            ("sword", 2),
+            ("a.b", 1),
+        ]
+
     @pytest.mark.asyncio
     async def test_delete_user_account(self, mock_economy):
         """Test deleting user account"""
@@ -243,3 +647,367 @@ class TestMongoDBEconomyMocked:
         await economy.delete_user_account(123)
 
         mock_collection.delete_one.assert_called_once_with({"_id": 123})
+
+    @pytest.mark.asyncio
+    async def test_guild_scope(self, mock_economy):
+        """Test scoped calls use a compound _id and guild filtered queries"""
+        economy, mock_collection = mock_economy
+        guild = economy.scope(777)
+
+        mock_collection.update_one = AsyncMock()
+        await guild.add_money(123, "wallet", 10)
+
+        mock_collection.update_one.assert_called_once_with(
+            {"_id": {"guild_id": 777, "user_id": 123}},
+            {
+                "$inc": {"wallet": 10, "total": 10},
+                "$setOnInsert": {"guild_id": 777, "bank": 0, "items": {}},
+            },
+            upsert=True,
+        )
+
+        mock_collection.find_one.return_value = {
+            "_id": {"guild_id": 777, "user_id": 123},
+            "bank": 0,
+            "wallet": 10,
+        }
+        balance = await guild.get_balance(123)
+        assert (balance.id, balance.wallet) == (123, 10)
+
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.skip.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(return_value=[])
+        mock_collection.find = MagicMock(return_value=cursor)
+
+        await guild.get_leaderboard("wallet")
+        mock_collection.find.assert_called_once_with({"guild_id": 777}, {"bank": 1, "wallet": 1})
+
+        mock_collection.delete_many = AsyncMock(return_value=MagicMock(deleted_count=4))
+        assert await guild.wipe_guild() == 4
+        mock_collection.delete_many.assert_called_once_with({"guild_id": 777})
+
+        with pytest.raises(AttributeError):
+            guild.close
+
+    @pytest.mark.asyncio
+    async def test_withdraw(self, mock_economy):
+        """Test withdraw is one guarded update that never upserts"""
+        economy, mock_collection = mock_economy
+
+        mock_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+        await economy.withdraw(123, "bank", 40)
+
+        mock_collection.update_one.assert_called_once_with(
+            {"_id": 123, "bank": {"$gte": 40}},
+            {"$inc": {"bank": -40, "total": -40}},
+        )
+
+        mock_collection.update_one.return_value = MagicMock(matched_count=0)
+        with pytest.raises(InsufficientFundsException):
+            await economy.withdraw(123, "bank", 40)
+
+    @pytest.mark.asyncio
+    async def test_get_all_users_raw(self, mock_motor_client):
+        """Test raw mode yields immutable rows straight from the documents"""
+        mock_client, mock_instance, mock_collection = mock_motor_client
+
+        economy = Economy(
+            mongo_url="mongodb://mock:27017",
+            database_name="test_db",
+            currencies=["gems"],
+        )
+        economy._Economy__collection = mock_collection
+        economy._Economy__indexes_ready = True
+
+        documents = [
+            {"_id": 1, "bank": 10, "wallet": 5, "gems": 2, "items": {"sword": 2, "gone": 0}},
+            {"_id": {"guild_id": 0, "user_id": 2}, "bank": 0, "wallet": 1},
+        ]
+
+        async def _cursor():
+            for document in documents:
+                yield document
+
+        mock_collection.find = MagicMock(side_effect=lambda *args, **kwargs: _cursor())
+
+        rows = [row async for row in economy.get_all_users(raw=True)]
+
+        mock_collection.find.assert_called_with({"guild_id": 0}, batch_size=1000)
+        assert rows[0] == UserRow(1, 10, 5, (ItemRow(0, "sword", 1, 2),), (2,))
+        assert rows[1] == UserRow(2, 0, 1, (), (0,))
+
+        users = [user async for user in economy.get_all_users()]
+        assert users[0].balances == {"bank": 10, "wallet": 5, "gems": 2}
+
+    @pytest.mark.asyncio
+    async def test_get_all_users_chunk_size(self, mock_economy):
+        """Test chunk_size is the first parameter like on SQLite and sets the cursor batch size"""
+        economy, mock_collection = mock_economy
+        economy._Economy__indexes_ready = True
+
+        async def _cursor():
+            yield {"_id": 1, "bank": 10, "wallet": 5}
+
+        mock_collection.find = MagicMock(side_effect=lambda *args, **kwargs: _cursor())
+
+        users = [user async for user in economy.get_all_users(500)]
+
+        mock_collection.find.assert_called_once_with({"guild_id": 0}, batch_size=500)
+        assert [user.id for user in users] == [1]
+
+        with pytest.raises(ValueError):
+            async for _ in economy.get_all_users(chunk_size=0):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_export_balances(self, mock_economy):
+        """Test export projects balances with a large batch size into typed columns"""
+        np = pytest.importorskip("numpy")
+        economy, mock_collection = mock_economy
+        economy._Economy__indexes_ready = True
+
+        documents = [
+            {"_id": 1, "bank": 10, "wallet": 5},
+            {"_id": {"guild_id": 0, "user_id": 2}, "wallet": 1},
+            {"_id": 3, "bank": 2.5, "wallet": 0},
+        ]
+
+        async def _cursor():
+            for document in documents:
+                yield document
+
+        mock_collection.count_documents = AsyncMock(return_value=2)
+        mock_collection.find = MagicMock(return_value=_cursor())
+
+        columns = await economy.export_balances(chunk_size=2)
+
+        mock_collection.count_documents.assert_called_once_with({"guild_id": 0})
+        mock_collection.find.assert_called_once_with(
+            {"guild_id": 0}, {"bank": 1, "wallet": 1}, batch_size=2
+        )
+        assert columns["id"].tolist() == [1, 2, 3]
+        assert columns["id"].dtype == np.int64
+        assert columns["bank"].tolist() == [10, 0, 2.5]
+        assert columns["wallet"].tolist() == [5, 1, 0]
+
+    @pytest.mark.asyncio
+    async def test_stats(self, mock_economy):
+        """Test stats groups server-side and reads percentiles from the sorted index"""
+        economy, mock_collection = mock_economy
+        economy._Economy__indexes_ready = True
+
+        group_cursor = MagicMock()
+        group_cursor.to_list = AsyncMock(
+            return_value=[{"_id": None, "count": 4, "sum": 100, "min": 5, "max": 60}]
+        )
+        mock_collection.aggregate = MagicMock(return_value=group_cursor)
+
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.skip.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(return_value=[{"_id": 1, "total": 35}])
+        mock_collection.find = MagicMock(return_value=cursor)
+
+        stats = await economy.stats("bank+wallet", percentiles=[50])
+
+        pipeline = mock_collection.aggregate.call_args.args[0]
+        assert pipeline[0] == {"$match": {"guild_id": 0}}
+        assert pipeline[1]["$group"]["sum"] == {"$sum": "$total"}
+        mock_collection.find.assert_called_once_with({"guild_id": 0}, {"total": 1})
+        cursor.sort.assert_called_once_with([("total", 1), ("_id", 1)])
+        cursor.skip.assert_called_once_with(1)
+        assert (stats.count, stats.sum, stats.min, stats.max, stats.mean) == (4, 100, 5, 60, 25)
+        assert stats.percentiles == {50: 35}
+
+        group_cursor.to_list.return_value = []
+        empty = await economy.stats("bank", percentiles=[99])
+        assert (empty.count, empty.sum, empty.mean, empty.percentiles) == (0, 0, None, {99: None})
+
+        with pytest.raises(ValueError):
+            await economy.stats("items")
+
+    @pytest.mark.asyncio
+    async def test_stats_histogram(self, mock_economy):
+        """Test the histogram groups users on a $switch over the bucket bounds"""
+        economy, mock_collection = mock_economy
+        economy._Economy__indexes_ready = True
+
+        group_cursor = MagicMock()
+        group_cursor.to_list = AsyncMock(
+            return_value=[{"_id": None, "count": 4, "sum": 100, "min": 0, "max": 60}]
+        )
+        bucket_cursor = MagicMock()
+        bucket_cursor.to_list = AsyncMock(
+            return_value=[{"_id": 0, "count": 3}, {"_id": 2, "count": 1}]
+        )
+        mock_collection.aggregate = MagicMock(side_effect=[group_cursor, bucket_cursor])
+
+        stats = await economy.stats("wallet", buckets=3)
+
+        assert stats.histogram == {20: 3, 40: 0, 60: 1}
+        pipeline = mock_collection.aggregate.call_args.args[0]
+        assert pipeline[0] == {"$match": {"guild_id": 0, "wallet": {"$lte": 60}}}
+        branches = pipeline[1]["$group"]["_id"]["$switch"]["branches"]
+        assert branches[1] == {"case": {"$lte": ["$wallet", 40]}, "then": 1}
+
+        group_cursor.to_list.return_value = []
+        mock_collection.aggregate = MagicMock(return_value=group_cursor)
+        assert (await economy.stats("wallet", buckets=3)).histogram == {}
+        mock_collection.aggregate.assert_called_once()
+
+        with pytest.raises(ValueError):
+            await economy.stats("wallet", buckets=[3, 1])
+
+    @pytest.mark.asyncio
+    async def test_get_rank(self, mock_economy):
+        """Test get_rank counts users above the balance on the indexed field"""
+        economy, mock_collection = mock_economy
+        economy._Economy__indexes_ready = True
+
+        mock_collection.find_one = AsyncMock(return_value={"_id": 123, "total": 50})
+        mock_collection.count_documents = AsyncMock(side_effect=[7, 40])
+
+        rank = await economy.get_rank(123, "bank+wallet")
+
+        mock_collection.find_one.assert_called_once_with({"_id": 123}, {"total": 1})
+        assert mock_collection.count_documents.call_args_list[0].args == (
+            {"guild_id": 0, "total": {"$gt": 50}},
+        )
+        assert (rank.rank, rank.total, rank.value) == (8, 40, 50)
+
+        mock_collection.find_one.return_value = None
+        with pytest.raises(NotFoundException):
+            await economy.get_rank(123)
+
+    @pytest.mark.asyncio
+    async def test_rank_index(self, mock_motor_client):
+        """Test the rank index loads once and applies the balances returned by writes"""
+        mock_client, mock_instance, mock_collection = mock_motor_client
+
+        economy = Economy(mongo_url="mongodb://mock:27017", database_name="test_db", rank_index=True)
+        economy._Economy__collection = mock_collection
+        economy._Economy__indexes_ready = True
+
+        def _cursor(documents):
+            async def _iterate():
+                for document in documents:
+                    yield document
+            return _iterate()
+
+        mock_collection.find = MagicMock(
+            return_value=_cursor([{"_id": uid, "bank": uid} for uid in range(1, 11)])
+        )
+        assert (await economy.get_rank(3)).rank == 8
+        assert await economy.count_above("bank", 5) == 5
+        mock_collection.find.assert_called_once_with({"guild_id": 0}, {"bank": 1, "wallet": 1})
+
+        mock_collection.find_one_and_update = AsyncMock(return_value={"_id": 3, "bank": 103})
+        await economy.add_money(3, "bank", 100)
+
+        assert mock_collection.find_one_and_update.call_args.kwargs["return_document"] == (
+            ReturnDocument.AFTER
+        )
+        rank = await economy.get_rank(3)
+        assert (rank.rank, rank.total, rank.value) == (1, 10, 103)
+        assert (await economy.get_rank(10, "bank+wallet")).rank == 2
+
+        mock_collection.find_one_and_update.return_value = {"_id": 11, "bank": 0, "wallet": 500}
+        await economy.add_money(11, "wallet", 500)
+        await economy.delete_user_account(3)
+        assert (await economy.get_rank(11, "bank+wallet")).rank == 1
+        assert (await economy.get_rank(10)).total == 10
+        with pytest.raises(NotFoundException):
+            await economy.get_rank(3)
+        mock_collection.find.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_rank_index_add_item_registers_user(self, mock_motor_client):
+        """Test add_item on an unregistered user puts them into a loaded rank index"""
+        mock_client, mock_instance, mock_collection = mock_motor_client
+
+        economy = Economy(mongo_url="mongodb://mock:27017", database_name="test_db", rank_index=True)
+        economy._Economy__collection = mock_collection
+        economy._Economy__indexes_ready = True
+
+        async def _cursor():
+            for uid in range(1, 4):
+                yield {"_id": uid, "bank": uid * 10}
+
+        mock_collection.find = MagicMock(return_value=_cursor())
+        assert (await economy.get_rank(1)).total == 3
+
+        mock_collection.find_one_and_update = AsyncMock(
+            return_value={"_id": 99, "bank": 0, "wallet": 0}
+        )
+        await economy.add_item(99, "sword")
+
+        filter, update = mock_collection.find_one_and_update.call_args.args
+        assert filter == {"_id": 99}
+        assert update["$inc"] == {"items.sword": 1}
+        assert mock_collection.find_one_and_update.call_args.kwargs["upsert"] is True
+
+        rank = await economy.get_rank(99)
+        assert (rank.rank, rank.total, rank.value) == (4, 4, 0)
+        assert (await economy.get_rank(1)).total == 4
+        mock_collection.find.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_import_from_replaces_documents(self, mock_economy):
+        """Test imports are unordered bulk writes of upserting replacements"""
+        economy, mock_collection = mock_economy
+        economy._Economy__indexes_ready = True
+        mock_collection.bulk_write = AsyncMock()
+
+        lines = [
+            '{"guild_id": 0, "id": 1, "balances": {"bank": 10, "wallet": 5}, "items": {"a.b": 2}}',
+            "",
+            '{"guild_id": 7, "id": 2, "balances": {"wallet": 1}}',
+        ]
+        progress = []
+
+        assert await economy.import_from(lines, chunk_size=1, progress=progress.append) == 2
+
+        assert progress == [1, 2]
+        first = mock_collection.bulk_write.call_args_list[0]
+        assert first.args[0] == [
+            ReplaceOne(
+                {"_id": 1},
+                {"guild_id": 0, "bank": 10, "wallet": 5, "total": 15, "items": {"a%2Eb": 2}},
+                upsert=True,
+            )
+        ]
+        assert first.kwargs == {"ordered": False}
+        assert mock_collection.bulk_write.call_args_list[1].args[0][0]._filter == {
+            "_id": {"guild_id": 7, "user_id": 2}
+        }
+
+    @pytest.mark.asyncio
+    async def test_export_to_writes_ndjson(self, mock_economy):
+        """Test export writes one JSON record per user of every guild"""
+        economy, mock_collection = mock_economy
+        economy._Economy__indexes_ready = True
+        mock_collection.distinct = AsyncMock(return_value=[7, 0])
+
+        documents = {
+            0: [{"_id": 1, "bank": 10, "wallet": 5, "items": {"a%2Eb": 2}}],
+            7: [{"_id": {"guild_id": 7, "user_id": 2}, "bank": 0, "wallet": 1}],
+        }
+
+        def _find(query, *args, **kwargs):
+            async def _cursor():
+                for document in documents[query["guild_id"]]:
+                    yield document
+            return _cursor()
+
+        mock_collection.find = MagicMock(side_effect=_find)
+        stream = io.StringIO()
+
+        assert await economy.export_to(stream) == 2
+
+        assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+            {"guild_id": 0, "id": 1, "balances": {"bank": 10, "wallet": 5}, "items": {"a.b": 2}},
+            {"guild_id": 7, "id": 2, "balances": {"bank": 0, "wallet": 1}, "items": {}},
+        ]
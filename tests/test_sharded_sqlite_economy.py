@@ -0,0 +1,204 @@
+import pytest
+
+from DiscordEconomy.ShardedSqlite import Economy
+from DiscordEconomy.Sqlite import Economy as SqliteEconomy
+from DiscordEconomy.exceptions import InsufficientFundsException, NotFoundException
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_users_routed_to_shards(sharded_economy, tmp_path):
+    for uid in range(1, 31):
+        await sharded_economy.add_money(uid, "bank", uid)
+
+    assert sorted(p.name for p in tmp_path.glob("sharded.*.db")) == [
+        "sharded.0.db",
+        "sharded.1.db",
+        "sharded.2.db",
+    ]
+
+    counts = []
+    for shard in sharded_economy.shards:
+        counts.append(len([u async for u in shard.get_all_users()]))
+    assert sum(counts) == 30 and all(counts)
+
+    shard = sharded_economy.shard_for(7)
+    assert (await shard.get_balance(7)).bank == 7
+    assert (await sharded_economy.get_user(7)).bank == 7
+
+    with pytest.raises(NotFoundException):
+        await sharded_economy.get_user(99)
+
+
+async def test_fan_out_reads_are_merged(sharded_economy):
+    await sharded_economy.bulk_set_money((uid, "bank", uid % 7) for uid in range(1, 41))
+    await sharded_economy.bulk_add_money((uid, "wallet", uid) for uid in range(1, 41))
+
+    expected = sorted(range(1, 41), key=lambda uid: (uid % 7, uid), reverse=True)
+    top = await sharded_economy.get_leaderboard("bank", limit=10, offset=5)
+    assert [b.id for b in top] == expected[5:15]
+
+    expected = sorted(range(1, 41), key=lambda uid: (uid % 7 + uid, uid), reverse=True)
+    top = await sharded_economy.get_leaderboard("bank+wallet", limit=3)
+    assert [b.id for b in top] == expected[:3]
+
+    assert [u.id async for u in sharded_economy.get_all_users(chunk_size=4)] == list(range(1, 41))
+    rows = [row async for row in sharded_economy.get_all_users(chunk_size=4, raw=True)]
+    assert [row.id for row in rows] == list(range(1, 41))
+
+    with pytest.raises(ValueError):
+        await sharded_economy.get_leaderboard("items")
+
+
+async def test_export_balances_concatenates_shards(sharded_economy):
+    pytest.importorskip("numpy")
+    await sharded_economy.bulk_add_money([(uid, "bank", uid) for uid in range(1, 41)])
+
+    columns = await sharded_economy.export_balances(chunk_size=4)
+
+    assert sorted(columns["id"].tolist()) == list(range(1, 41))
+    assert columns["bank"].sum() == sum(range(1, 41))
+
+    with pytest.raises(ValueError):
+        await sharded_economy.export_balances("csv")
+
+
+async def test_stats_combine_shards(sharded_economy, tmp_path):
+    single = SqliteEconomy(str(tmp_path / "single.db"))
+    try:
+        operations = [(uid, "wallet", (uid * 37) % 101) for uid in range(1, 301)]
+        await sharded_economy.bulk_add_money(operations)
+        await single.bulk_add_money(operations)
+
+        for field in ("wallet", "bank+wallet"):
+            expected = await single.stats(field, percentiles=[0, 10, 50, 99, 100])
+            assert await sharded_economy.stats(field, percentiles=[0, 10, 50, 99, 100]) == expected
+
+        for buckets in (7, [10, 50, 100]):
+            expected = await single.stats("wallet", buckets=buckets)
+            assert sum(expected.histogram.values()) > 0
+            assert await sharded_economy.stats("wallet", buckets=buckets) == expected
+
+        assert (await sharded_economy.scope(9).stats("wallet", buckets=3)).histogram == {}
+    finally:
+        await single.close()
+
+
+@pytest.mark.parametrize("window", [1000, 4])
+async def test_stats_percentiles_with_ties(sharded_economy, tmp_path, monkeypatch, window):
+    # A small window narrows the shards' positions before reading them
+    monkeypatch.setattr("DiscordEconomy.ShardedSqlite._STATS_WINDOW", window)
+    single = SqliteEconomy(str(tmp_path / "single.db"))
+    try:
+        operations = [(uid, "bank", (uid % 7) / 2 + uid % 50) for uid in range(1, 201)]
+        await sharded_economy.bulk_add_money(operations)
+        await single.bulk_add_money(operations)
+
+        percentiles = range(0, 101, 5)
+        expected = await single.stats("bank", percentiles=percentiles)
+        assert await sharded_economy.stats("bank", percentiles=percentiles) == expected
+    finally:
+        await single.close()
+
+
+async def test_get_rank_across_shards(sharded_economy):
+    await sharded_economy.bulk_add_money([(uid, "wallet", uid % 25) for uid in range(1, 101)])
+
+    rank = await sharded_economy.get_rank(24, "wallet")
+    assert (rank.rank, rank.total, rank.value) == (1, 100, 24)
+    assert (await sharded_economy.get_rank(25, "wallet")).rank == 97
+    assert await sharded_economy.count_above("wallet", 20) == 16
+
+    with pytest.raises(NotFoundException):
+        await sharded_economy.get_rank(1000)
+
+
+async def test_migrate_between_single_file_and_shards(sharded_economy, tmp_path):
+    path = tmp_path / "backup.ndjson"
+    single = SqliteEconomy(str(tmp_path / "single.db"))
+    try:
+        await single.bulk_add_money([(uid, "bank", uid) for uid in range(1, 51)])
+        await single.add_item(7, "sword", 3)
+        await single.export_to(path)
+
+        progress = []
+        assert await sharded_economy.import_from(path, chunk_size=20, progress=progress.append) == 50
+        assert progress == [20, 40, 50]
+        assert (await sharded_economy.get_balance(50)).bank == 50
+        assert await sharded_economy.get_item_count(7, "sword") == 3
+
+        roundtrip = tmp_path / "roundtrip.ndjson"
+        assert await sharded_economy.export_to(roundtrip) == 50
+        assert sorted(roundtrip.read_text().splitlines()) == sorted(path.read_text().splitlines())
+    finally:
+        await single.close()
+
+
+async def test_import_errors_report_source_line(sharded_economy):
+    lines = [f'{{"id": {uid}, "balances": {{"bank": 1}}}}' for uid in range(1, 25)]
+    lines.append('{"id": 25, "balances": {"gems": 1}}')
+
+    with pytest.raises(ValueError, match="line 25"):
+        await sharded_economy.import_from(lines, chunk_size=10)
+
+
+async def test_bulk_counts_across_shards(sharded_economy):
+    result = await sharded_economy.bulk_add_money(
+        [(uid, "wallet", 10) for uid in range(1, 11)], chunk_size=4
+    )
+    assert (result.operations, result.changed) == (10, 10)
+
+    result = await sharded_economy.bulk_remove_money((uid, "wallet", 3) for uid in range(1, 11))
+    assert result.operations == 10
+    assert sum(b.wallet for b in await sharded_economy.get_leaderboard("wallet", limit=20)) == 70
+
+
+async def test_transfer_across_shards(sharded_economy):
+    src, dst = 1, next(
+        uid for uid in range(2, 100)
+        if sharded_economy.shard_for(uid) is not sharded_economy.shard_for(1)
+    )
+    await sharded_economy.add_money(src, "bank", 100)
+
+    await sharded_economy.transfer(src, "bank", dst, "wallet", 60)
+    assert (await sharded_economy.get_balance(src)).bank == 40
+    assert (await sharded_economy.get_balance(dst)).wallet == 60
+
+    with pytest.raises(InsufficientFundsException):
+        await sharded_economy.transfer(src, "bank", dst, "wallet", 41)
+
+    with pytest.raises(ValueError):
+        await sharded_economy.transfer(src, "bank", dst, "gems", 10)
+
+    assert (await sharded_economy.get_balance(src)).bank == 40
+
+
+async def test_items_purchase_and_guild_scope(sharded_economy):
+    guild = sharded_economy.scope(5)
+
+    await guild.add_money(1, "wallet", 30)
+    result = await guild.purchase(1, "wallet", 25, "lamp", 2)
+    assert result.success and result.balance.wallet == 5
+    assert await guild.get_item_count(1, "lamp") == 2
+    assert await guild.has_items(1, ["lamp", "rope"]) == {"lamp": True, "rope": False}
+    assert not await sharded_economy.has_item(1, "lamp")
+
+    await guild.add_money(2, "bank", 1)
+    assert await guild.wipe_guild() == 2
+    assert await guild.get_leaderboard() == []
+
+
+async def test_stats_are_summed(tmp_path):
+    async with Economy(str(tmp_path / "stats.db"), shards=2, cache_size=10, pool_size=2) as e:
+        await e.add_money(1, "bank", 1)
+        await e.get_user(1)
+        await e.get_user(1)
+
+        assert e.cache_stats().hits == 1
+        stats = e.pool_stats()
+        assert stats.size == 4
+        assert stats.writer_checkouts >= 3
+
+    with pytest.raises(ValueError):
+        Economy(str(tmp_path / "none.db"), shards=0)
@@ -1,10 +1,17 @@
 import asyncio
+import io
+import sqlite3
+import sys
 import pytest
+from aiosqlitepool import PoolConnectionAcquireTimeoutError
 
 from DiscordEconomy.Sqlite import Economy
+from DiscordEconomy.objects import UserRow
 from DiscordEconomy.exceptions import (
     EnsurePositiveBalanceException,
+    InsufficientFundsException,
     NegativeAmountException,
+    NotEnoughItemsException,
     NotFoundException,
 )
 
@@ -91,6 +98,119 @@ async def test_items_crud(economy, user_id):
         await economy.remove_item(user_id, "not-exists")
 
 
+async def test_item_stacks(economy, user_id):
+    await economy.ensure_registered(user_id)
+
+    await economy.add_item(user_id, "ore")
+    await economy.add_item(user_id, "ore", 4)
+    assert await economy.get_item_count(user_id, "ore") == 5
+
+    user = await economy.get_user(user_id)
+    assert [(i.name, i.quantity) for i in user.items] == [("ore", 5)]
+
+    with pytest.raises(NotEnoughItemsException):
+        await economy.remove_item(user_id, "ore", 6)
+    assert await economy.get_item_count(user_id, "ore") == 5
+
+    await economy.remove_item(user_id, "ore", 2)
+    assert await economy.get_item_count(user_id, "ore") == 3
+
+    await economy.remove_item(user_id, "ore", 3)
+    assert await economy.get_item_count(user_id, "ore") == 0
+    assert (await economy.get_user(user_id)).items == []
+
+    with pytest.raises(ValueError):
+        await economy.add_item(user_id, "ore", 0)
+
+
+async def test_items_migrated_to_stacks(tmp_path):
+    db_file = str(tmp_path / "old_layout.db")
+
+    conn = sqlite3.connect(db_file)
+    conn.executescript(
+        """
+        CREATE TABLE users (id INTEGER PRIMARY KEY, bank INTEGER, wallet INTEGER);
+        CREATE TABLE items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, itemName TEXT, ownerID INTEGER,
+            FOREIGN KEY (ownerID) REFERENCES users (id) ON DELETE CASCADE
+        );
+        CREATE INDEX ownerID_idx ON items(ownerID);
+        INSERT INTO users VALUES (1, 0, 0);
+        INSERT INTO items VALUES (NULL, 'sword', 1), (NULL, 'ore', 1), (NULL, 'ore', 1);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    async with Economy(database_name=db_file) as e:
+        user = await e.get_user(1)
+        assert sorted((i.name, i.quantity) for i in user.items) == [("ore", 2), ("sword", 1)]
+
+        await e.add_item(1, "sword")
+        assert await e.get_item_count(1, "sword") == 2
+
+
+async def test_balance_and_items_only_reads(economy, user_id):
+    await economy.add_money(user_id, "bank", 30)
+    await economy.add_item(user_id, "ore", 2)
+
+    balance = await economy.get_balance(user_id)
+    assert (balance.id, balance.bank, balance.wallet) == (user_id, 30, 0)
+
+    user = await economy.get_user(user_id, include_items=False)
+    assert (user.bank, user.items) == (30, None)
+
+    assert [(i.name, i.quantity) for i in await economy.get_items(user_id)] == [("ore", 2)]
+    assert await economy.get_items(999) == []
+
+    with pytest.raises(NotFoundException):
+        await economy.get_balance(999)
+
+
+async def test_has_item(economy, user_id):
+    await economy.ensure_registered(user_id)
+    await economy.add_item(user_id, "lamp", 2)
+
+    assert await economy.has_item(user_id, "lamp")
+    assert not await economy.has_item(user_id, "rope")
+    assert await economy.has_items(user_id, ["lamp", "rope"]) == {"lamp": True, "rope": False}
+    assert await economy.has_items(user_id, []) == {}
+
+    await economy.remove_item(user_id, "lamp", 2)
+    assert not await economy.has_item(user_id, "lamp")
+
+
+async def test_purchase(economy, user_id):
+    await economy.set_money(user_id, "wallet", 100)
+
+    result = await economy.purchase(user_id, "wallet", 60, "lamp", 2)
+    assert result.success
+    assert (result.balance.bank, result.balance.wallet) == (0, 40)
+    assert await economy.get_item_count(user_id, "lamp") == 2
+
+    result = await economy.purchase(user_id, "wallet", 60, "lamp")
+    assert not result.success
+    assert result.balance.wallet == 40
+    assert await economy.get_item_count(user_id, "lamp") == 2
+
+    with pytest.raises(NotFoundException):
+        await economy.purchase(999, "wallet", 1, "lamp")
+    with pytest.raises(NegativeAmountException):
+        await economy.purchase(user_id, "wallet", -1, "lamp")
+
+
+async def test_concurrent_purchases_never_overspend(economy, user_id):
+    await economy.set_money(user_id, "bank", 50)
+
+    results = await asyncio.gather(
+        *(economy.purchase(user_id, "bank", 10, "ticket") for _ in range(8))
+    )
+
+    assert sum(result.success for result in results) == 5
+    assert (await economy.get_balance(user_id)).bank == 0
+    assert await economy.get_item_count(user_id, "ticket") == 5
+
+
 async def test_get_all_users_generator(economy):
     # create some
     for uid in (1, 2, 3):
@@ -106,6 +226,317 @@ async def test_get_all_users_generator(economy):
     assert seen[3] == 30
 
 
+async def test_export_balances(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    economy = Economy(str(tmp_path / "export.db"), currencies=["gems"])
+    try:
+        await economy.bulk_add_money([(uid, "wallet", uid) for uid in range(1, 26)])
+        await economy.add_money(2**60, "bank", 5)
+        await economy.add_money(1, "gems", 2, guild_id=9)
+
+        columns = await economy.export_balances(chunk_size=7)
+
+        assert list(columns) == ["id", "bank", "wallet", "gems"]
+        assert columns["id"].dtype == np.int64 and columns["bank"].dtype == np.float64
+        assert columns["id"].tolist() == [*range(1, 26), 2**60]
+        assert columns["wallet"].sum() == 325 and columns["bank"].sum() == 5
+
+        scoped = await economy.scope(9).export_balances()
+        assert scoped["id"].tolist() == [1] and scoped["gems"].tolist() == [2]
+
+        with pytest.raises(ValueError):
+            await economy.export_balances("csv")
+
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+        with pytest.raises(ImportError):
+            await economy.export_balances("arrow")
+    finally:
+        await economy.close()
+
+
+async def test_export_balances_arrow(economy):
+    pytest.importorskip("pyarrow")
+    for uid in (1, 2, 3):
+        await economy.add_money(uid, "bank", uid * 10)
+
+    table = await economy.export_balances("arrow")
+
+    assert table.column_names == ["id", "bank", "wallet"]
+    assert table.column("bank").to_pylist() == [0, 10, 20, 30]
+
+
+@pytest.mark.parametrize("track_supply", [False, True])
+async def test_stats(tmp_path, track_supply):
+    economy = Economy(str(tmp_path / "stats.db"), track_supply=track_supply)
+    try:
+        await economy.bulk_add_money([(uid, "wallet", uid) for uid in range(1, 101)])
+        await economy.add_money(1, "bank", 50)
+        await economy.transfer(2, "wallet", 3, "bank", 2)
+        await economy.purchase(4, "wallet", 4, "ticket")
+        await economy.delete_user_account(100)
+        await economy.ensure_registered(200)
+
+        stats = await economy.stats("wallet", percentiles=[0, 50, 99, 100])
+
+        assert stats.count == 100
+        assert stats.sum == sum(range(1, 100)) - 2 - 4
+        assert (stats.min, stats.max) == (0, 99)
+        assert stats.mean == stats.sum / 100
+        assert stats.percentiles == {0: 0, 50: 49, 99: 98, 100: 99}
+
+        total = await economy.stats("bank+wallet")
+        assert total.sum == stats.sum + 52 and total.max == 99
+
+        empty = await economy.scope(5).stats("bank", percentiles=[50])
+        assert (empty.count, empty.sum, empty.min, empty.mean) == (0, 0, None, None)
+        assert empty.percentiles == {50: None}
+
+        with pytest.raises(ValueError):
+            await economy.stats("items")
+        with pytest.raises(ValueError):
+            await economy.stats("bank", percentiles=[101])
+    finally:
+        await economy.close()
+
+
+async def test_stats_histogram(economy):
+    # User 0 is registered by the fixture, wallets are 0 to 9
+    await economy.bulk_add_money([(uid, "wallet", uid) for uid in range(1, 10)])
+
+    stats = await economy.stats("wallet", buckets=3)
+    assert stats.histogram == {3: 4, 6: 3, 9: 3}
+
+    bounded = await economy.stats("wallet", buckets=[2, 5, float("inf")])
+    assert bounded.histogram == {2: 3, 5: 3, float("inf"): 4}
+    assert (await economy.stats("wallet", buckets=[-1, 5])).histogram == {-1: 0, 5: 6}
+
+    # Every user has the same balance, the buckets collapse to one
+    assert (await economy.stats("bank", buckets=4)).histogram == {0: 10}
+    assert (await economy.scope(5).stats("bank", buckets=4)).histogram == {}
+    assert (await economy.stats("wallet")).histogram == {}
+
+    for buckets in (0, True, [5, 2], [1, 1]):
+        with pytest.raises(ValueError):
+            await economy.stats("wallet", buckets=buckets)
+
+
+async def test_supply_rebuilt_on_open(tmp_path):
+    path = str(tmp_path / "supply.db")
+    async with Economy(path) as economy:
+        await economy.bulk_add_money([(uid, "bank", 10) for uid in range(1, 11)])
+
+    async with Economy(path, currencies=["gems"], track_supply=True) as economy:
+        assert (await economy.stats("bank")).sum == 100
+        await economy.add_money(11, "gems", 3)
+        assert await economy.wipe_guild(0) == 11
+
+        stats = await economy.stats("gems")
+        assert (stats.count, stats.sum) == (0, 0)
+
+
+async def test_supply_counter_name_is_reserved(tmp_path):
+    with pytest.raises(ValueError, match="reserved"):
+        Economy(str(tmp_path / "supply.db"), currencies=["users"], track_supply=True)
+
+
+async def test_supply_kept_by_instance_without_tracking(tmp_path):
+    path = str(tmp_path / "supply.db")
+    async with Economy(path, currencies=["gems"], track_supply=True) as tracked:
+        await tracked.add_money(1, "gems", 5)
+
+        async with Economy(path) as plain:
+            await plain.add_money(2, "bank", 7)
+
+        stats = await tracked.stats("gems")
+        assert (stats.count, stats.sum) == (2, 5)
+        assert (await tracked.stats("bank")).sum == 7
+
+
+@pytest.mark.parametrize("rank_index", [False, True])
+async def test_get_rank(tmp_path, rank_index):
+    economy = Economy(str(tmp_path / "rank.db"), rank_index=rank_index)
+    try:
+        await economy.bulk_add_money([(uid, "bank", uid % 10) for uid in range(1, 31)])
+
+        rank = await economy.get_rank(9, "bank")
+        assert (rank.rank, rank.total, rank.value) == (1, 30, 9)
+        assert (await economy.get_rank(19)).rank == 1  # ties share a rank
+        assert (await economy.get_rank(10)).rank == 28
+        assert await economy.count_above("bank", 4) == 15
+
+        # writes of this instance are reflected in the next lookup
+        await economy.add_money(10, "bank", 100)
+        await economy.delete_user_account(9)
+        await economy.add_money(31, "wallet", 1000)
+        assert (await economy.get_rank(10)).rank == 1
+        assert (await economy.get_rank(19)).total == 30
+        assert (await economy.get_rank(31, "bank+wallet")).rank == 1
+
+        await economy.transfer(10, "bank", 20, "bank", 100)
+        assert (await economy.get_rank(20)).rank == 1
+
+        with pytest.raises(NotFoundException):
+            await economy.get_rank(9)
+        with pytest.raises(ValueError):
+            await economy.get_rank(10, "items")
+
+        assert await economy.wipe_guild(0) == 30
+        with pytest.raises(NotFoundException):
+            await economy.get_rank(10)
+    finally:
+        await economy.close()
+
+
+@pytest.mark.parametrize("rank_index", [False, True])
+async def test_get_rank_after_write_with_string_id(tmp_path, rank_index):
+    economy = Economy(str(tmp_path / "rank.db"), rank_index=rank_index)
+    try:
+        await economy.add_money(1, "bank", 10)
+        await economy.add_money(2, "bank", 20)
+        assert (await economy.get_rank(1)).rank == 2
+
+        # "1" is stored as the integer 1, the index must not keep its old balance
+        await economy.add_money("1", "bank", 100)
+        rank = await economy.get_rank(2)
+        assert (rank.rank, rank.total) == (2, 2)
+        assert (await economy.get_rank(1)).value == 110
+
+        rank = await economy.get_rank("1", "bank")
+        assert (rank.id, rank.rank, rank.value) == ("1", 1, 110)
+        with pytest.raises(NotFoundException):
+            await economy.get_rank("3")
+    finally:
+        await economy.close()
+
+
+@pytest.mark.parametrize("commit_interval_ms", [None, 5])
+async def test_rank_index_applies_writes_without_reading(tmp_path, commit_interval_ms):
+    db_file = str(tmp_path / "rank.db")
+    indexed = Economy(
+        db_file, rank_index=True, currencies=["gems"], commit_interval_ms=commit_interval_ms
+    )
+    plain = Economy(db_file, currencies=["gems"])
+    try:
+        await indexed.bulk_add_money([(uid, "bank", uid) for uid in range(1, 21)])
+        assert (await indexed.get_rank(20)).rank == 1
+
+        await asyncio.gather(
+            indexed.add_money(1, "bank", 100),
+            indexed.remove_money(2, "bank", 50),
+            indexed.set_money(3, "wallet", 70),
+            indexed.add_money(30, "gems", 5),
+            indexed.ensure_registered(31),
+        )
+        await indexed.withdraw(1, "bank", 1)
+        await indexed.transfer(4, "bank", 5, "wallet", 4)
+        await indexed.purchase(6, "bank", 6, "sword")
+        await indexed.bulk_remove_money([(7, "bank", 3), (7, "bank", 10), (8, "wallet", 1)])
+        await indexed.delete_user_account("9")
+
+        reads = indexed.pool_stats().checkouts
+        writes = indexed.pool_stats().writer_checkouts
+        for field in ("bank", "wallet", "gems", "bank+wallet"):
+            for uid in range(1, 32):
+                if uid == 9 or 21 <= uid < 30:
+                    with pytest.raises(NotFoundException):
+                        await indexed.get_rank(uid, field)
+                    continue
+
+                assert await indexed.get_rank(uid, field) == await plain.get_rank(uid, field)
+            assert await indexed.count_above(field, 5) == await plain.count_above(field, 5)
+
+        assert indexed.pool_stats().checkouts == reads
+        assert indexed.pool_stats().writer_checkouts == writes
+    finally:
+        await indexed.close()
+        await plain.close()
+
+
+async def test_rank_count_uses_index(economy):
+    async with economy.pool.connection() as conn:
+        query = await conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM users WHERE guild_id = ? AND \"bank\" > ?",
+            (0, 5),
+        )
+        plan = " ".join(row[3] for row in await query.fetchall())
+        assert "COVERING INDEX bank_idx" in plan
+
+
+async def test_export_and_import_ndjson(tmp_path):
+    path = tmp_path / "backup.ndjson"
+    source = Economy(str(tmp_path / "source.db"), currencies=["gems"])
+    target = Economy(str(tmp_path / "target.db"), currencies=["gems"])
+    try:
+        await source.bulk_add_money([(uid, "wallet", uid) for uid in range(1, 26)])
+        await source.add_item(3, "sword", 2)
+        await source.add_item(3, "a.b$c")
+        await source.add_money(5, "gems", 7, guild_id=9)
+
+        exported = []
+        assert await source.export_to(path, chunk_size=10, progress=exported.append) == 26
+        assert exported == [10, 20, 26]
+
+        # existing users are replaced, items included
+        await target.add_money(3, "bank", 100)
+        await target.add_item(3, "old")
+
+        imported = []
+        assert await target.import_from(path, chunk_size=7, progress=imported.append) == 26
+        assert imported == [7, 14, 21, 26]
+
+        user = await target.get_user(3)
+        assert (user.bank, user.wallet) == (0, 3)
+        assert {(item.name, item.quantity) for item in user.items} == {("sword", 2), ("a.b$c", 1)}
+        assert (await target.get_balance(5, guild_id=9)).balances["gems"] == 7
+
+        # a second import is idempotent and a re-export is identical
+        await target.import_from(path)
+        stream = io.StringIO()
+        await target.export_to(stream)
+        assert stream.getvalue() == path.read_text()
+
+        assert await target.scope(4).import_from(path) == 26
+        assert (await target.get_balance(25, guild_id=4)).wallet == 25
+
+        with pytest.raises(ValueError):
+            await target.import_from(['{"id": 1, "balances": {"coins": 5}}'])
+        with pytest.raises(ValueError):
+            await target.import_from(["", "not json"])
+        with pytest.raises(ValueError, match="line 1"):
+            await target.import_from(['{"id": 1, "items": [["x", 1]]}'])
+        with pytest.raises(ValueError, match="line 2"):
+            await target.import_from(["", '{"id": 1, "balances": [["bank", 1]]}'])
+        with pytest.raises(ValueError):
+            await target.import_from(['{"id": 1, "balances": {"bank": "50"}}'])
+        with pytest.raises(EnsurePositiveBalanceException):
+            await target.import_from(['{"id": 1, "balances": {"bank": -50}}'])
+        assert (await target.get_balance(1)).bank == 0
+        with pytest.raises(ValueError, match="quantities"):
+            await target.import_from(['{"id": 1, "items": {"sword": true}}'])
+        with pytest.raises(ValueError, match="id must be"):
+            await target.import_from(['{"id": [1], "balances": {"bank": 5}}'])
+        with pytest.raises(ValueError, match="guild_id must be"):
+            await target.import_from(['{"id": 1, "guild_id": null}'])
+    finally:
+        await source.close()
+        await target.close()
+
+
+async def test_import_negative_balance_without_ensure_positive_balance(tmp_path):
+    path = tmp_path / "backup.ndjson"
+    source = Economy(str(tmp_path / "source.db"), ensure_positive_balance=False)
+    target = Economy(str(tmp_path / "target.db"), ensure_positive_balance=False)
+    try:
+        await source.set_money(1, "bank", -50)
+        assert await source.export_to(path) == 1
+
+        assert await target.import_from(path) == 1
+        assert (await target.get_balance(1)).bank == -50
+    finally:
+        await source.close()
+        await target.close()
+
+
 async def test_delete_user_account_cascade(economy, user_id):
     await economy.ensure_registered(user_id)
     await economy.add_item(user_id, "x")
@@ -116,3 +547,486 @@ async def test_delete_user_account_cascade(economy, user_id):
 
     with pytest.raises(NotFoundException):
         await economy.get_user(user_id)
+
+
+async def test_money_mutations_register_user(economy):
+    # each mutation upserts the row, no ensure_registered call needed
+    await economy.add_money(10, "wallet", 25)
+    await economy.remove_money(11, "bank", 5)
+    await economy.set_money(12, "bank", 40)
+
+    assert (await economy.get_user(10)).wallet == 25
+    assert (await economy.get_user(11)).bank == 0
+    user = await economy.get_user(12)
+    assert user.bank == 40
+    assert user.wallet == 0
+
+
+async def test_precompiled_statements(tmp_path, monkeypatch):
+    import aiosqlite
+
+    connect = aiosqlite.connect
+    options = []
+
+    def recording_connect(*args, **kwargs):
+        options.append(kwargs)
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr("DiscordEconomy.Sqlite.aiosqlite.connect", recording_connect)
+
+    async with Economy(str(tmp_path / "statements.db"), currencies=["gems"]) as e:
+        statements = e._Economy__statements
+        assert set(statements) == {
+            (operation, field)
+            for operation in ("add", "remove", "set", "debit")
+            for field in ("bank", "wallet", "gems")
+        }
+        assert options
+        assert all(kwargs["cached_statements"] >= len(statements) for kwargs in options)
+
+        for field in e.currencies:
+            await e.set_money(1, field, 50)
+            await e.add_money(1, field, 10)
+            await e.remove_money(1, field, 5)
+            await e.withdraw(1, field, 5)
+            await e.transfer(1, field, 2, field, 10)
+            assert (await e.purchase(1, field, 10, f"{field}-item")).success
+
+        assert (await e.get_balance(1)).balances == {"bank": 30, "wallet": 30, "gems": 30}
+        assert (await e.get_balance(2)).balances == {"bank": 10, "wallet": 10, "gems": 10}
+
+        # the registry holds the strings the builder produces, so nothing is formatted per call
+        assert all(
+            statements[operation, field] == e._Economy__build_money_statement(operation, field)
+            for operation, field in statements
+            if operation != "debit"
+        )
+
+        # fields without a statement are rejected before anything is written
+        with pytest.raises(ValueError, match="Invalid field"):
+            await e.add_money(1, "coins", 5)
+        with pytest.raises(ValueError, match="Invalid field"):
+            await e.set_money(1, "bank; DROP TABLE users", 5)
+        with pytest.raises(ValueError, match="Invalid field"):
+            await e.bulk_remove_money([(1, "bank", 1), (1, "items", 1)])
+        with pytest.raises(ValueError, match="Invalid field"):
+            await e.transfer(1, "bank", 2, "coins", 1)
+        with pytest.raises(ValueError, match="Invalid field"):
+            await e.purchase(1, "coins", 1, "x")
+        assert (await e.get_balance(1)).balances == {"bank": 30, "wallet": 30, "gems": 30}
+
+
+async def test_concurrent_add_money(economy, user_id):
+    await asyncio.gather(
+        *(economy.add_money(user_id, "wallet", 1) for _ in range(50))
+    )
+
+    user = await economy.get_user(user_id)
+    assert user.wallet == 50
+
+
+async def test_get_all_users_chunked(economy):
+    for uid in range(1, 8):
+        await economy.add_money(uid, "wallet", uid)
+        await economy.add_item(uid, f"item-{uid}")
+
+    users = [u async for u in economy.get_all_users(chunk_size=3)]
+
+    # user 0 is registered by the fixture
+    assert [u.id for u in users] == list(range(8))
+    for u in users[1:]:
+        assert u.wallet == u.id
+        assert [i.name for i in u.items] == [f"item-{u.id}"]
+    assert users[0].items == []
+
+    with pytest.raises(ValueError):
+        async for _ in economy.get_all_users(chunk_size=0):
+            pass
+
+
+async def test_get_all_users_raw(tmp_path):
+    economy = Economy(str(tmp_path / "raw.db"), currencies=["gems"])
+    try:
+        for uid in range(1, 5):
+            await economy.add_money(uid, "wallet", uid)
+            await economy.add_money(uid, "gems", uid * 2)
+        await economy.add_item(2, "sword", 3)
+
+        rows = [row async for row in economy.get_all_users(chunk_size=2, raw=True)]
+        users = [user async for user in economy.get_all_users(chunk_size=2)]
+
+        assert all(isinstance(row, UserRow) for row in rows)
+        assert [row.id for row in rows] == [user.id for user in users] == [1, 2, 3, 4]
+        assert rows[1].wallet == 2 and rows[1].extra == (4,)
+        assert [(i.name, i.owner_id, i.quantity) for i in rows[1].items] == [("sword", 2, 3)]
+        assert rows[0].items == ()
+
+        # full objects are slotted, raw rows are immutable
+        assert not hasattr(users[0], "__dict__")
+        assert not hasattr(users[1].items[0], "__dict__")
+        with pytest.raises(AttributeError):
+            rows[0].bank = 1
+    finally:
+        await economy.close()
+
+
+async def test_get_leaderboard(economy):
+    balances = {1: (100, 5), 2: (50, 200), 3: (75, 0)}
+    for uid, (bank, wallet) in balances.items():
+        await economy.set_money(uid, "bank", bank)
+        await economy.set_money(uid, "wallet", wallet)
+        await economy.add_item(uid, "trophy")
+
+    top = await economy.get_leaderboard("bank", limit=2)
+    assert [b.id for b in top] == [1, 3]
+
+    top = await economy.get_leaderboard("wallet", limit=1)
+    assert [(b.id, b.bank, b.wallet) for b in top] == [(2, 50, 200)]
+
+    top = await economy.get_leaderboard("bank+wallet", limit=2, offset=1)
+    assert [b.id for b in top] == [1, 3]
+
+    with pytest.raises(ValueError):
+        await economy.get_leaderboard("items")
+
+
+async def test_bulk_money_operations(economy):
+    result = await economy.bulk_add_money(
+        ((uid, "wallet", 100) for uid in range(1, 6)), chunk_size=2
+    )
+    assert result.operations == 5
+    assert result.changed == 5
+
+    async def removals():
+        for uid in range(1, 6):
+            yield uid, "wallet", uid * 30
+
+    await economy.bulk_remove_money(removals())
+    await economy.bulk_set_money([(1, "bank", 500), (2, "bank", 250)])
+
+    assert (await economy.get_user(1)).wallet == 70
+    assert (await economy.get_user(4)).wallet == 0
+    assert (await economy.get_user(1)).bank == 500
+    assert (await economy.get_user(2)).bank == 250
+
+
+async def test_bulk_money_rolls_back_on_invalid_operation(economy, user_id):
+    with pytest.raises(NegativeAmountException):
+        await economy.bulk_add_money(
+            [(user_id, "wallet", 10), (user_id, "wallet", -1)], chunk_size=1
+        )
+
+    with pytest.raises(NotFoundException):
+        await economy.get_user(user_id)
+
+
+async def test_bulk_money_does_not_wait_for_producer_under_writer(economy):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def operations():
+        yield 1, "wallet", 5
+        started.set()
+        await release.wait()
+        yield 2, "wallet", 5
+
+    task = asyncio.create_task(economy.bulk_add_money(operations()))
+    await started.wait()
+
+    try:
+        # The writer is free while the producer is stalled
+        await asyncio.wait_for(economy.add_money(3, "wallet", 1), 5)
+    finally:
+        release.set()
+
+    assert (await task).operations == 2
+
+
+async def test_transfer(economy):
+    await economy.set_money(1, "bank", 100)
+
+    await economy.transfer(1, "bank", 1, "wallet", 60)
+    await economy.transfer(1, "wallet", 2, "bank", 25)
+
+    user = await economy.get_user(1)
+    assert (user.bank, user.wallet) == (40, 35)
+    assert (await economy.get_user(2)).bank == 25
+
+    with pytest.raises(InsufficientFundsException):
+        await economy.transfer(1, "bank", 2, "bank", 41)
+
+    # failed transfer leaves both balances untouched
+    assert (await economy.get_user(1)).bank == 40
+    assert (await economy.get_user(2)).bank == 25
+
+
+async def test_group_commit_batches_writes(group_commit_economy):
+    economy = group_commit_economy
+
+    await asyncio.gather(
+        *(economy.add_money(uid % 10, "wallet", 1) for uid in range(200))
+    )
+
+    # read-your-writes: awaited writes are committed
+    for uid in range(10):
+        assert (await economy.get_user(uid)).wallet == 20
+
+    # a failing statement only fails its own caller
+    results = await asyncio.gather(
+        economy.add_item(1, "sword"),
+        economy.add_item(999, "ghost"),
+        return_exceptions=True,
+    )
+    assert results[0] is None
+    assert isinstance(results[1], sqlite3.IntegrityError)
+    assert [i.name for i in (await economy.get_user(1)).items] == ["sword"]
+
+    await economy.close()
+
+
+async def test_cache_invalidated_by_writes(cached_economy, user_id):
+    economy = cached_economy
+    await economy.add_money(user_id, "wallet", 10)
+
+    assert (await economy.get_user(user_id)).wallet == 10
+    assert (await economy.get_user(user_id)).wallet == 10
+    stats = economy.cache_stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+    await economy.add_money(user_id, "wallet", 5)
+    await economy.add_item(user_id, "sword")
+    user = await economy.get_user(user_id)
+    assert user.wallet == 15
+    assert [i.name for i in user.items] == ["sword"]
+
+    await economy.transfer(user_id, "wallet", user_id, "bank", 15)
+    assert (await economy.get_user(user_id)).bank == 15
+
+    await economy.delete_user_account(user_id)
+    with pytest.raises(NotFoundException):
+        await economy.get_user(user_id)
+
+
+async def test_cache_invalidated_across_str_and_int_ids(cached_economy):
+    economy = cached_economy
+    await economy.add_money(1, "wallet", 10)
+
+    assert (await economy.get_user("1")).wallet == 10
+    assert (await economy.get_balance(" 1")).wallet == 10
+
+    await economy.add_money(1, "wallet", 5)
+    assert (await economy.get_user("1")).wallet == 15
+    assert (await economy.get_balance("1")).wallet == 15
+
+    await economy.add_item("1", "sword")
+    assert [i.name for i in await economy.get_items(1)] == ["sword"]
+    assert (await economy.get_user(1)).items[0].name == "sword"
+
+
+async def test_cache_disabled_by_default(economy):
+    assert economy.cache_stats() is None
+
+
+async def test_constructor_is_lazy(tmp_path):
+    db_file = tmp_path / "lazy.db"
+
+    economy = Economy(database_name=str(db_file))
+    assert not db_file.exists()
+
+    async with economy:
+        assert db_file.exists()
+        await economy.add_money(1, "bank", 5)
+        assert (await economy.get_user(1)).bank == 5
+
+
+async def test_pool_options_and_stats(tmp_path, monkeypatch):
+    async with Economy(
+        database_name=str(tmp_path / "pool.db"),
+        pool_size=2,
+        acquire_timeout=1,
+        page_cache_size=-4096,
+        mmap_size=0,
+        busy_timeout_ms=1234,
+    ) as e:
+        await asyncio.gather(*(e.add_money(uid, "bank", 1) for uid in range(20)))
+        await asyncio.gather(*(e.get_balance(uid) for uid in range(20)))
+
+        async with e.pool.connection() as conn:
+            pragmas = [
+                (await (await conn.execute(f"PRAGMA {name}")).fetchone())[0]
+                for name in ("cache_size", "mmap_size", "busy_timeout")
+            ]
+        assert pragmas == [-4096, 0, 1234]
+
+        stats = e.pool_stats()
+        assert stats.size == 2
+        assert stats.active == 0
+        assert 1 <= stats.idle <= 2
+        assert stats.checkouts == 20
+        assert stats.writer_checkouts >= 21
+        assert sum(stats.wait_histogram.values()) == stats.checkouts
+
+        # Counts the pool doesn't expose are reported as unknown
+        with monkeypatch.context() as patch:
+            patch.delattr(e.pool, "_pool")
+            stats = e.pool_stats()
+        assert (stats.open, stats.idle, stats.checkouts) == (None, None, 20)
+
+        # Hold every connection so the next checkout times out
+        async with e.pool.connection(), e.pool.connection():
+            with pytest.raises(PoolConnectionAcquireTimeoutError):
+                await e.get_balance(1)
+
+        assert e.pool_stats().acquire_timeouts == 1
+
+
+async def test_readers_are_query_only_and_dont_block_writes(economy, user_id):
+    await economy.add_money(user_id, "bank", 10)
+
+    async with economy.pool.connection() as reader:
+        with pytest.raises(sqlite3.OperationalError):
+            await reader.execute("INSERT INTO users VALUES (5, 0, 0)")
+        await reader.rollback()
+
+        # An open read transaction keeps its snapshot while the writer commits
+        await reader.execute("BEGIN")
+        query = await reader.execute("SELECT bank FROM users WHERE id = ?", (user_id,))
+        assert (await query.fetchone())[0] == 10
+
+        await economy.add_money(user_id, "bank", 5)
+
+        query = await reader.execute("SELECT bank FROM users WHERE id = ?", (user_id,))
+        assert (await query.fetchone())[0] == 10
+
+    assert (await economy.get_balance(user_id)).bank == 15
+
+
+async def test_extra_currencies(tmp_path):
+    db_file = str(tmp_path / "currencies.db")
+
+    async with Economy(database_name=db_file) as e:
+        await e.add_money(1, "bank", 10)
+
+        with pytest.raises(ValueError):
+            await e.add_money(1, "gems", 5)
+
+    # Reopening with a new currency adds its column and index
+    async with Economy(database_name=db_file, currencies=["gems", "order"]) as e:
+        assert e.currencies == ("bank", "wallet", "gems", "order")
+
+        user = await e.get_user(1)
+        assert user.balances == {"bank": 10, "wallet": 0, "gems": 0, "order": 0}
+
+        await e.add_money(1, "gems", 50)
+        await e.add_money(2, "gems", 70)
+        await e.set_money(3, "order", 4)
+        await e.remove_money(2, "gems", 100)
+
+        assert (await e.get_balance(2)).balances == {"bank": 0, "wallet": 0, "gems": 0, "order": 0}
+        assert [b.id for b in await e.get_leaderboard("gems")] == [1, 3, 2]
+
+        await e.transfer(1, "gems", 1, "bank", 20)
+        result = await e.purchase(1, "gems", 30, "crystal")
+        assert result.success
+        assert result.balance.balances == {"bank": 30, "wallet": 0, "gems": 0, "order": 0}
+
+        async with e.pool.connection() as conn:
+            query = await conn.execute("PRAGMA index_list(users)")
+            assert {"gems_idx", "order_idx"} <= {row[1] for row in await query.fetchall()}
+
+    with pytest.raises(ValueError):
+        Economy(database_name=db_file, currencies=["items"])
+
+
+@pytest.mark.parametrize("currencies", [["Bank"], ["gems", "GEMS"]])
+async def test_currencies_differing_in_case_rejected(tmp_path, currencies):
+    with pytest.raises(ValueError, match="clashes"):
+        Economy(database_name=str(tmp_path / "case.db"), currencies=currencies)
+
+
+async def test_guild_scopes(economy):
+    guild_a = economy.scope(111)
+    guild_b = economy.scope(222)
+
+    await guild_a.add_money(1, "bank", 100)
+    await guild_b.add_money(1, "bank", 5)
+    await guild_b.add_money(2, "bank", 50)
+    await guild_a.add_item(1, "sword")
+    await economy.add_money(1, "bank", 1)
+
+    assert (await guild_a.get_balance(1)).bank == 100
+    assert (await guild_b.get_user(1)).items == []
+    assert (await economy.get_user(1)).bank == 1
+    assert await guild_a.has_item(1, "sword")
+    assert not await economy.has_item(1, "sword")
+
+    await guild_b.transfer(2, "bank", 1, "wallet", 20)
+    assert [b.id for b in await guild_b.get_leaderboard("bank+wallet")] == [2, 1]
+    assert [u.id async for u in guild_a.get_all_users()] == [1]
+
+    async with economy.pool.connection() as conn:
+        query = await conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM users WHERE guild_id = ? "
+            "ORDER BY bank + wallet DESC, id DESC LIMIT 10",
+            (222,),
+        )
+        plan = " ".join(row[3] for row in await query.fetchall())
+        assert "total_idx" in plan and "TEMP B-TREE" not in plan
+
+    assert await guild_b.wipe_guild() == 2
+    assert await guild_b.get_leaderboard() == []
+    assert (await guild_a.get_balance(1)).bank == 100
+
+    with pytest.raises(NotFoundException):
+        await guild_b.get_user(2)
+
+
+async def test_unscoped_data_migrated_to_global_guild(tmp_path):
+    db_file = str(tmp_path / "unscoped_layout.db")
+
+    conn = sqlite3.connect(db_file)
+    conn.executescript(
+        """
+        CREATE TABLE users (id INTEGER PRIMARY KEY, bank NUMERIC, wallet NUMERIC,
+                            gems NUMERIC NOT NULL DEFAULT 0);
+        CREATE TABLE items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, itemName TEXT, ownerID INTEGER,
+            qty INTEGER NOT NULL DEFAULT 1, UNIQUE (ownerID, itemName),
+            FOREIGN KEY (ownerID) REFERENCES users (id) ON DELETE CASCADE
+        );
+        CREATE INDEX bank_idx ON users(bank);
+        CREATE INDEX total_idx ON users(bank + wallet);
+        INSERT INTO users VALUES (1, 10, 5, 3), (2, 20, 0, 0);
+        INSERT INTO items VALUES (NULL, 'ore', 1, 4);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    async with Economy(database_name=db_file, currencies=["gems"]) as e:
+        user = await e.get_user(1)
+        assert user.balances == {"bank": 10, "wallet": 5, "gems": 3}
+        assert [(i.name, i.quantity) for i in user.items] == [("ore", 4)]
+        assert [b.id for b in await e.get_leaderboard("bank")] == [2, 1]
+
+        async with e.pool.connection() as conn:
+            query = await conn.execute("PRAGMA index_info(total_idx)")
+            assert [row[2] for row in await query.fetchall()] == ["guild_id", None]
+
+        await e.delete_user_account(1)
+        assert await e.get_items(1) == []
+
+
+async def test_withdraw(economy, user_id):
+    await economy.add_money(user_id, "wallet", 30)
+
+    await economy.withdraw(user_id, "wallet", 30)
+    assert (await economy.get_balance(user_id)).wallet == 0
+
+    with pytest.raises(InsufficientFundsException):
+        await economy.withdraw(user_id, "wallet", 1)
+
+    with pytest.raises(InsufficientFundsException):
+        await economy.withdraw(42, "wallet", 1)
+
+    with pytest.raises(NotFoundException):
+        await economy.get_user(42)